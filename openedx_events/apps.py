@@ -2,27 +2,74 @@
 openedx_events Django application initialization.
 """
 import logging
+from functools import lru_cache
+from types import MappingProxyType
 
 from django.apps import AppConfig
 from django.conf import settings
+from django.dispatch import receiver
+from django.test.signals import setting_changed
 
 from openedx_events.event_bus import get_producer
+from openedx_events.event_bus.codecs import get_codec
+from openedx_events.event_bus.event_keys import get_event_key_accessor
+from openedx_events.event_bus.publishing import (
+    DEFAULT_PRODUCER_MODE,
+    MODE_IMMEDIATE,
+    MODE_ON_COMMIT,
+    PRODUCER_MODES,
+    publish_on_commit,
+    publish_to_outbox,
+)
 from openedx_events.exceptions import ProducerConfigurationError
 from openedx_events.tooling import SIGNAL_PROCESSED_FROM_EVENT_BUS, OpenEdxPublicSignal, load_all_signals
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def get_producer_routes():
+    """
+    Get the topics to which events of each type are produced, compiled from `EVENT_BUS_PRODUCER_CONFIG`.
+
+    The routing table is computed once and replaced as a whole when settings change.
+
+    Returns:
+        A read-only mapping of event_type to a tuple of (mode, topics) pairs, one per publishing mode used by the
+        enabled topics of the event type, where topics is a tuple of (topic, event_key_field) pairs.
+        For example, with the configuration documented in OpenedxEventsConfig.ready:
+        {
+            "org.openedx.content_authoring.xblock.deleted.v1": (
+                ("on-commit", (("topic_a", "xblock_info.usage_key"),)),
+            ),
+            "org.openedx.content_authoring.course.catalog_info.changed.v1": (
+                ("immediate", (("topic_c", "course_info.course_key"),)),
+            ),
+        }
+    """
+    signals_config = getattr(settings, "EVENT_BUS_PRODUCER_CONFIG", {})
+    default_mode = getattr(settings, "EVENT_BUS_PRODUCER_MODE", DEFAULT_PRODUCER_MODE)
+    routes = {}
+    for event_type, configurations in signals_config.items():
+        topics_by_mode = {}
+        for topic, topic_configuration in configurations.items():
+            if topic_configuration["enabled"] is True:
+                mode = topic_configuration.get("mode", default_mode)
+                topics_by_mode.setdefault(mode, []).append((topic, topic_configuration["event_key_field"]))
+        routes[event_type] = tuple((mode, tuple(topics)) for mode, topics in topics_by_mode.items())
+    return MappingProxyType(routes)
+
+
+@receiver(setting_changed)
+def _reset_state(sender, **kwargs):  # pylint: disable=unused-argument
+    """Recompile the routing table from EVENT_BUS_PRODUCER_CONFIG and EVENT_BUS_PRODUCER_MODE."""
+    get_producer_routes.cache_clear()
+
+
 def general_signal_handler(sender, signal, **kwargs):  # pylint: disable=unused-argument
     """
     Signal handler for producing events to configured event bus.
     """
-    event_type_producer_configs = getattr(settings, "EVENT_BUS_PRODUCER_CONFIG", {}).get(signal.event_type, {})
-    # event_type_producer_configs should look something like
-    # {
-    #        "topic_a": { "event_key_field": "my.key.field", "enabled": True },
-    #        "topic_b": { "event_key_field": "my.key.field", "enabled": False }
-    # }"
     if kwargs.get(SIGNAL_PROCESSED_FROM_EVENT_BUS) is True:
         logger.debug(
             "Declining to send signal to the Event Bus since that's "
@@ -30,14 +77,33 @@ def general_signal_handler(sender, signal, **kwargs):  # pylint: disable=unused-
         )
         return
 
+    routes = get_producer_routes().get(signal.event_type)
+    if not routes:
+        return
+
     event_data = {key: kwargs.get(key) for key in signal.init_data}
 
-    for topic in event_type_producer_configs.keys():
-        if event_type_producer_configs[topic]["enabled"] is True:
-            get_producer().send(
+    producer = get_producer()
+    for mode, topics in routes:
+        if mode == MODE_IMMEDIATE:
+            producer.send_many(
                 signal=signal,
-                topic=topic,
-                event_key_field=event_type_producer_configs[topic]["event_key_field"],
+                topics=topics,
+                event_data=event_data,
+                event_metadata=kwargs["metadata"],
+            )
+        elif mode == MODE_ON_COMMIT:
+            publish_on_commit(
+                producer,
+                signal=signal,
+                topics=topics,
+                event_data=event_data,
+                event_metadata=kwargs["metadata"],
+            )
+        else:
+            publish_to_outbox(
+                signal=signal,
+                topics=topics,
                 event_data=event_data,
                 event_metadata=kwargs["metadata"],
             )
@@ -57,7 +123,8 @@ class OpenedxEventsConfig(AppConfig):
         Example expected signal configuration:
         {
             "topic_a": { "event_key_field": "my.key.field", "enabled": True },
-            "topic_b": { "event_key_field": "my.key.field", "enabled": False }
+            "topic_b": { "event_key_field": "my.key.field", "enabled": False, "mode": "immediate" },
+            "topic_c": { "event_key_field": "my.key.field", "enabled": True, "codec": "lzma" }
         }
 
         Raises:
@@ -91,6 +158,18 @@ class OpenedxEventsConfig(AppConfig):
                         message=(f"Expected type: {expected_type} for '{expected_key}', "
                                  f"found: {type(topic_configuration[expected_key])}")
                     )
+            if "mode" in topic_configuration and topic_configuration["mode"] not in PRODUCER_MODES:
+                raise ProducerConfigurationError(
+                    event_type=event_type,
+                    message=f"Unknown mode: '{topic_configuration['mode']}', expected one of {PRODUCER_MODES}"
+                )
+            if "codec" in topic_configuration:
+                try:
+                    get_codec(topic_configuration["codec"])
+                except (TypeError, ValueError) as exc:
+                    raise ProducerConfigurationError(event_type=event_type, message=str(exc)) from exc
+            # Compiling the accessor checks the path against the signal data, and caches it for producers.
+            get_event_key_accessor(signal, topic_configuration["event_key_field"])
         return signal
 
     def ready(self):
@@ -104,12 +183,12 @@ class OpenedxEventsConfig(AppConfig):
                 "topic_b": { "event_key_field": "xblock_info.usage_key", "enabled": False }
             },
             "org.openedx.content_authoring.course.catalog_info.changed.v1" : {
-                "topic_c": {"event_key_field": "course_info.course_key", "enabled": True }
+                "topic_c": {"event_key_field": "course_info.course_key", "enabled": True, "mode": "immediate" }
             }
         }
 
         Raises:
-            ProducerConfigurationError: If `EVENT_BUS_PRODUCER_CONFIG` is not valid.
+            ProducerConfigurationError: If `EVENT_BUS_PRODUCER_CONFIG` or `EVENT_BUS_PRODUCER_MODE` is not valid.
         """
         load_all_signals()
         signals_config = getattr(settings, "EVENT_BUS_PRODUCER_CONFIG", {})
@@ -118,7 +197,14 @@ class OpenedxEventsConfig(AppConfig):
                 message=("Setting 'EVENT_BUS_PRODUCER_CONFIG' should be a dictionary with event_type as"
                          " key and list or tuple of config dictionaries as values")
             )
+        default_mode = getattr(settings, "EVENT_BUS_PRODUCER_MODE", DEFAULT_PRODUCER_MODE)
+        if default_mode not in PRODUCER_MODES:
+            raise ProducerConfigurationError(
+                message=f"Setting 'EVENT_BUS_PRODUCER_MODE' should be one of {PRODUCER_MODES}, found: '{default_mode}'"
+            )
         for event_type, configurations in signals_config.items():
             signal = self._get_validated_signal_config(event_type, configurations)
             signal.connect(general_signal_handler)
+        get_producer_routes.cache_clear()
+        get_producer_routes()
         return super().ready()
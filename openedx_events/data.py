@@ -5,13 +5,17 @@ These attributes follow the form of attr objects specified in OEP-49 data
 pattern.
 """
 import json
+import os
 import socket
 from datetime import datetime, timezone
+from functools import lru_cache
 from uuid import UUID, uuid1
 
 import attr
 import attrs
 from django.conf import settings
+from django.dispatch import receiver
+from django.test.signals import setting_changed
 
 import openedx_events
 
@@ -50,6 +54,31 @@ def _get_source():
     return "openedx/{service}/web".format(service=(get_service_name() or "SERVICE_NAME_UNSET"))
 
 
+@lru_cache(maxsize=None)
+def _get_process_metadata():
+    """
+    Get the metadata fields shared by all events sent by this process.
+
+    Returns:
+        dict: Default source, sourcehost and sourcelib of events.
+    """
+    return {
+        "source": _get_source(),
+        "sourcehost": socket.gethostname(),
+        "sourcelib": tuple(map(int, openedx_events.__version__.split("."))),
+    }
+
+
+@receiver(setting_changed)
+def _reset_state(sender, **kwargs):  # pylint: disable=unused-argument
+    """Recompute the default source of events, which depends on EVENTS_SERVICE_NAME or SERVICE_VARIANT."""
+    _get_process_metadata.cache_clear()
+
+
+# Forked children (e.g. of pre-forking servers) may be reconfigured before sending events.
+os.register_at_fork(after_in_child=_get_process_metadata.cache_clear)
+
+
 @attr.s(frozen=True)
 class EventsMetadata:
     """
@@ -83,14 +112,12 @@ class EventsMetadata:
     )
     source = attr.ib(
         type=str, default=None,
-        converter=attr.converters.default_if_none(attr.Factory(_get_source)),
+        converter=attr.converters.default_if_none(attr.Factory(lambda: _get_process_metadata()["source"])),
         validator=attr.validators.instance_of(str),
     )
     sourcehost = attr.ib(
         type=str, default=None,
-        converter=attr.converters.default_if_none(
-            attr.Factory(lambda: socket.gethostname())  # pylint: disable=unnecessary-lambda
-        ),
+        converter=attr.converters.default_if_none(attr.Factory(lambda: _get_process_metadata()["sourcehost"])),
         validator=attr.validators.instance_of(str),
     )
     time = attr.ib(
@@ -100,9 +127,7 @@ class EventsMetadata:
     )
     sourcelib = attr.ib(
         type=tuple, default=None,
-        converter=attr.converters.default_if_none(
-            attr.Factory(lambda: tuple(map(int, openedx_events.__version__.split("."))))
-        ),
+        converter=attr.converters.default_if_none(attr.Factory(lambda: _get_process_metadata()["sourcelib"])),
         validator=attr.validators.instance_of(tuple),
     )
 
@@ -139,4 +164,5 @@ class EventsMetadata:
         time = datetime.fromisoformat(as_json['time'])
         sourcelib = tuple(as_json['sourcelib'])
         return cls(event_type=as_json['event_type'], id=UUID(as_json['id']), source=as_json['source'],
-                   sourcehost=as_json['sourcehost'], time=time, sourcelib=sourcelib)
+                   sourcehost=as_json['sourcehost'], time=time, sourcelib=sourcelib,
+                   minorversion=as_json.get('minorversion'))
@@ -18,13 +18,18 @@ import copy
 import warnings
 from abc import ABC, abstractmethod
 from functools import lru_cache
+from typing import Optional, Sequence, Tuple
 
+import attr
 from django.conf import settings
 from django.dispatch import receiver
 from django.test.signals import setting_changed
 from django.utils.module_loading import import_string
 
 from openedx_events.data import EventsMetadata
+from openedx_events.event_bus.codecs import get_topic_codec
+from openedx_events.event_bus.event_keys import get_event_key_accessor, serialize_event_key
+from openedx_events.event_bus.partitioning import PARTITIONER_MURMUR2, partition_for
 from openedx_events.tooling import OpenEdxPublicSignal
 
 
@@ -68,6 +73,53 @@ def _try_load(*, setting_name: str, args: tuple, kwargs: dict, expected_class: t
         return default
 
 
+@attr.s(frozen=True)
+class ProducerMessage:
+    """
+    An event to be sent to the event bus under a topic, as passed to ``EventBusProducer.send``.
+
+    Attributes:
+        signal: The original OpenEdxPublicSignal the event was sent to
+        topic: The event bus topic for the event (without any environmental prefix)
+        event_key_field: Path to the event data field to use as the event key
+        event_data: The event data (kwargs) sent to the signal
+        event_metadata: The CloudEvent metadata
+    """
+
+    signal = attr.ib(type=OpenEdxPublicSignal)
+    topic = attr.ib(type=str)
+    event_key_field = attr.ib(type=str)
+    event_data = attr.ib(type=dict)
+    event_metadata = attr.ib(type=EventsMetadata)
+
+    @property
+    def event_key(self):
+        """
+        The value of the event key field, found with the accessor compiled for the signal and event key field.
+        """
+        return get_event_key_accessor(self.signal, self.event_key_field)(self.event_data)
+
+    @property
+    def event_key_bytes(self) -> bytes:
+        """
+        The event key, serialized with ``serialize_event_key``.
+        """
+        return serialize_event_key(self.event_key)
+
+    @property
+    def codec(self) -> Optional[str]:
+        """
+        The name of the codec configured to compress the event for its topic, if any (see ``encode_payload``).
+        """
+        return get_topic_codec(self.signal.event_type, self.topic)
+
+    def partition(self, num_partitions: int, strategy: str = PARTITIONER_MURMUR2) -> int:
+        """
+        Get the partition of the event among num_partitions, by event key (see ``partition_for``).
+        """
+        return partition_for(self.event_key_bytes, num_partitions, strategy)
+
+
 class EventBusProducer(ABC):
     """
     Parent class for event bus producer implementations.
@@ -90,6 +142,44 @@ class EventBusProducer(ABC):
             event_metadata: The CloudEvent metadata
         """
 
+    def send_many(
+            self, *, signal: OpenEdxPublicSignal, topics: Sequence[Tuple[str, str]], event_data: dict,
+            event_metadata: EventsMetadata
+    ) -> None:
+        """
+        Send a signal event to the event bus under each of the specified topics.
+
+        The default implementation calls ``send`` once per topic. Implementations should override it to
+        serialize the event once and send the same payload to all topics.
+
+        Arguments:
+            signal: The original OpenEdxPublicSignal the event was sent to
+            topics: (topic, event_key_field) pairs, see ``send`` for the meaning of each
+            event_data: The event data (kwargs) sent to the signal
+            event_metadata: The CloudEvent metadata
+        """
+        for topic, event_key_field in topics:
+            self.send(
+                signal=signal, topic=topic, event_key_field=event_key_field, event_data=event_data,
+                event_metadata=event_metadata,
+            )
+
+    def send_batch(self, messages: Sequence[ProducerMessage]) -> None:
+        """
+        Send several events to the event bus, in order.
+
+        The default implementation calls ``send`` once per message. Implementations should override it if their
+        event bus client is more efficient with batches of messages.
+
+        Arguments:
+            messages: The events to send, possibly to different topics
+        """
+        for message in messages:
+            self.send(
+                signal=message.signal, topic=message.topic, event_key_field=message.event_key_field,
+                event_data=message.event_data, event_metadata=message.event_metadata,
+            )
+
 
 class NoEventBusProducer(EventBusProducer):
     """
@@ -102,6 +192,15 @@ class NoEventBusProducer(EventBusProducer):
     ) -> None:
         """Do nothing."""
 
+    def send_many(
+            self, *, signal: OpenEdxPublicSignal, topics: Sequence[Tuple[str, str]], event_data: dict,
+            event_metadata: EventsMetadata,
+    ) -> None:
+        """Do nothing."""
+
+    def send_batch(self, messages: Sequence[ProducerMessage]) -> None:
+        """Do nothing."""
+
 
 # .. setting_name: EVENT_BUS_PRODUCER
 # .. setting_default: None
@@ -112,10 +211,33 @@ class NoEventBusProducer(EventBusProducer):
 #   by openedx_events. If setting is not supplied or the callable raises an exception or does not return
 #   an instance of EventBusProducer, calls to the producer will be ignored with a warning at startup.
 
+# .. setting_name: EVENT_BUS_PRODUCER_ASYNC
+# .. setting_default: None
+# .. setting_description: Dictionary of options to send events to the event bus from a background thread,
+#   instead of synchronously in the code sending the event, or None to send them synchronously. The producer
+#   configured with EVENT_BUS_PRODUCER is then wrapped in an ``AsyncEventBusProducer``, which queues events in
+#   memory. Options are passed to ``AsyncEventBusProducer``: ``max_queue_size`` (default 10000), ``overflow``
+#   ("block", "drop-oldest" or "spill" to send synchronously when the queue is full; default "block") and
+#   ``exit_timeout`` (seconds to wait for queued events when the process exits; default 10). Queued events are
+#   lost if the process is killed.
+
+# .. setting_name: EVENT_BUS_PRODUCER_BATCHING
+# .. setting_default: None
+# .. setting_description: Dictionary of options to group events sent to the same topic into batches, handed to
+#   the ``send_batch`` method of the producer configured with EVENT_BUS_PRODUCER, or None to send events one by
+#   one. The producer is then wrapped in a ``BatchingEventBusProducer``. Options are passed to
+#   ``BatchingEventBusProducer``: ``max_batch`` (maximum number of events per batch; default 500),
+#   ``max_batch_bytes`` (maximum Avro-serialized size of the event data of a batch, or None for no limit;
+#   default None), ``linger_ms`` (maximum time an event waits for its batch to fill up; default 50) and
+#   ``exit_timeout``. Batches are sent from a background thread, so pending events are lost if the process is
+#   killed. When EVENT_BUS_PRODUCER_ASYNC is also set, events are queued before being batched.
+
 @lru_cache  # will just be one cache entry, in practice
-def get_producer() -> EventBusProducer:
+def get_backend_producer() -> EventBusProducer:
     """
-    Create or retrieve the producer implementation, as configured.
+    Create or retrieve the producer implementation configured with EVENT_BUS_PRODUCER, sending events synchronously.
+
+    Unlike ``get_producer``, never wraps the implementation to queue or batch events in memory.
 
     If misconfigured, returns a fake implementation that can be called but does nothing.
     """
@@ -125,6 +247,29 @@ def get_producer() -> EventBusProducer:
     )
 
 
+@lru_cache  # will just be one cache entry, in practice
+def get_producer() -> EventBusProducer:
+    """
+    Create or retrieve the producer implementation, as configured.
+
+    If misconfigured, returns a fake implementation that can be called but does nothing.
+    """
+    producer = get_backend_producer()
+    if isinstance(producer, NoEventBusProducer):
+        return producer
+    batching_options = getattr(settings, "EVENT_BUS_PRODUCER_BATCHING", None)
+    if batching_options is not None:
+        # pylint: disable-next=import-outside-toplevel,cyclic-import
+        from openedx_events.event_bus.batching_producer import BatchingEventBusProducer
+        producer = BatchingEventBusProducer(producer, **batching_options)
+    async_options = getattr(settings, "EVENT_BUS_PRODUCER_ASYNC", None)
+    if async_options is not None:
+        # pylint: disable-next=import-outside-toplevel,cyclic-import
+        from openedx_events.event_bus.async_producer import AsyncEventBusProducer
+        producer = AsyncEventBusProducer(producer, **async_options)
+    return producer
+
+
 class EventBusConsumer(ABC):
     """
     Parent class for event bus consumer implementations.
@@ -186,6 +331,17 @@ def make_single_consumer(*, topic: str, group_id: str,
 @receiver(setting_changed)
 def _reset_state(sender, **kwargs):  # pylint: disable=unused-argument
     """Reset caches when settings change during unit tests."""
+    if get_producer.cache_info().currsize:
+        # Send the events queued by the asynchronous and batching wrappers before dropping them.
+        # pylint: disable-next=import-outside-toplevel,cyclic-import
+        from openedx_events.event_bus.async_producer import AsyncEventBusProducer
+        # pylint: disable-next=import-outside-toplevel,cyclic-import
+        from openedx_events.event_bus.batching_producer import BatchingEventBusProducer
+        producer = get_producer()
+        while isinstance(producer, (AsyncEventBusProducer, BatchingEventBusProducer)):
+            producer.close(timeout=producer.exit_timeout)
+            producer = producer.producer
+    get_backend_producer.cache_clear()
     get_producer.cache_clear()
 
 
@@ -196,7 +352,17 @@ def _reset_state(sender, **kwargs):  # pylint: disable=unused-argument
 #    published to the topic, topic/stream name called `topic` where the event will be pushed to,
 #    `event_key_field` which is a period-delimited string path to event data field to use as event key.
 #    The topic names should not include environment prefix as it will be dynamically added based on
-#    EVENT_BUS_TOPIC_PREFIX setting. See 0012-producing-to-event-bus-via-settings for more details.
+#    EVENT_BUS_TOPIC_PREFIX setting. An optional `mode` names the publishing mode of the topic, overriding
+#    EVENT_BUS_PRODUCER_MODE. See 0012-producing-to-event-bus-via-settings for more details.
+
+# .. setting_name: EVENT_BUS_PRODUCER_MODE
+# .. setting_default: "on-commit"
+# .. setting_description: Publishing mode of topics whose EVENT_BUS_PRODUCER_CONFIG does not name one. With
+#    "on-commit", events sent within a database transaction are published once it commits, and discarded if it
+#    (or the savepoint they were sent in) is rolled back; events sent outside of transactions are published
+#    immediately. With "immediate", events are published as soon as they are sent. With "outbox", events are
+#    saved to the database within the current transaction and published by the ``relay_outbox`` management
+#    command. See 0015-outbox-pattern-and-production-modes for more details.
 
 
 def merge_producer_configs(producer_config_original, producer_config_overrides):
@@ -210,7 +376,8 @@ def merge_producer_configs(producer_config_original, producer_config_overrides):
     Returns:
         A new EVENT_BUS_PRODUCER_CONFIG map created by combining the two maps. All event_type/topic pairs in
         producer_config_overrides are added to the producer_config_original. If there is a conflict on whether a
-        particular event_type/topic pair is enabled, producer_config_overrides wins out.
+        particular event_type/topic pair is enabled, or on its event_key_field, mode or codec,
+        producer_config_overrides wins out.
     """
     combined = copy.deepcopy(producer_config_original)
     for event_type, event_type_config_overrides in producer_config_overrides.items():
@@ -219,10 +386,16 @@ def merge_producer_configs(producer_config_original, producer_config_overrides):
             topic_config_combined = event_type_config_combined.get(topic, {})
             enabled_override = topic_config_overrides.get('enabled', None)
             event_key_field_override = topic_config_overrides.get('event_key_field', None)
+            mode_override = topic_config_overrides.get('mode', None)
+            codec_override = topic_config_overrides.get('codec', None)
             if enabled_override is not None:
                 topic_config_combined['enabled'] = enabled_override
             if event_key_field_override is not None:
                 topic_config_combined['event_key_field'] = event_key_field_override
+            if mode_override is not None:
+                topic_config_combined['mode'] = mode_override
+            if codec_override is not None:
+                topic_config_combined['codec'] = codec_override
             event_type_config_combined[topic] = topic_config_combined
         combined[event_type] = event_type_config_combined
     return combined
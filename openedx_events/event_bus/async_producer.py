@@ -0,0 +1,268 @@
+"""
+Producer wrapper sending events to the event bus from a background thread.
+
+See ``EVENT_BUS_PRODUCER_ASYNC`` for how to enable it.
+"""
+import atexit
+import logging
+import os
+import threading
+import weakref
+from collections import deque
+from typing import Sequence, Tuple
+
+from openedx_events.data import EventsMetadata
+from openedx_events.event_bus import EventBusProducer, ProducerMessage
+from openedx_events.tooling import OpenEdxPublicSignal
+
+logger = logging.getLogger(__name__)
+
+# Wait for room in the queue.
+OVERFLOW_BLOCK = "block"
+# Discard the oldest queued messages to make room.
+OVERFLOW_DROP_OLDEST = "drop-oldest"
+# Send the event synchronously, bypassing the queue.
+OVERFLOW_SPILL = "spill"
+
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_SPILL)
+
+# Producers not closed yet, flushed when the interpreter exits.
+_open_producers = weakref.WeakSet()
+
+
+@atexit.register
+def _close_open_producers():
+    """
+    Close the producers that were not closed yet, waiting up to their exit timeout for each of them.
+    """
+    for producer in list(_open_producers):
+        producer.close(timeout=producer.exit_timeout)
+
+
+class AsyncEventBusProducer(EventBusProducer):
+    """
+    Producer queueing events in memory and sending them with another producer from a background thread.
+
+    Sending an event only costs appending it to a bounded queue, so that event bus latency does not add to the
+    latency of the code sending the event. Messages are sent in order, the topics of an event that was sent to
+    several topics at once are still sent with a single ``send_many`` call, and batches of events are still sent
+    with a single ``send_batch`` call.
+
+    Queued messages are lost if the process dies before sending them. They are flushed when the interpreter exits
+    normally, and messages queued by a parent process are never sent by its forked children.
+    """
+
+    def __init__(self, producer: EventBusProducer, *, max_queue_size=10000, overflow=OVERFLOW_BLOCK,
+                 exit_timeout=10.0):
+        """
+        Initialize the producer.
+
+        Arguments:
+            producer: The producer actually sending events
+            max_queue_size: Maximum number of messages (one per event and topic) waiting to be sent
+            overflow: What to do with new events when the queue is full, one of OVERFLOW_POLICIES
+            exit_timeout: Maximum number of seconds to wait for queued messages when the interpreter exits
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}, expected one of {OVERFLOW_POLICIES}")
+        if max_queue_size < 1:
+            raise ValueError("max_queue_size should be a positive integer")
+        self.producer = producer
+        self.max_queue_size = max_queue_size
+        self.overflow = overflow
+        self.exit_timeout = exit_timeout
+        self._reset()
+        _open_producers.add(self)
+
+    def _reset(self):
+        """
+        Start over with an empty queue and no background thread, e.g. in a newly forked process.
+        """
+        self._pid = os.getpid()
+        # Messages sent together, with whether they were sent as a batch.
+        self._queue = deque()
+        # Number of messages in the queue.
+        self._queued = 0
+        self._condition = threading.Condition()
+        # Number of messages queued or being sent.
+        self._pending = 0
+        self._thread = None
+        self._closed = False
+        self.dropped_count = 0
+
+    def send(
+            self, *, signal: OpenEdxPublicSignal, topic: str, event_key_field: str, event_data: dict,
+            event_metadata: EventsMetadata
+    ) -> None:
+        """
+        Queue a signal event to be sent to the event bus under the specified topic.
+
+        See ``EventBusProducer.send`` for arguments.
+        """
+        self.send_many(
+            signal=signal, topics=((topic, event_key_field),), event_data=event_data, event_metadata=event_metadata,
+        )
+
+    def send_many(
+            self, *, signal: OpenEdxPublicSignal, topics: Sequence[Tuple[str, str]], event_data: dict,
+            event_metadata: EventsMetadata
+    ) -> None:
+        """
+        Queue a signal event to be sent to the event bus under each of the specified topics.
+
+        See ``EventBusProducer.send_many`` for arguments.
+        """
+        messages = [
+            ProducerMessage(
+                signal=signal, topic=topic, event_key_field=event_key_field, event_data=event_data,
+                event_metadata=event_metadata,
+            )
+            for topic, event_key_field in topics
+        ]
+        if messages and not self._put(messages):
+            self._send_messages(messages)
+
+    def send_batch(self, messages: Sequence[ProducerMessage]) -> None:
+        """
+        Queue several events to be sent to the event bus at once, in order.
+
+        See ``EventBusProducer.send_batch`` for arguments.
+        """
+        messages = list(messages)
+        if messages and not self._put(messages, batch=True):
+            self.producer.send_batch(messages)
+
+    def _put(self, messages, batch=False):
+        """
+        Queue messages to be sent together, applying the overflow policy if needed.
+
+        Returns:
+            False if the messages should be sent synchronously instead.
+        """
+        if self._pid != os.getpid():
+            self._reset()
+        with self._condition:
+            if self._closed:
+                return False
+            # Messages sent together that the queue cannot hold are queued once the queue is empty.
+            room_needed = min(len(messages), self.max_queue_size)
+            if self._queued + room_needed > self.max_queue_size:
+                if self.overflow == OVERFLOW_SPILL:
+                    return False
+                if self.overflow == OVERFLOW_DROP_OLDEST:
+                    while self._queue and self._queued + room_needed > self.max_queue_size:
+                        dropped_messages, _ = self._queue.popleft()
+                        self._queued -= len(dropped_messages)
+                        self._pending -= len(dropped_messages)
+                        self.dropped_count += len(dropped_messages)
+                        for dropped in dropped_messages:
+                            logger.warning(
+                                f"Event bus producer queue is full, dropped {dropped.event_metadata.event_type} "
+                                f"event {dropped.event_metadata.id} for topic {dropped.topic}"
+                            )
+                else:
+                    self._condition.wait_for(
+                        lambda: self._queued + room_needed <= self.max_queue_size or self._closed
+                    )
+                    if self._closed:
+                        return False
+            self._queue.append((messages, batch))
+            self._queued += len(messages)
+            self._pending += len(messages)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="openedx-events-async-producer", daemon=True,
+                )
+                self._thread.start()
+            self._condition.notify_all()
+        return True
+
+    def _take(self):
+        """
+        Wait for queued messages and take the next messages sent together, or return None once closed and empty.
+
+        Returns:
+            The messages, and whether they were sent as a batch.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._queue or self._closed)
+            if not self._queue:
+                return None
+            messages, batch = self._queue.popleft()
+            self._queued -= len(messages)
+            self._condition.notify_all()
+            return messages, batch
+
+    def _run(self):
+        """
+        Send queued messages until closed.
+        """
+        while (taken := self._take()) is not None:
+            messages, batch = taken
+            try:
+                if batch:
+                    self.producer.send_batch(messages)
+                else:
+                    self._send_messages(messages)
+            except Exception:  # pylint: disable=broad-exception-caught
+                if batch:
+                    logger.exception(f"Failed to send a batch of {len(messages)} events to the event bus")
+                else:
+                    logger.exception(
+                        f"Failed to send {messages[0].event_metadata.event_type} event "
+                        f"{messages[0].event_metadata.id} to the event bus"
+                    )
+            finally:
+                with self._condition:
+                    self._pending -= len(messages)
+                    self._condition.notify_all()
+
+    def _send_messages(self, messages):
+        """
+        Send the messages of an event with the wrapped producer.
+        """
+        first = messages[0]
+        if len(messages) == 1:
+            self.producer.send(
+                signal=first.signal, topic=first.topic, event_key_field=first.event_key_field,
+                event_data=first.event_data, event_metadata=first.event_metadata,
+            )
+        else:
+            self.producer.send_many(
+                signal=first.signal, topics=[(message.topic, message.event_key_field) for message in messages],
+                event_data=first.event_data, event_metadata=first.event_metadata,
+            )
+
+    def flush(self, timeout=None) -> bool:
+        """
+        Wait until all queued messages have been sent (or failed to be sent).
+
+        Arguments:
+            timeout: Maximum number of seconds to wait, or None to wait as long as needed
+
+        Returns:
+            True if the queue was flushed, False if the timeout expired first.
+        """
+        if self._pid != os.getpid():
+            return True
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending <= 0, timeout=timeout)
+
+    def close(self, timeout=None) -> bool:
+        """
+        Flush queued messages and stop the background thread. Events sent afterwards are sent synchronously.
+
+        Arguments:
+            timeout: Maximum number of seconds to wait for queued messages, or None to wait as long as needed
+
+        Returns:
+            True if all queued messages were sent, False if the timeout expired first.
+        """
+        flushed = self.flush(timeout=timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        _open_producers.discard(self)
+        if not flushed:
+            logger.warning(f"Closed event bus producer with {self._pending} messages still waiting to be sent")
+        return flushed
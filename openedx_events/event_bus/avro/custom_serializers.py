@@ -4,9 +4,13 @@ Classes to serialize and deserialize custom types used by openedx events. See RE
 """
 from abc import ABC, abstractmethod
 from datetime import datetime
+from functools import lru_cache
 from uuid import UUID
 
 from ccx_keys.locator import CCXLocator
+from django.conf import settings
+from django.dispatch import receiver
+from django.test.signals import setting_changed
 from opaque_keys.edx.keys import CourseKey, UsageKey
 from opaque_keys.edx.locator import (
     LibraryCollectionLocator,
@@ -17,6 +21,63 @@ from opaque_keys.edx.locator import (
 
 from openedx_events.event_bus.avro.types import PYTHON_TYPE_TO_AVRO_MAPPING
 
+# .. setting_name: EVENT_BUS_OPAQUE_KEY_CACHE_SIZE
+# .. setting_default: 4096
+# .. setting_description: Maximum number of parsed opaque keys (course keys, usage keys, library locators...)
+#   that Avro deserializers keep in memory, per process. Parsing keys is relatively expensive and consumers
+#   usually see the same keys over and over, so parsed keys are reused, least recently used first evicted.
+#   Set to 0 to disable the cache.
+DEFAULT_OPAQUE_KEY_CACHE_SIZE = 4096
+
+
+def _parse_opaque_key(key_class, data):
+    return key_class.from_string(data)
+
+
+@lru_cache(maxsize=None)
+def _get_opaque_key_parser():
+    """
+    Get the function parsing opaque keys, caching parsed keys if enabled.
+    """
+    cache_size = getattr(settings, "EVENT_BUS_OPAQUE_KEY_CACHE_SIZE", DEFAULT_OPAQUE_KEY_CACHE_SIZE)
+    if not cache_size:
+        return _parse_opaque_key
+    # lru_cache is thread-safe, and opaque keys are immutable so parsed keys can be shared.
+    return lru_cache(maxsize=cache_size)(_parse_opaque_key)
+
+
+@receiver(setting_changed)
+def _reset_state(sender, **kwargs):  # pylint: disable=unused-argument
+    """Drop the parsed opaque keys, and size their cache with the current EVENT_BUS_OPAQUE_KEY_CACHE_SIZE."""
+    _get_opaque_key_parser.cache_clear()
+
+
+def parse_opaque_key(key_class, data: str):
+    """
+    Parse data into an opaque key of class key_class, reusing previously parsed keys if possible.
+
+    Arguments:
+        key_class: An opaque key class such as CourseKey or UsageKey
+        data: The serialized key
+
+    Raises:
+        InvalidKeyError: If data is not a valid key_class key.
+    """
+    return _get_opaque_key_parser()(key_class, data)
+
+
+def opaque_key_cache_info():
+    """
+    Get hits, misses, maximum and current size of the opaque key cache, or None if the cache is disabled.
+
+    Returns:
+        A functools cache info named tuple, or None
+    """
+    parser = _get_opaque_key_parser()
+    if parser is _parse_opaque_key:
+        return None
+    return parser.cache_info()
+
 
 class BaseCustomTypeAvroSerializer(ABC):
     """
@@ -53,7 +114,7 @@ class CourseKeyAvroSerializer(BaseCustomTypeAvroSerializer):
     @staticmethod
     def deserialize(data: str):
         """Deserialize string into obj."""
-        return CourseKey.from_string(data)
+        return parse_opaque_key(CourseKey, data)
 
 
 class CcxCourseLocatorAvroSerializer(BaseCustomTypeAvroSerializer):
@@ -72,7 +133,7 @@ class CcxCourseLocatorAvroSerializer(BaseCustomTypeAvroSerializer):
     @staticmethod
     def deserialize(data: str):
         """Deserialize string into obj."""
-        return CCXLocator.from_string(data)
+        return parse_opaque_key(CCXLocator, data)
 
 
 class DatetimeAvroSerializer(BaseCustomTypeAvroSerializer):
@@ -114,7 +175,7 @@ class UsageKeyAvroSerializer(BaseCustomTypeAvroSerializer):
     @staticmethod
     def deserialize(data: str):
         """Deserialize string into obj."""
-        return UsageKey.from_string(data)
+        return parse_opaque_key(UsageKey, data)
 
 
 class LibraryCollectionLocatorAvroSerializer(BaseCustomTypeAvroSerializer):
@@ -133,7 +194,7 @@ class LibraryCollectionLocatorAvroSerializer(BaseCustomTypeAvroSerializer):
     @staticmethod
     def deserialize(data: str):
         """Deserialize string into obj."""
-        return LibraryCollectionLocator.from_string(data)
+        return parse_opaque_key(LibraryCollectionLocator, data)
 
 
 class LibraryContainerLocatorAvroSerializer(BaseCustomTypeAvroSerializer):
@@ -152,7 +213,7 @@ class LibraryContainerLocatorAvroSerializer(BaseCustomTypeAvroSerializer):
     @staticmethod
     def deserialize(data: str):
         """Deserialize string into obj."""
-        return LibraryContainerLocator.from_string(data)
+        return parse_opaque_key(LibraryContainerLocator, data)
 
 
 class LibraryLocatorV2AvroSerializer(BaseCustomTypeAvroSerializer):
@@ -171,7 +232,7 @@ class LibraryLocatorV2AvroSerializer(BaseCustomTypeAvroSerializer):
     @staticmethod
     def deserialize(data: str):
         """Deserialize string into obj."""
-        return LibraryLocatorV2.from_string(data)
+        return parse_opaque_key(LibraryLocatorV2, data)
 
 
 class LibraryUsageLocatorV2AvroSerializer(BaseCustomTypeAvroSerializer):
@@ -190,7 +251,7 @@ class LibraryUsageLocatorV2AvroSerializer(BaseCustomTypeAvroSerializer):
     @staticmethod
     def deserialize(data: str):
         """Deserialize string into obj."""
-        return LibraryUsageLocatorV2.from_string(data)
+        return parse_opaque_key(LibraryUsageLocatorV2, data)
 
 
 class UuidAvroSerializer(BaseCustomTypeAvroSerializer):
@@ -2,129 +2,286 @@
 Deserialize Avro record dictionaries to events that can be sent with OpenEdxPublicSignals.
 """
 import io
-import json
+from functools import cached_property, lru_cache
 from typing import get_args, get_origin
 
 import attr
 import fastavro
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+from openedx_events.data import EventsMetadata
+from openedx_events.event_bus.codecs import decode_payload
 
 from .custom_serializers import DEFAULT_CUSTOM_SERIALIZERS
-from .schema import schema_from_signal
+from .schema import envelope_schema, get_signal_schema
+from .serializer import CONTAINER_EVENT_TYPE_KEY, LENGTH_PREFIX
 from .types import PYTHON_TYPE_TO_AVRO_MAPPING, SIMPLE_PYTHON_TYPE_TO_AVRO_MAPPING
 
+# Magic bytes starting Avro object container files.
+CONTAINER_MAGIC = b"Obj\x01"
+
 # Dict of class to deserialize methods (e.g. datetime => DatetimeAvroSerializer.deserialize)
 DEFAULT_DESERIALIZERS = {serializer.cls: serializer.deserialize for serializer in DEFAULT_CUSTOM_SERIALIZERS}
 
 
-def _deserialized_avro_record_dict_to_object(data: dict, data_type, deserializers=None):
+def _identity(data):
+    return data
+
+
+def _raising_decoder(exception):
+    """
+    Create a decoder that raises the given exception, to report unsupported types when decoding.
+    """
+    def decode(data):
+        raise exception
+    return decode
+
+
+def _compile_decoder(data_type, deserializers, compiled_records):
     """
-    Convert Avro record dictionary into an instance of data_type.
+    Compile a method converting an Avro record dictionary (or value) into an instance of data_type.
 
-    Used to convert messages from an AvroDeserializer into events that can be sent by the
-    appropriate signal instance
+    The type introspection is done once here, and the returned method only walks the data.
 
     Arguments:
-        data: Dictionary representation of an Avro record
         data_type: Desired Python data type, eg `str`, `CourseKey`, `CourseEnrollmentData`
         deserializers: Map of Python data type to deserializer method
+        compiled_records: Map of attrs class to its already compiled decoder, which allows for
+          recursive data types
 
     Returns:
-        An instance of data_type
+        A method taking the Avro representation of a value and returning an instance of data_type.
+        Unsupported data types produce a method raising TypeError, so that errors are reported when
+        decoding rather than when creating the deserializer.
     """
-    param_deserializers = deserializers or {}
-    all_deserializers = {**DEFAULT_DESERIALIZERS, **param_deserializers}
     # get generic type of data_type
     # if data_type == List[int], data_type_origin = list
     data_type_origin = get_origin(data_type)
 
-    if deserializer := all_deserializers.get(data_type, None):
-        return deserializer(data)
+    if deserializer := deserializers.get(data_type, None):
+        return deserializer
     elif data_type in PYTHON_TYPE_TO_AVRO_MAPPING:
-        return data
+        return _identity
     elif data_type_origin is list:
         # Returns types of list contents.
         # Example: if data_type == List[int], arg_data_type = (int,)
         arg_data_type = get_args(data_type)
         if not arg_data_type:
-            raise TypeError(
+            return _raising_decoder(TypeError(
                 "List without annotation type is not supported. The argument should be a type, for eg., List[int]"
-            )
+            ))
         # Check whether list items type is in basic types.
         if arg_data_type[0] in SIMPLE_PYTHON_TYPE_TO_AVRO_MAPPING:
-            return data
+            return _identity
 
         # Complex nested types like List[List[...]], List[Dict[...]], etc.
-        item_type = arg_data_type[0]
-        return [_deserialized_avro_record_dict_to_object(sub_data, item_type, deserializers) for sub_data in data]
+        decode_item = _compile_decoder(arg_data_type[0], deserializers, compiled_records)
+        return lambda data: [decode_item(sub_data) for sub_data in data]
     elif data_type_origin is dict:
         # Returns types of dict contents.
         # Example: if data_type == Dict[str, int], arg_data_type = (str, int)
         arg_data_type = get_args(data_type)
         if not arg_data_type:
-            raise TypeError(
+            return _raising_decoder(TypeError(
                 "Dict without annotation type is not supported. The argument should be a type, for eg., Dict[str, int]"
-            )
+            ))
         # Check whether dict items type is in basic types.
         if all(arg in SIMPLE_PYTHON_TYPE_TO_AVRO_MAPPING for arg in arg_data_type):
-            return data
+            return _identity
 
         # Complex dict values that need recursive deserialization
         key_type, value_type = arg_data_type
         if key_type is not str:
-            raise TypeError("Avro maps only support string keys. The key type must be 'str'.")
+            return _raising_decoder(TypeError("Avro maps only support string keys. The key type must be 'str'."))
 
         # Complex nested types like Dict[str, Dict[...]], Dict[str, List[...]], etc.
-        return {
-            key: _deserialized_avro_record_dict_to_object(value, value_type, deserializers)
-            for key, value in data.items()
-        }
+        decode_value = _compile_decoder(value_type, deserializers, compiled_records)
+        return lambda data: {key: decode_value(value) for key, value in data.items()}
     elif hasattr(data_type, "__attrs_attrs__"):
-        transformed = {}
+        if data_type in compiled_records:
+            return compiled_records[data_type]
+
+        # (attribute name, whether the attribute is required, attribute decoder)
+        attributes = []
+
+        def decode_record(data):
+            transformed = {}
+            for name, required, decode_attribute in attributes:
+                if name in data:
+                    sub_data = data[name]
+                    if sub_data or required:
+                        transformed[name] = decode_attribute(sub_data)
+            return data_type(**transformed)
+
+        # Register the decoder before compiling the attributes, in case they refer to data_type.
+        compiled_records[data_type] = decode_record
         for attribute in data_type.__attrs_attrs__:
-            if attribute.name in data:
-                sub_data = data[attribute.name]
-                if sub_data or attribute.default is attr.NOTHING:
-                    transformed[attribute.name] = _deserialized_avro_record_dict_to_object(sub_data,
-                                                                                           attribute.type,
-                                                                                           deserializers=deserializers)
-
-        return data_type(**transformed)
-    raise TypeError(
+            attributes.append((
+                attribute.name,
+                attribute.default is attr.NOTHING,
+                _compile_decoder(attribute.type, deserializers, compiled_records),
+            ))
+        return decode_record
+    return _raising_decoder(TypeError(
         f"Unable to deserialize {data_type} data, please add CustomTypeAvroSerializer for custom data type"
-    )
+    ))
 
 
-def _avro_record_dict_to_event_data(signal, avro_record_dict, deserializers=None):
+def _compile_event_data_decoders(signal, deserializers=None):
     """
-    Convert an Avro record dictionary into event data that can be sent by the given signal.
+    Compile the decoders converting an Avro record dictionary into event data for the given signal.
 
     Arguments:
         - signal: An instance of OpenEdxPublicSignal
-        - avro_record_dict: Dictionary representation of an Avro record
         - deserializers: Map of Python data type to deserializer method
 
     Returns:
-        - An event data dictionary that can be sent by the given signal
+        - A tuple of (data key, decoder) pairs, one per item of the signal's event data
+    """
+    all_deserializers = {**DEFAULT_DESERIALIZERS, **(deserializers or {})}
+    compiled_records = {}
+    return tuple(
+        (data_key, _compile_decoder(data_type, all_deserializers, compiled_records))
+        for data_key, data_type in signal.init_data.items()
+    )
+
+
+class _BufferReader:
+    """
+    Minimal binary file-like object reading from a buffer such as a memoryview, without copying it whole.
+    """
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast("B")
+        self._position = 0
+
+    def read(self, size=-1):
+        """Read up to size bytes, or until the end of the buffer if size is negative."""
+        start = self._position
+        data = self._view[start:] if size is None or size < 0 else self._view[start:start + size]
+        self._position = start + len(data)
+        return data.tobytes()
+
+
+def _open_buffer(buffer):
     """
-    return {data_key: _deserialized_avro_record_dict_to_object(avro_record_dict[data_key], data_type, deserializers)
-            for data_key, data_type in signal.init_data.items()}
+    Get a binary file-like object reading from buffer without copying it.
 
+    BytesIO shares the memory of bytes objects until written to, but copies any other buffer.
+    """
+    if isinstance(buffer, bytes):
+        return io.BytesIO(buffer)
+    return _BufferReader(buffer)
 
-def deserialize_bytes_to_event_data(bytes_from_wire, signal):
+
+def deserialize_bytes_to_event_data(bytes_from_wire, signal, headers=None):
     """
     Deserialize event_bus and Avro-serialized data.
 
     Arguments:
-        bytes_from_wire: data that was serialized by an Avro serializer
+        bytes_from_wire: data that was serialized by an Avro serializer, as bytes or any other buffer such as a
+          bytearray, memoryview or mmap object, which is read in place
         signal: An instance of OpenEdxPublicSignal
+        headers: The message headers, to decompress data compressed with a codec (see ``decode_payload``)
     """
-    deserializer = AvroSignalDeserializer(signal)
-    schema_dict = deserializer.schema
-    data_file = io.BytesIO(bytes_from_wire)
-    as_dict = fastavro.schemaless_reader(data_file, schema_dict)
+    if headers:
+        bytes_from_wire = decode_payload(bytes_from_wire, headers)
+    deserializer = get_signal_deserializer(signal)
+    data_file = _open_buffer(bytes_from_wire)
+    as_dict = fastavro.schemaless_reader(data_file, deserializer.parsed_schema)
     return deserializer.from_dict(as_dict)
 
 
+class _ChainedReader:
+    """
+    Binary file-like object returning some already consumed bytes before reading from a stream.
+    """
+
+    def __init__(self, head, stream):
+        self._head = head
+        self._stream = stream
+
+    def read(self, size=-1):
+        """Read up to size bytes, or until the end of the stream if size is negative."""
+        if not self._head:
+            return self._stream.read(size)
+        if size is not None and 0 <= size <= len(self._head):
+            data, self._head = self._head[:size], self._head[size:]
+            return data
+        data, self._head = self._head, b""
+        remaining = -1 if size is None or size < 0 else size - len(data)
+        return data + self._stream.read(remaining)
+
+
+def iter_events(stream, signal):
+    """
+    Lazily decode events stored along with their metadata, for example in an archive of events.
+
+    Both Avro object container files written by ``AvroSignalSerializer.write_batch`` and streams of
+    length-prefixed schemaless records written by ``AvroSignalSerializer.write_length_prefixed`` are
+    supported, and detected from the first bytes of the stream. Only one container block or record is held
+    in memory at a time, so arbitrarily large archives can be processed.
+
+    Arguments:
+        stream: A readable binary file-like object (such as a file or an mmap object), or a buffer such as
+          a memoryview of a memory-mapped file.
+        signal: An instance of OpenEdxPublicSignal
+
+    Yields:
+        (EventsMetadata, dict) pairs of event metadata and event data that can be sent by the signal.
+
+    Raises:
+        ValueError: If the stream is truncated or holds events of another type.
+    """
+    deserializer = get_signal_deserializer(signal)
+    if not hasattr(stream, "read"):
+        stream = _open_buffer(stream)
+
+    head = stream.read(len(CONTAINER_MAGIC))
+    if head == CONTAINER_MAGIC:
+        yield from deserializer.read_batch(_ChainedReader(head, stream))
+        return
+
+    prefix = head
+    while prefix:
+        if len(prefix) < LENGTH_PREFIX.size:
+            raise ValueError("Truncated length prefix at the end of the stream")
+        (size,) = LENGTH_PREFIX.unpack(prefix)
+        record = stream.read(size)
+        if len(record) < size:
+            raise ValueError(f"Truncated record: expected {size} bytes, found {len(record)}")
+        envelope = fastavro.schemaless_reader(io.BytesIO(record), deserializer.parsed_envelope_schema)
+        yield EventsMetadata.from_json(envelope["metadata"]), deserializer.from_dict(envelope["data"])
+        prefix = stream.read(LENGTH_PREFIX.size)
+
+
+@lru_cache(maxsize=None)
+def get_signal_deserializer(signal, deserializer_class=None):
+    """
+    Get a shared deserializer for the signal, creating it on first use.
+
+    Building a deserializer generates the Avro schema for the signal, so the instances are cached
+    process-wide and keyed by signal and deserializer class (which determines the set of custom
+    type serializers in use). The cache is cleared when Django settings change, or explicitly
+    through ``get_signal_deserializer.cache_clear()``.
+
+    Arguments:
+        - signal: An instance of OpenEdxPublicSignal.
+        - deserializer_class: AvroSignalDeserializer or a subclass of it. Defaults to AvroSignalDeserializer.
+
+    Returns:
+        - An instance of deserializer_class for the signal.
+    """
+    return (deserializer_class or AvroSignalDeserializer)(signal)
+
+
+@receiver(setting_changed)
+def _reset_state(sender, **kwargs):  # pylint: disable=unused-argument
+    """Drop the shared deserializers and their compiled decoders, including those of previous tests' signals."""
+    get_signal_deserializer.cache_clear()
+
+
 class AvroSignalDeserializer:
     """
     Class to deserialize Avro records into events that can be sent by self.signal.
@@ -144,18 +301,67 @@ class AvroSignalDeserializer:
         Arguments:
             signal: An instance of OpenEdxPublicSignal.
         """
-        self.signal = signal
         self.deserializers = {ext.cls: ext.deserialize for ext in self.custom_type_serializers()}
         self.custom_types = {ext.cls: ext.field_type for ext in self.custom_type_serializers()}
-        self.schema = schema_from_signal(self.signal, custom_type_to_avro_type=self.custom_types)
+        self.signal = signal
+        self.signal_schema = get_signal_schema(self.signal, custom_type_to_avro_type=self.custom_types)
+        self.schema = self.signal_schema.schema
+        self._compiled_decoders = (signal, _compile_event_data_decoders(signal, self.deserializers))
+
+    @property
+    def decoders(self):
+        """
+        Get the (data_key, decode) pairs decoding the event data of self.signal.
+
+        They are compiled along with the deserializer, and again only if self.signal is replaced.
+        """
+        signal, decoders = self._compiled_decoders
+        if signal is not self.signal:
+            decoders = _compile_event_data_decoders(self.signal, self.deserializers)
+            self._compiled_decoders = (self.signal, decoders)
+        return decoders
+
+    @property
+    def parsed_schema(self):
+        """Get Avro schema as parsed by fastavro, ready to be passed to its readers."""
+        return self.signal_schema.parsed_schema
+
+    @cached_property
+    def parsed_envelope_schema(self):
+        """Get the schema of records holding an event and its metadata, as parsed by fastavro."""
+        return fastavro.parse_schema(envelope_schema(self.schema))
 
     def schema_string(self):
         """Get Avro schema as string."""
-        return json.dumps(self.schema, sort_keys=True)
+        return self.signal_schema.schema_string
 
     def from_dict(self, avro_record_dict):
         """Convert Avro record dictionary to event data."""
-        return _avro_record_dict_to_event_data(self.signal, avro_record_dict, self.deserializers)
+        return {data_key: decode(avro_record_dict[data_key]) for data_key, decode in self.decoders}
+
+    def read_batch(self, fo):
+        """
+        Read events written by ``AvroSignalSerializer.write_batch`` from an Avro object container file.
+
+        Blocks are decoded lazily, so the file can hold any number of them.
+
+        Arguments:
+            fo: A readable binary file-like object positioned at the start of the container.
+
+        Yields:
+            (EventsMetadata, dict) pairs of event metadata and event data that can be sent by self.signal.
+
+        Raises:
+            ValueError: If the container holds events of another type.
+        """
+        container = fastavro.reader(fo)
+        event_type = container.metadata.get(CONTAINER_EVENT_TYPE_KEY)
+        if event_type != self.signal.event_type:
+            raise ValueError(
+                f"Cannot read events of type {event_type} as {self.signal.event_type} events"
+            )
+        for record in container:
+            yield EventsMetadata.from_json(record["metadata"]), self.from_dict(record["data"])
 
     def custom_type_serializers(self):
         """
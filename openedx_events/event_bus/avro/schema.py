@@ -3,9 +3,16 @@ Code to convert attr classes to Avro specification.
 
 TODO: Handle optional parameters and allow for schema evolution. https://github.com/edx/edx-arch-experiments/issues/53
 """
-
+import json
+from functools import lru_cache
 from typing import Any, Type, get_args, get_origin
 
+import attr
+import fastavro
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+from fastavro.schema import fingerprint, to_parsing_canonical_form
+
 from .custom_serializers import DEFAULT_CUSTOM_SERIALIZERS
 from .types import PYTHON_TYPE_TO_AVRO_MAPPING, SIMPLE_PYTHON_TYPE_TO_AVRO_MAPPING
 
@@ -42,6 +49,85 @@ def schema_from_signal(signal, custom_type_to_avro_type=None):
     return base_schema
 
 
+@attr.s(frozen=True)
+class SignalSchema:
+    """
+    Avro schema for events sent by an OpenEdxPublicSignal, along with its precomputed representations.
+
+    Arguments:
+        schema (dict): Avro schema definition, as returned by ``schema_from_signal``. Must not be modified.
+        schema_string (str): The schema as JSON string, with sorted keys
+        canonical_form (str): The schema in Avro Parsing Canonical Form
+        fingerprint (str): 64-bit CRC-64-AVRO (Rabin) fingerprint of the canonical form, as hex string
+        parsed_schema (dict): The schema as parsed by fastavro, ready to be passed to its readers and writers
+    """
+
+    schema = attr.ib(type=dict)
+    schema_string = attr.ib(type=str)
+    canonical_form = attr.ib(type=str)
+    fingerprint = attr.ib(type=str)
+    parsed_schema = attr.ib(type=dict, repr=False)
+
+
+def get_signal_schema(signal, custom_type_to_avro_type=None):
+    """
+    Get the Avro schema for events sent by an instance of OpenEdxPublicSignal, computed once per process.
+
+    Arguments:
+        - signal: An instance of OpenEdxPublicSignal
+        - custom_type_to_avro_type: A map of Python class to Avro type
+
+    Returns:
+        - A SignalSchema shared by all callers, whose schema must not be modified.
+    """
+    custom_types = frozenset((custom_type_to_avro_type or {}).items())
+    return _get_signal_schema(signal, custom_types)
+
+
+@lru_cache(maxsize=None)
+def _get_signal_schema(signal, custom_types):
+    schema = schema_from_signal(signal, custom_type_to_avro_type=dict(custom_types))
+    canonical_form = to_parsing_canonical_form(schema)
+    return SignalSchema(
+        schema=schema,
+        schema_string=json.dumps(schema, sort_keys=True),
+        canonical_form=canonical_form,
+        fingerprint=fingerprint(canonical_form, "CRC-64-AVRO"),
+        parsed_schema=fastavro.parse_schema(schema),
+    )
+
+
+@receiver(setting_changed)
+def _reset_state(sender, **kwargs):  # pylint: disable=unused-argument
+    """Drop the cached schemas along with the serializers built from them, see ``get_signal_serializer``."""
+    _get_signal_schema.cache_clear()
+
+
+def envelope_schema(event_schema):
+    """
+    Create the Avro schema for records holding an event along with its metadata.
+
+    Used when several events are stored together, for example in an Avro object container file, where
+    there is no room for per-event headers. The metadata is stored as produced by ``EventsMetadata.to_json``.
+
+    Arguments:
+        - event_schema: An Avro schema definition for the event, as returned by ``schema_from_signal``.
+
+    Returns:
+        - An Avro schema definition for the event envelope.
+    """
+    return {
+        "name": "EventEnvelope",
+        "type": "record",
+        "doc": "Avro envelope for an event and its CloudEvent metadata created with openedx_events/schema",
+        "namespace": event_schema["namespace"],
+        "fields": [
+            {"name": "metadata", "type": "string"},
+            {"name": "data", "type": event_schema},
+        ],
+    }
+
+
 def _create_avro_field_definition(data_key, data_type, previously_seen_types,
                                   custom_type_to_avro_type=None, default_is_none=False):
     """
@@ -2,81 +2,158 @@
 Serialize events to Avro records.
 """
 import io
-import json
+import struct
+from functools import cached_property, lru_cache
 
-import attr
 import fastavro
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+from openedx_events.event_bus.codecs import encode_payload
 
 from .custom_serializers import DEFAULT_CUSTOM_SERIALIZERS
-from .schema import schema_from_signal
+from .schema import envelope_schema, get_signal_schema
 
 DEFAULT_SERIALIZERS = {serializer.cls: serializer.serialize for serializer in DEFAULT_CUSTOM_SERIALIZERS}
 
+# Avro object container metadata key naming the event type of the events in the container.
+CONTAINER_EVENT_TYPE_KEY = "openedx.event_type"
 
-def _get_non_attrs_serializer(serializers=None):
-    """
-    Create a method to pass as the value_serializer argument to attr.as_dict to serialize using custom serializers.
+# Length prefix of each record in streams of length-prefixed records: an unsigned 32-bit big-endian integer.
+LENGTH_PREFIX = struct.Struct(">I")
 
-    Arguments:
-        - serializers: A map of Python type to serialization method.
 
-    Returns:
-        - A method for serializing non_attrs values.
+def _identity(value):
+    return value
+
+
+class _AvroRecordConverter:
     """
-    param_serializers = serializers or {}
-    all_serializers = {**DEFAULT_SERIALIZERS, **param_serializers}
-
-    def _serialize_non_attrs_values(inst, field, value):  # pylint: disable=unused-argument
-        if value is None:
-            # All default=None fields are implicit union types of NoneType
-            # and something else. (See ADR 7.) Note that if there isn't a
-            # default at all, field.default will be attrs.NOTHING, not None.
-            if field.default is None:
-                return None
-            else:
-                # Bail out early with an informative message rather
-                # than ending up with an inscrutable error from inside
-                # a custom serializer.
-                #
-                # If we ever make a custom serializer that can handle
-                # None as an input, we can remove this check.
-                # pylint: disable-next=broad-exception-raised
-                raise Exception("None cannot be handled by custom serializers (and default=None was not set)")
-
-        for extended_class, serializer in all_serializers.items():
-            if field:
-                # Make sure that field.type is a class first.
-                if isinstance(field.type, type) and issubclass(field.type, extended_class):
-                    return serializer(value)
-            if issubclass(type(value), extended_class):
-                return serializer(value)
-        return value
-    return _serialize_non_attrs_values
-
-
-def _event_data_to_avro_record_dict(event_data, serializers=None):
+    Convert event data into Avro record dictionaries using serialization plans compiled ahead of time.
+
+    For every attrs class, the serializer of each field is resolved once from ``field.type``. Values whose
+    serialization can only be decided at runtime are dispatched on their type through a cache that maps
+    each type to its converter, so converting a value costs a single lookup whatever the number of
+    custom serializers.
     """
-    Create an Avro record dictionary from an event data dict.
 
-    Arguments:
-        - event_data: A dictionary representing an event sent by an instance of OpenEdxPublicSignal.
-        - serializers: A map of Python type to serialization method.
+    def __init__(self, serializers=None):
+        """
+        Initialize converter.
 
-    Returns:
-        - An Avro record dictionary representation of the event data.
-    """
+        Arguments:
+            - serializers: A map of Python type to serialization method, added to the default ones.
+        """
+        self.serializers = {**DEFAULT_SERIALIZERS, **(serializers or {})}
+        self._converters_by_type = {}
+        self._plans_by_attrs_class = {}
+
+    def _get_serializer_for_type(self, data_type):
+        """
+        Find the custom serializer for data_type, preferring the most specific class in its MRO.
+        """
+        for base in data_type.__mro__:
+            if base in self.serializers:
+                return self.serializers[base]
+        # Classes registered as virtual subclasses of an ABC don't have it in their MRO.
+        for extended_class, serializer in self.serializers.items():
+            if issubclass(data_type, extended_class):
+                return serializer
+        return None
 
-    def value_to_dict(value):
-        # Case 1: Value is an instance of an attrs-decorated class
-        if hasattr(value, "__attrs_attrs__"):
-            return attr.asdict(value, value_serializer=_get_non_attrs_serializer(serializers))
-        return _get_non_attrs_serializer(serializers)(None, None, value)
+    def _get_converter(self, data_type):
+        """
+        Get the method converting values of exactly data_type, compiling it on first use.
+        """
+        try:
+            return self._converters_by_type[data_type]
+        except KeyError:
+            pass
 
-    return json.loads(
-        json.dumps(
-            event_data, sort_keys=True, default=value_to_dict
-        )
-    )
+        if serializer := self._get_serializer_for_type(data_type):
+            converter = serializer
+        elif hasattr(data_type, "__attrs_attrs__"):
+            converter = self.attrs_to_dict
+        elif issubclass(data_type, (list, tuple, set, frozenset)):
+            converter = self._collection_to_list
+        elif issubclass(data_type, dict):
+            converter = self._dict_to_dict
+        else:
+            converter = _identity
+        self._converters_by_type[data_type] = converter
+        return converter
+
+    def _get_plan(self, attrs_class):
+        """
+        Get the serialization plan of an attrs class, compiling it on first use.
+
+        The plan is a tuple of (field name, field, converter) entries. The converter is the custom serializer
+        matching ``field.type`` when there is one, or the runtime type dispatch otherwise.
+        """
+        try:
+            return self._plans_by_attrs_class[attrs_class]
+        except KeyError:
+            pass
+
+        plan = []
+        for field in attrs_class.__attrs_attrs__:
+            field_serializer = None
+            # Make sure that field.type is a class first.
+            if isinstance(field.type, type):
+                field_serializer = self._get_serializer_for_type(field.type)
+            plan.append((field.name, field, field_serializer or self.value_to_avro))
+        plan = tuple(plan)
+        self._plans_by_attrs_class[attrs_class] = plan
+        return plan
+
+    def value_to_avro(self, value):
+        """
+        Convert any value into its Avro representation.
+        """
+        return self._get_converter(type(value))(value)
+
+    def attrs_to_dict(self, inst):
+        """
+        Convert an attrs instance into an Avro record dictionary.
+        """
+        record = {}
+        for name, field, converter in self._get_plan(type(inst)):
+            value = getattr(inst, name)
+            if value is None:
+                # All default=None fields are implicit union types of NoneType
+                # and something else. (See ADR 7.) Note that if there isn't a
+                # default at all, field.default will be attrs.NOTHING, not None.
+                if field.default is not None:
+                    # Bail out early with an informative message rather
+                    # than ending up with an inscrutable error from inside
+                    # a custom serializer.
+                    #
+                    # If we ever make a custom serializer that can handle
+                    # None as an input, we can remove this check.
+                    # pylint: disable-next=broad-exception-raised
+                    raise Exception("None cannot be handled by custom serializers (and default=None was not set)")
+                record[name] = None
+            else:
+                record[name] = converter(value)
+        return record
+
+    def _collection_to_list(self, value):
+        return [self.value_to_avro(item) for item in value]
+
+    def _dict_to_dict(self, value):
+        return {key: self.value_to_avro(item) for key, item in value.items()}
+
+    def event_data_to_dict(self, event_data):
+        """
+        Create an Avro record dictionary from an event data dict.
+
+        Arguments:
+            - event_data: A dictionary representing an event sent by an instance of OpenEdxPublicSignal.
+
+        Returns:
+            - An Avro record dictionary representation of the event data.
+        """
+        return {key: self.value_to_avro(value) for key, value in sorted(event_data.items())}
 
 
 def serialize_event_data_to_bytes(event_data, signal):
@@ -90,13 +167,52 @@ def serialize_event_data_to_bytes(event_data, signal):
     Returns:
         bytes: Byte representation of the event_data, to be sent over the wire.
     """
-    serializer = AvroSignalSerializer(signal)
-    schema_dict = serializer.schema
+    serializer = get_signal_serializer(signal)
     out = io.BytesIO()
     data_dict = serializer.to_dict(event_data)
-    fastavro.schemaless_writer(out, schema_dict, data_dict)
-    out.seek(0)
-    return out.read()
+    fastavro.schemaless_writer(out, serializer.parsed_schema, data_dict)
+    return out.getvalue()
+
+
+def serialize_event_data_to_payload(event_data, signal, codec=None):
+    """
+    Serialize event data to bytes, compressed with a codec if large enough (see ``encode_payload``).
+
+    Arguments:
+        - event_data: Event data to be sent via an OpenEdxPublicSignal's send_event method.
+        - signal: An instance of OpenEdxPublicSignal.
+        - codec: Name of the codec, e.g. ``ProducerMessage.codec``, or None to leave the payload uncompressed.
+
+    Returns:
+        tuple: The payload and the message headers to send along with it.
+    """
+    return encode_payload(serialize_event_data_to_bytes(event_data, signal), codec)
+
+
+@lru_cache(maxsize=None)
+def get_signal_serializer(signal, serializer_class=None):
+    """
+    Get a shared serializer for the signal, creating it on first use.
+
+    Building a serializer generates the Avro schema for the signal, so the instances are cached
+    process-wide and keyed by signal and serializer class (which determines the set of custom
+    type serializers in use). The cache is cleared when Django settings change, or explicitly
+    through ``get_signal_serializer.cache_clear()``.
+
+    Arguments:
+        - signal: An instance of OpenEdxPublicSignal.
+        - serializer_class: AvroSignalSerializer or a subclass of it. Defaults to AvroSignalSerializer.
+
+    Returns:
+        - An instance of serializer_class for the signal.
+    """
+    return (serializer_class or AvroSignalSerializer)(signal)
+
+
+@receiver(setting_changed)
+def _reset_state(sender, **kwargs):  # pylint: disable=unused-argument
+    """Drop the shared serializers, including those of the signals created by previous tests."""
+    get_signal_serializer.cache_clear()
 
 
 class AvroSignalSerializer:
@@ -120,16 +236,91 @@ class AvroSignalSerializer:
         """
         self.signal = signal
         self.serializers = {ext.cls: ext.serialize for ext in self.custom_type_serializers()}
+        self.converter = _AvroRecordConverter(self.serializers)
         self.custom_types = {ext.cls: ext.field_type for ext in self.custom_type_serializers()}
-        self.schema = schema_from_signal(self.signal, custom_type_to_avro_type=self.custom_types)
+        self.signal_schema = get_signal_schema(self.signal, custom_type_to_avro_type=self.custom_types)
+        self.schema = self.signal_schema.schema
+
+    @property
+    def parsed_schema(self):
+        """Get Avro schema as parsed by fastavro, ready to be passed to its writers."""
+        return self.signal_schema.parsed_schema
+
+    @cached_property
+    def parsed_envelope_schema(self):
+        """Get the schema of records holding an event and its metadata, as parsed by fastavro."""
+        return fastavro.parse_schema(envelope_schema(self.schema))
 
     def schema_string(self):
         """Get Avro schema as JSON string."""
-        return json.dumps(self.schema, sort_keys=True)
+        return self.signal_schema.schema_string
 
     def to_dict(self, event_data):
         """Convert event data to an Avro record dictionary."""
-        return _event_data_to_avro_record_dict(event_data, serializers=self.serializers)
+        return self.converter.event_data_to_dict(event_data)
+
+    def write_batch(self, fo, events, codec="null"):
+        """
+        Write events as a single block of an Avro object container file.
+
+        The events are stored along with their metadata (see ``envelope_schema``), and the container header
+        carries the schema, so ``AvroSignalDeserializer.read_batch`` can read them back.
+
+        Arguments:
+            fo: A writable binary file-like object.
+            events: An iterable of (event_metadata, event_data) pairs, where event_metadata is an EventsMetadata
+              and event_data is the event data sent by self.signal.
+            codec: Compression codec of the block, as supported by fastavro. Defaults to "null" (no compression),
+              "deflate" is always available.
+        """
+        records = [
+            {"metadata": event_metadata.to_json(), "data": self.to_dict(event_data)}
+            for event_metadata, event_data in events
+        ]
+        fastavro.writer(
+            fo,
+            self.parsed_envelope_schema,
+            records,
+            codec=codec,
+            # Never split the batch into several blocks.
+            sync_interval=2 ** 62,
+            metadata={CONTAINER_EVENT_TYPE_KEY: self.signal.event_type},
+        )
+
+    def write_length_prefixed(self, fo, events):
+        """
+        Write events as a stream of length-prefixed schemaless Avro records.
+
+        Each record holds an event and its metadata (see ``envelope_schema``) and is preceded by its size,
+        see ``LENGTH_PREFIX``. Unlike object container files, such streams can be appended to at any time.
+
+        Arguments:
+            fo: A writable binary file-like object.
+            events: An iterable of (event_metadata, event_data) pairs, where event_metadata is an EventsMetadata
+              and event_data is the event data sent by self.signal.
+        """
+        for event_metadata, event_data in events:
+            record = io.BytesIO()
+            fastavro.schemaless_writer(
+                record,
+                self.parsed_envelope_schema,
+                {"metadata": event_metadata.to_json(), "data": self.to_dict(event_data)},
+            )
+            fo.write(LENGTH_PREFIX.pack(record.tell()))
+            fo.write(record.getbuffer())
+
+    def serialize_batch(self, events, codec="null"):
+        """
+        Serialize events to the bytes of an Avro object container file with a single block.
+
+        See ``write_batch`` for the arguments.
+
+        Returns:
+            bytes: The Avro object container file.
+        """
+        out = io.BytesIO()
+        self.write_batch(out, events, codec=codec)
+        return out.getvalue()
 
     def custom_type_serializers(self):
         """
@@ -1,13 +1,15 @@
 """Test interplay of the various Avro helper classes"""
 import io
+import mmap
 import os
+import tempfile
 from datetime import datetime
 from typing import Any, List, Union, get_args, get_origin
 from unittest import TestCase
 from uuid import UUID, uuid4
 
 from ccx_keys.locator import CCXLocator
-from fastavro import schemaless_reader, schemaless_writer
+from fastavro import block_reader, schemaless_reader, schemaless_writer
 from fastavro.repository.base import SchemaRepositoryError
 from fastavro.schema import load_schema
 from opaque_keys.edx.keys import CourseKey, UsageKey
@@ -18,7 +20,11 @@ from opaque_keys.edx.locator import (
     LibraryUsageLocatorV2,
 )
 
-from openedx_events.event_bus.avro.deserializer import AvroSignalDeserializer, deserialize_bytes_to_event_data
+from openedx_events.event_bus.avro.deserializer import (
+    AvroSignalDeserializer,
+    deserialize_bytes_to_event_data,
+    iter_events,
+)
 from openedx_events.event_bus.avro.serializer import AvroSignalSerializer, serialize_event_data_to_bytes
 from openedx_events.event_bus.avro.tests.test_utilities import (
     EventData,
@@ -475,3 +481,92 @@ class TestAvro(FreezeSignalCacheMixin, TestCase):
         self.assertEqual(deserialized, event_data)
         # ensure signal can actually send deserialized event data
         SIGNAL.send_event(**deserialized)
+
+
+class TestAvroBatch(FreezeSignalCacheMixin, TestCase):
+    """Tests for serialization and deserialization of batches of events in Avro object container files"""
+
+    def _make_batch(self, signal, size):
+        return [
+            (
+                signal.generate_signal_metadata(),
+                {"test_data": EventData(
+                    f"name.{i}",
+                    "bar.course",
+                    SubTestData0("a.sub.name", "a.nother.course"),
+                    SubTestData1("b.uber.sub.name", "b.uber.another.course"),
+                )},
+            )
+            for i in range(size)
+        ]
+
+    def test_batch_serialize_deserialize(self):
+        SIGNAL = create_simple_signal({"test_data": EventData})
+        events = self._make_batch(SIGNAL, 50)
+
+        for codec in ("null", "deflate"):
+            serialized = AvroSignalSerializer(SIGNAL).serialize_batch(events, codec=codec)
+
+            # A single block follows the container header.
+            self.assertEqual(len(list(block_reader(io.BytesIO(serialized)))), 1)
+            deserialized = list(AvroSignalDeserializer(SIGNAL).read_batch(io.BytesIO(serialized)))
+            self.assertEqual(deserialized, events)
+
+    def test_batch_compression(self):
+        SIGNAL = create_simple_signal({"test_data": EventData})
+        events = self._make_batch(SIGNAL, 50)
+        serializer = AvroSignalSerializer(SIGNAL)
+
+        uncompressed = serializer.serialize_batch(events)
+        compressed = serializer.serialize_batch(events, codec="deflate")
+
+        self.assertLess(len(compressed), len(uncompressed))
+
+    def test_batch_of_other_event_type_is_rejected(self):
+        SIGNAL = create_simple_signal({"test_data": EventData})
+        OTHER_SIGNAL = create_simple_signal({"test_data": EventData}, event_type="other.signal")
+        serialized = AvroSignalSerializer(SIGNAL).serialize_batch(self._make_batch(SIGNAL, 1))
+
+        with self.assertRaises(ValueError):
+            list(AvroSignalDeserializer(OTHER_SIGNAL).read_batch(io.BytesIO(serialized)))
+
+    def test_iter_events_from_container(self):
+        SIGNAL = create_simple_signal({"test_data": EventData})
+        events = self._make_batch(SIGNAL, 10)
+        serialized = AvroSignalSerializer(SIGNAL).serialize_batch(events, codec="deflate")
+
+        self.assertEqual(list(iter_events(io.BytesIO(serialized), SIGNAL)), events)
+        self.assertEqual(list(iter_events(memoryview(serialized), SIGNAL)), events)
+
+    def test_iter_events_from_length_prefixed_records(self):
+        SIGNAL = create_simple_signal({"test_data": EventData})
+        events = self._make_batch(SIGNAL, 10)
+        stream = io.BytesIO()
+        AvroSignalSerializer(SIGNAL).write_length_prefixed(stream, events)
+
+        self.assertEqual(list(iter_events(io.BytesIO(stream.getvalue()), SIGNAL)), events)
+        self.assertEqual(list(iter_events(memoryview(stream.getvalue()), SIGNAL)), events)
+        self.assertEqual(list(iter_events(io.BytesIO(), SIGNAL)), [])
+
+    def test_iter_events_from_memory_mapped_file(self):
+        SIGNAL = create_simple_signal({"test_data": EventData})
+        events = self._make_batch(SIGNAL, 10)
+
+        with tempfile.TemporaryFile() as archive:
+            AvroSignalSerializer(SIGNAL).write_batch(archive, events)
+            archive.flush()
+            with mmap.mmap(archive.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                self.assertEqual(list(iter_events(mapped, SIGNAL)), events)
+                with memoryview(mapped) as view:
+                    self.assertEqual(list(iter_events(view, SIGNAL)), events)
+
+    def test_iter_events_from_truncated_stream(self):
+        SIGNAL = create_simple_signal({"test_data": EventData})
+        stream = io.BytesIO()
+        AvroSignalSerializer(SIGNAL).write_length_prefixed(stream, self._make_batch(SIGNAL, 2))
+        serialized = stream.getvalue()
+
+        with self.assertRaises(ValueError):
+            list(iter_events(io.BytesIO(serialized[:-1]), SIGNAL))
+        with self.assertRaises(ValueError):
+            list(iter_events(io.BytesIO(serialized + b"\x00"), SIGNAL))
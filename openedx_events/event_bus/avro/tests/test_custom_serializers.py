@@ -3,8 +3,18 @@ from unittest import TestCase
 from uuid import UUID, uuid4
 
 from ccx_keys.locator import CCXLocator
+from django.test import override_settings
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey, UsageKey
 
-from openedx_events.event_bus.avro.custom_serializers import CcxCourseLocatorAvroSerializer, UuidAvroSerializer
+from openedx_events.event_bus.avro.custom_serializers import (
+    CcxCourseLocatorAvroSerializer,
+    CourseKeyAvroSerializer,
+    UsageKeyAvroSerializer,
+    UuidAvroSerializer,
+    _get_opaque_key_parser,
+    opaque_key_cache_info,
+)
 
 
 class TestCCXLocatorSerailizer(TestCase):
@@ -52,3 +62,62 @@ class TestUuidAvroSerializer(TestCase):
         expected_result = UUID(uuid_str)
         actual_result = UuidAvroSerializer.deserialize(uuid_str)
         self.assertEqual(actual_result, expected_result)
+
+
+class TestOpaqueKeyCache(TestCase):
+    """
+    Tests for the cache of parsed opaque keys.
+    """
+
+    def setUp(self):
+        super().setUp()
+        _get_opaque_key_parser.cache_clear()
+        self.addCleanup(_get_opaque_key_parser.cache_clear)
+
+    def test_parsed_keys_are_reused(self):
+        """
+        Test that deserializing the same key twice parses it once.
+        """
+        data = "block-v1:edx+DemoX+Demo_course+type@video+block@UaEBjyMjcLW65gaTXggB93WmvoxGAJa0JeHRrDThk"
+
+        first = UsageKeyAvroSerializer.deserialize(data)
+        second = UsageKeyAvroSerializer.deserialize(data)
+
+        self.assertIs(first, second)
+        self.assertEqual(first, UsageKey.from_string(data))
+        cache_info = opaque_key_cache_info()
+        self.assertEqual((cache_info.hits, cache_info.misses), (1, 1))
+
+    def test_keys_are_cached_per_class(self):
+        """
+        Test that the same data is parsed separately for different key classes.
+        """
+        data = "course-v1:edx+DemoX+Demo_course"
+
+        self.assertEqual(CourseKeyAvroSerializer.deserialize(data), CourseKey.from_string(data))
+        with self.assertRaises(InvalidKeyError):
+            UsageKeyAvroSerializer.deserialize(data)
+
+        self.assertEqual(opaque_key_cache_info().misses, 2)
+
+    @override_settings(EVENT_BUS_OPAQUE_KEY_CACHE_SIZE=1)
+    def test_cache_is_bounded(self):
+        """
+        Test that the least recently used keys are evicted.
+        """
+        CourseKeyAvroSerializer.deserialize("course-v1:edx+DemoX+Demo_course")
+        CourseKeyAvroSerializer.deserialize("course-v1:edx+DemoX+Other_course")
+        CourseKeyAvroSerializer.deserialize("course-v1:edx+DemoX+Demo_course")
+
+        cache_info = opaque_key_cache_info()
+        self.assertEqual((cache_info.hits, cache_info.misses, cache_info.currsize), (0, 3, 1))
+
+    @override_settings(EVENT_BUS_OPAQUE_KEY_CACHE_SIZE=0)
+    def test_cache_can_be_disabled(self):
+        """
+        Test that setting the cache size to 0 disables the cache.
+        """
+        data = "course-v1:edx+DemoX+Demo_course"
+
+        self.assertIsNot(CourseKeyAvroSerializer.deserialize(data), CourseKeyAvroSerializer.deserialize(data))
+        self.assertIsNone(opaque_key_cache_info())
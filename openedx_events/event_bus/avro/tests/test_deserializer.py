@@ -1,14 +1,22 @@
 """Tests for avro.deserializer"""
 import json
+import mmap
 from datetime import datetime
 from typing import Dict, List
 from unittest import TestCase
+from unittest.mock import patch
 
 import ddt
+from django.test import override_settings
 from opaque_keys.edx.keys import CourseKey, UsageKey
 from opaque_keys.edx.locator import LibraryLocatorV2, LibraryUsageLocatorV2
 
-from openedx_events.event_bus.avro.deserializer import AvroSignalDeserializer, deserialize_bytes_to_event_data
+from openedx_events.event_bus.avro.deserializer import (
+    AvroSignalDeserializer,
+    deserialize_bytes_to_event_data,
+    get_signal_deserializer,
+)
+from openedx_events.event_bus.avro.schema import schema_from_signal
 from openedx_events.event_bus.avro.tests.test_utilities import (
     ComplexAttrs,
     EventData,
@@ -16,6 +24,7 @@ from openedx_events.event_bus.avro.tests.test_utilities import (
     NestedComplexAttrs,
     NestedNonAttrs,
     NonAttrs,
+    RecursiveAttrs,
     SimpleAttrs,
     SimpleAttrsWithDefaults,
     SpecialDeserializer,
@@ -483,6 +492,43 @@ class TestAvroSignalDeserializerCache(TestCase, FreezeSignalCacheMixin):
         self.assertIn("Unable to deserialize", str(context.exception))
         self.assertIn("CustomUnsupportedType", str(context.exception))
 
+    def test_deserialization_of_recursive_attrs(self):
+        SIGNAL = create_simple_signal({"data": RecursiveAttrs})
+        initial_dict = {"data": {"name": "root", "children": [{"name": "leaf", "children": []}]}}
+
+        deserializer = AvroSignalDeserializer(SIGNAL)
+        event_data = deserializer.from_dict(initial_dict)
+
+        self.assertEqual(
+            event_data["data"],
+            RecursiveAttrs(name="root", children=[RecursiveAttrs(name="leaf", children=[])]),
+        )
+
+    def test_decoders_are_compiled_once(self):
+        """
+        Check that the type introspection happens when creating the deserializer, not for every record.
+        """
+        SIGNAL = create_simple_signal({"dict_input": dict[str, EventData], "list_input": List[SubTestData0]})
+        initial_dict = {
+            "dict_input": {
+                "key1": {
+                    "course_id": "bar",
+                    "sub_name": "bar.name",
+                    "sub_test_0": {"course_id": "bar1.course", "sub_name": "bar1.name"},
+                    "sub_test_1": {"course_id": "bar2.course", "sub_name": "bar2.name"},
+                },
+            },
+            "list_input": [{"course_id": "foo", "sub_name": "foo.name"}],
+        }
+        deserializer = AvroSignalDeserializer(SIGNAL)
+
+        with patch("openedx_events.event_bus.avro.deserializer.get_origin") as mock_get_origin:
+            event_data = deserializer.from_dict(initial_dict)
+
+        mock_get_origin.assert_not_called()
+        self.assertEqual(event_data["list_input"], [SubTestData0(sub_name="foo.name", course_id="foo")])
+        self.assertEqual(event_data["dict_input"]["key1"].sub_test_1, SubTestData1("bar2.name", "bar2.course"))
+
     def test_deserialize_bytes_to_event_data(self):
         """
         Test deserialize_bytes_to_event_data utility function.
@@ -498,3 +544,61 @@ class TestAvroSignalDeserializerCache(TestCase, FreezeSignalCacheMixin):
         deserialized = deserialize_bytes_to_event_data(bytes_data, SIGNAL)
         self.assertIsInstance(deserialized["test_data"], EventData)
         self.assertEqual(deserialized, expected)
+
+    def test_deserialize_buffers_to_event_data(self):
+        """
+        Test deserialize_bytes_to_event_data reading from buffers other than bytes.
+        """
+        SIGNAL = create_simple_signal({"test_data": EventData})
+        bytes_data = b'\x06foo\x14bar.course\x14a.sub.name\x1ea.nother.course\x1eb.uber.sub.name*b.uber.another.course'
+        expected = deserialize_bytes_to_event_data(bytes_data, SIGNAL)
+        framed = b"\x00" + bytes_data + b"\x00"
+
+        with mmap.mmap(-1, len(bytes_data)) as mapped:
+            mapped.write(bytes_data)
+            for buffer in (bytearray(bytes_data), memoryview(framed)[1:-1], mapped):
+                self.assertEqual(deserialize_bytes_to_event_data(buffer, SIGNAL), expected)
+
+
+class TestGetSignalDeserializer(TestCase, FreezeSignalCacheMixin):
+    """Tests for the process-wide deserializer cache."""
+
+    def setUp(self):
+        super().setUp()
+        get_signal_deserializer.cache_clear()
+
+    def test_deserializer_is_shared_per_signal_and_class(self):
+        signal = create_simple_signal({"test_data": NonAttrs})
+        other_signal = create_simple_signal({"test_data": NonAttrs}, event_type="other.signal")
+
+        deserializer = get_signal_deserializer(signal, SpecialDeserializer)
+
+        self.assertIsInstance(deserializer, SpecialDeserializer)
+        self.assertIs(get_signal_deserializer(signal, SpecialDeserializer), deserializer)
+        self.assertIsNot(get_signal_deserializer(other_signal, SpecialDeserializer), deserializer)
+
+    def test_default_deserializer_class(self):
+        signal = create_simple_signal({"test_data": EventData})
+
+        deserializer = get_signal_deserializer(signal)
+
+        self.assertIs(type(deserializer), AvroSignalDeserializer)
+        self.assertIs(get_signal_deserializer(signal), deserializer)
+
+    def test_cache_is_cleared_when_settings_change(self):
+        signal = create_simple_signal({"test_data": EventData})
+        deserializer = get_signal_deserializer(signal)
+
+        with override_settings(EVENTS_SERVICE_NAME="test"):
+            self.assertIsNot(get_signal_deserializer(signal), deserializer)
+
+    @patch("openedx_events.event_bus.avro.schema.schema_from_signal", wraps=schema_from_signal)
+    def test_deserialize_bytes_to_event_data_builds_schema_once(self, mock_schema_from_signal):
+        signal = create_simple_signal({"test_data": EventData})
+        bytes_data = b'\x06foo\x14bar.course\x14a.sub.name\x1ea.nother.course\x1eb.uber.sub.name*b.uber.another.course'
+
+        first = deserialize_bytes_to_event_data(bytes_data, signal)
+        second = deserialize_bytes_to_event_data(bytes_data, signal)
+
+        self.assertEqual(first, second)
+        mock_schema_from_signal.assert_called_once()
@@ -1,10 +1,14 @@
 """
 Tests for event_bus.avro.schema module
 """
+import json
 from typing import Dict, List
 from unittest import TestCase
 
-from openedx_events.event_bus.avro.schema import schema_from_signal
+from django.test import override_settings
+from fastavro.schema import fingerprint, to_parsing_canonical_form
+
+from openedx_events.event_bus.avro.schema import get_signal_schema, schema_from_signal
 from openedx_events.event_bus.avro.tests.test_utilities import (
     EventData,
     NestedAttrsWithDefaults,
@@ -347,3 +351,48 @@ class TestSchemaGeneration(TestCase):
         }
         schema = schema_from_signal(LIST_SIGNAL)
         self.assertDictEqual(schema, expected_dict)
+
+
+class TestGetSignalSchema(TestCase):
+    """
+    Test cached Avro schemas.
+    """
+
+    def test_schema_is_computed_once_per_signal(self):
+        SIGNAL = create_simple_signal({"event_data": SimpleAttrs})
+
+        signal_schema = get_signal_schema(SIGNAL)
+
+        self.assertIs(get_signal_schema(SIGNAL), signal_schema)
+        self.assertIsNot(get_signal_schema(create_simple_signal({"event_data": SimpleAttrs})), signal_schema)
+        self.assertEqual(signal_schema.schema, schema_from_signal(SIGNAL))
+        self.assertEqual(json.loads(signal_schema.schema_string), signal_schema.schema)
+
+    def test_schema_is_computed_per_custom_types(self):
+        SIGNAL = create_simple_signal({"event_data": SimpleAttrs})
+
+        signal_schema = get_signal_schema(SIGNAL, custom_type_to_avro_type={SimpleAttrs: "string"})
+
+        self.assertIs(get_signal_schema(SIGNAL, custom_type_to_avro_type={SimpleAttrs: "string"}), signal_schema)
+        self.assertIsNot(get_signal_schema(SIGNAL), signal_schema)
+        self.assertEqual(signal_schema.schema["fields"], [{"name": "event_data", "type": "string"}])
+
+    def test_cache_is_cleared_when_settings_change(self):
+        SIGNAL = create_simple_signal({"event_data": SimpleAttrs})
+        signal_schema = get_signal_schema(SIGNAL)
+
+        with override_settings(EVENTS_SERVICE_NAME="test"):
+            self.assertIsNot(get_signal_schema(SIGNAL), signal_schema)
+
+    def test_canonical_form_and_fingerprint(self):
+        SIGNAL = create_simple_signal({"event_data": SimpleAttrs})
+        schema = schema_from_signal(SIGNAL)
+
+        signal_schema = get_signal_schema(SIGNAL)
+
+        self.assertEqual(signal_schema.canonical_form, to_parsing_canonical_form(schema))
+        self.assertEqual(signal_schema.fingerprint, fingerprint(to_parsing_canonical_form(schema), "CRC-64-AVRO"))
+        self.assertEqual(len(signal_schema.fingerprint), 16)
+        # The fingerprint identifies the schema, not the signal.
+        OTHER_SIGNAL = create_simple_signal({"event_data": SimpleAttrs})
+        self.assertEqual(get_signal_schema(OTHER_SIGNAL).fingerprint, signal_schema.fingerprint)
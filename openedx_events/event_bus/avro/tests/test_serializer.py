@@ -2,18 +2,27 @@
 
 import json
 from datetime import datetime
+from typing import Dict, List
+from unittest.mock import patch
 
 import pytest
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from opaque_keys.edx.keys import CourseKey, UsageKey
 from opaque_keys.edx.locator import LibraryLocatorV2, LibraryUsageLocatorV2
 
-from openedx_events.event_bus.avro.serializer import AvroSignalSerializer, serialize_event_data_to_bytes
+from openedx_events.event_bus.avro.schema import schema_from_signal
+from openedx_events.event_bus.avro.serializer import (
+    AvroSignalSerializer,
+    _AvroRecordConverter,
+    get_signal_serializer,
+    serialize_event_data_to_bytes,
+)
 from openedx_events.event_bus.avro.tests.test_utilities import (
     CustomAttrsWithDefaults,
     CustomAttrsWithoutDefaults,
     EventData,
     NestedAttrsWithDefaults,
+    NestedComplexAttrs,
     NestedNonAttrs,
     NonAttrs,
     SimpleAttrs,
@@ -211,6 +220,47 @@ class TestAvroSignalSerializerCache(FreezeSignalCacheMixin, TestCase):
                                                               'attrs_field': None
                                                               }}})
 
+    def test_convert_nested_collections_to_dict(self):
+        """
+        Tests that attrs objects and tuples nested in lists and dicts are converted.
+        """
+        SIGNAL = create_simple_signal({
+            "list_data": List[SubTestData0],
+            "dict_data": Dict[str, List[str]],
+            "nested_data": NestedComplexAttrs,
+        })
+        simple = SimpleAttrs(True, 1, 1.5, b"bytes", "string")
+        serializer = AvroSignalSerializer(SIGNAL)
+
+        data_dict = serializer.to_dict({
+            "list_data": [SubTestData0("a.sub.name", "a.nother.course")],
+            "dict_data": {"names": ("a", "b")},
+            "nested_data": NestedComplexAttrs(
+                list_of_attr_field=[simple],
+                dict_of_attr_field={"simple": simple},
+                list_of_dict_field=[{"a": 1}],
+                dict_of_list_field={"b": [2, 3]},
+            ),
+        })
+
+        simple_dict = {
+            "boolean_field": True,
+            "int_field": 1,
+            "float_field": 1.5,
+            "bytes_field": b"bytes",
+            "string_field": "string",
+        }
+        self.assertDictEqual(data_dict, {
+            "list_data": [{"sub_name": "a.sub.name", "course_id": "a.nother.course"}],
+            "dict_data": {"names": ["a", "b"]},
+            "nested_data": {
+                "list_of_attr_field": [simple_dict],
+                "dict_of_attr_field": {"simple": simple_dict},
+                "list_of_dict_field": [{"a": 1}],
+                "dict_of_list_field": {"b": [2, 3]},
+            },
+        })
+
     def test_serialize_event_data_to_bytes(self):
         """
         Test serialize_event_data_to_bytes utility function.
@@ -225,3 +275,98 @@ class TestAvroSignalSerializerCache(FreezeSignalCacheMixin, TestCase):
         serialized = serialize_event_data_to_bytes(event_data, SIGNAL)
         expected = b'\x06foo\x14bar.course\x14a.sub.name\x1ea.nother.course\x1eb.uber.sub.name*b.uber.another.course'
         self.assertEqual(serialized, expected)
+
+
+class TestGetSignalSerializer(FreezeSignalCacheMixin, TestCase):
+    """Tests for the process-wide serializer cache."""
+
+    def setUp(self):
+        super().setUp()
+        get_signal_serializer.cache_clear()
+
+    def test_serializer_is_shared_per_signal_and_class(self):
+        signal = create_simple_signal({"test_data": NonAttrs})
+        other_signal = create_simple_signal({"test_data": NonAttrs}, event_type="other.signal")
+
+        serializer = get_signal_serializer(signal, SpecialSerializer)
+
+        self.assertIsInstance(serializer, SpecialSerializer)
+        self.assertIs(get_signal_serializer(signal, SpecialSerializer), serializer)
+        self.assertIsNot(get_signal_serializer(other_signal, SpecialSerializer), serializer)
+
+    def test_default_serializer_class(self):
+        signal = create_simple_signal({"test_data": EventData})
+
+        serializer = get_signal_serializer(signal)
+
+        self.assertIs(type(serializer), AvroSignalSerializer)
+        self.assertIs(get_signal_serializer(signal), serializer)
+
+    def test_cache_is_cleared_when_settings_change(self):
+        signal = create_simple_signal({"test_data": EventData})
+        serializer = get_signal_serializer(signal)
+
+        with override_settings(EVENTS_SERVICE_NAME="test"):
+            self.assertIsNot(get_signal_serializer(signal), serializer)
+
+    @patch("openedx_events.event_bus.avro.schema.schema_from_signal", wraps=schema_from_signal)
+    def test_serialize_event_data_to_bytes_builds_schema_once(self, mock_schema_from_signal):
+        signal = create_simple_signal({"test_data": EventData})
+        event_data = {"test_data": EventData(
+            "foo",
+            "bar.course",
+            SubTestData0("a.sub.name", "a.nother.course"),
+            SubTestData1("b.uber.sub.name", "b.uber.another.course"),
+        )}
+
+        first = serialize_event_data_to_bytes(event_data, signal)
+        second = serialize_event_data_to_bytes(event_data, signal)
+
+        self.assertEqual(first, second)
+        mock_schema_from_signal.assert_called_once()
+
+
+class TestAvroRecordConverter(TestCase):
+    """Tests for the compiled serialization plans behind AvroSignalSerializer.to_dict."""
+
+    class Base:
+        """Class with a custom serializer."""
+
+    class Child(Base):
+        """Subclass with its own custom serializer."""
+
+    class GrandChild(Child):
+        """Subclass relying on its parent's custom serializer."""
+
+    def test_most_specific_serializer_wins(self):
+        converter = _AvroRecordConverter({
+            self.Base: lambda value: "base",
+            self.Child: lambda value: "child",
+        })
+
+        self.assertEqual(converter.value_to_avro(self.Base()), "base")
+        self.assertEqual(converter.value_to_avro(self.Child()), "child")
+        self.assertEqual(converter.value_to_avro(self.GrandChild()), "child")
+
+    def test_field_type_serializer_takes_precedence(self):
+        converter = _AvroRecordConverter({NonAttrs: lambda value: "non-attrs"})
+
+        # The declared field type decides, even if the runtime value would not match any serializer.
+        data_dict = converter.attrs_to_dict(NestedNonAttrs(field_0="not.non.attrs"))
+
+        self.assertDictEqual(data_dict, {"field_0": "non-attrs"})
+
+    def test_plans_and_dispatch_are_compiled_once(self):
+        converter = _AvroRecordConverter()
+        event_data = {"test_data": EventData(
+            "foo",
+            "bar.course",
+            SubTestData0("a.sub.name", "a.nother.course"),
+            SubTestData1("b.uber.sub.name", "b.uber.another.course"),
+        )}
+        expected_dict = converter.event_data_to_dict(event_data)
+
+        with patch.object(converter, "_get_serializer_for_type") as mock_get_serializer:
+            self.assertDictEqual(converter.event_data_to_dict(event_data), expected_dict)
+
+        mock_get_serializer.assert_not_called()
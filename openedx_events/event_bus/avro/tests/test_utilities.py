@@ -78,6 +78,16 @@ class EventData:
     sub_test_1: SubTestData1
 
 
+@attr.s(auto_attribs=True)
+class RecursiveAttrs:
+    """Class with a field referring to its own type"""
+    name: str
+    children: list["RecursiveAttrs"]
+
+
+attr.resolve_types(RecursiveAttrs)
+
+
 @attr.s(frozen=True)
 class SimpleAttrsWithDefaults:
     """Test attrs with nullable values"""
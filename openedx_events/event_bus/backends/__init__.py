@@ -0,0 +1,6 @@
+"""
+Event bus implementations shipped with openedx-events, for development, benchmarks and single-node deployments.
+
+Production deployments usually rely on a dedicated event bus plugin such as edx-event-bus-kafka or
+edx-event-bus-redis instead.
+"""
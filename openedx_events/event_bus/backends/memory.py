@@ -0,0 +1,358 @@
+"""
+In-memory event bus, keeping partitioned topics in process memory.
+
+Events are serialized, partitioned by key and deserialized just like with other event buses, but never leave the
+process, which makes this backend a zero-I/O baseline to measure the overhead of openedx-events itself, and an event
+bus for single-process deployments that do not need durability.
+
+Select it with::
+
+    EVENT_BUS_PRODUCER = "openedx_events.event_bus.backends.memory.create_producer"
+    EVENT_BUS_CONSUMER = "openedx_events.event_bus.backends.memory.MemoryEventBusConsumer"
+
+Consumers must run in the producing process, e.g. in a thread calling ``consume_indefinitely``.
+"""
+import logging
+import threading
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+import attr
+from django.conf import settings
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+from openedx_events.data import EventsMetadata
+from openedx_events.event_bus import EventBusConsumer, EventBusProducer, ProducerMessage
+from openedx_events.event_bus.backends.utils import emit_event, get_records_by_topic
+from openedx_events.event_bus.partitioning import partition_for
+from openedx_events.tooling import OpenEdxPublicSignal
+
+logger = logging.getLogger(__name__)
+
+# .. setting_name: EVENT_BUS_MEMORY_PARTITIONS
+# .. setting_default: 1
+# .. setting_description: Number of partitions of each topic of the in-memory event bus. Events are assigned to
+#   partitions by key (see ``partition_for``), and the consumers of a group share the partitions of a topic.
+DEFAULT_PARTITIONS = 1
+
+# .. setting_name: EVENT_BUS_MEMORY_RETENTION
+# .. setting_default: 100000
+# .. setting_description: Number of events kept per partition of each topic of the in-memory event bus. Older
+#   events are dropped, in chunks of an eighth of this number, even if some consumer groups have not consumed
+#   them yet. Set to None to keep all events for the lifetime of the process.
+DEFAULT_RETENTION = 100000
+
+AUTO_OFFSET_RESETS = ("earliest", "latest")
+
+
+@attr.s(frozen=True)
+class MemoryRecord:
+    """
+    An event stored in a partition of an in-memory topic.
+
+    Attributes:
+        offset: Position of the event in its partition
+        key: The serialized event key
+        event_type: Type of the event
+        payload: The serialized event data, compressed if headers say so
+        headers: Message headers, see ``encode_payload``
+        metadata: The event metadata, as serialized by ``EventsMetadata.to_json``
+    """
+
+    offset = attr.ib(type=int)
+    key = attr.ib(type=bytes)
+    event_type = attr.ib(type=str)
+    payload = attr.ib(type=bytes)
+    headers = attr.ib(type=dict)
+    metadata = attr.ib(type=str)
+
+
+class _Partition:
+    """
+    An append-only sequence of records, dropping the oldest ones beyond the retention limit.
+    """
+
+    def __init__(self, retention):
+        self.records = []
+        self.start_offset = 0
+        self.retention = retention
+        # Trim records in chunks rather than one by one, to keep appends amortized O(1).
+        self._trim_threshold = None if retention is None else retention + max(retention // 8, 1)
+
+    @property
+    def end_offset(self):
+        return self.start_offset + len(self.records)
+
+    def append(self, key, event_type, payload, headers, metadata):
+        """
+        Append a record, at the end offset.
+        """
+        self.records.append(MemoryRecord(self.end_offset, key, event_type, payload, headers, metadata))
+        if self._trim_threshold is not None and len(self.records) > self._trim_threshold:
+            excess = len(self.records) - self.retention
+            del self.records[:excess]
+            self.start_offset += excess
+
+    def read(self, offset, max_records):
+        """
+        Read up to max_records records from offset, or from the oldest record kept.
+        """
+        start = max(offset - self.start_offset, 0)
+        return self.records[start:start + max_records]
+
+
+class _Topic:
+    """
+    The partitions of a topic, and the condition notifying consumers of new records.
+    """
+
+    def __init__(self, num_partitions, retention):
+        self.partitions = [_Partition(retention) for _ in range(num_partitions)]
+        self.condition = threading.Condition()
+        self.appended = 0
+
+
+class MemoryBroker:
+    """
+    Topics, committed offsets and partition claims of consumer groups, shared by producers and consumers.
+
+    Topics are created on first use. All methods are thread-safe.
+    """
+
+    def __init__(self, num_partitions=DEFAULT_PARTITIONS, retention=DEFAULT_RETENTION):
+        if num_partitions < 1:
+            raise ValueError("num_partitions should be a positive integer")
+        self.num_partitions = num_partitions
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._topics = {}
+        # (group_id, topic, partition) -> next offset to consume
+        self._committed = {}
+        # (group_id, topic, partition) -> lock held by the consumer of the group processing the partition
+        self._claims = {}
+
+    def get_topic(self, topic: str) -> _Topic:
+        """
+        Get a topic, creating it if needed.
+        """
+        with self._lock:
+            if topic not in self._topics:
+                self._topics[topic] = _Topic(self.num_partitions, self.retention)
+            return self._topics[topic]
+
+    def append(self, topic: str, records: Sequence[tuple]) -> None:
+        """
+        Append records to a topic, in order, assigning them to partitions by key.
+
+        Arguments:
+            topic: Name of the topic
+            records: (key, event_type, payload, headers, metadata) tuples
+        """
+        memory_topic = self.get_topic(topic)
+        with memory_topic.condition:
+            for record in records:
+                memory_topic.partitions[partition_for(record[0], self.num_partitions)].append(*record)
+            memory_topic.appended += len(records)
+            memory_topic.condition.notify_all()
+
+    def read(self, topic: str, partition: int, offset: int, max_records: int) -> List[MemoryRecord]:
+        """
+        Read up to max_records records of a partition, from offset or from the oldest record kept.
+        """
+        memory_topic = self.get_topic(topic)
+        with memory_topic.condition:
+            return memory_topic.partitions[partition].read(offset, max_records)
+
+    def offsets(self, topic: str, partition: int):
+        """
+        Get the offsets of the oldest record kept in a partition, and of the next record to be appended.
+        """
+        memory_topic = self.get_topic(topic)
+        with memory_topic.condition:
+            memory_partition = memory_topic.partitions[partition]
+            return memory_partition.start_offset, memory_partition.end_offset
+
+    def committed(self, group_id: str, topic: str, partition: int) -> Optional[int]:
+        """
+        Get the next offset to consume from a partition by a consumer group, if the group committed one.
+        """
+        return self._committed.get((group_id, topic, partition))
+
+    def commit(self, group_id: str, topic: str, partition: int, offset: int) -> None:
+        """
+        Commit the next offset to consume from a partition by a consumer group.
+        """
+        self._committed[(group_id, topic, partition)] = offset
+
+    def claim(self, group_id: str, topic: str, partition: int) -> Optional[threading.Lock]:
+        """
+        Claim a partition for a consumer of a group, so that the group consumes each partition in order.
+
+        Returns:
+            A lock to release once done consuming, or None if another consumer of the group claimed the partition.
+        """
+        with self._lock:
+            claim = self._claims.setdefault((group_id, topic, partition), threading.Lock())
+        return claim if claim.acquire(blocking=False) else None
+
+    def clear(self) -> None:
+        """
+        Drop all topics and committed offsets.
+        """
+        with self._lock:
+            self._topics.clear()
+            self._committed.clear()
+
+
+@lru_cache(maxsize=None)
+def get_broker() -> MemoryBroker:
+    """
+    Get the broker of the process, configured with the ``EVENT_BUS_MEMORY_*`` settings.
+    """
+    return MemoryBroker(
+        num_partitions=getattr(settings, "EVENT_BUS_MEMORY_PARTITIONS", DEFAULT_PARTITIONS),
+        retention=getattr(settings, "EVENT_BUS_MEMORY_RETENTION", DEFAULT_RETENTION),
+    )
+
+
+@receiver(setting_changed)
+def _reset_state(sender, **kwargs):  # pylint: disable=unused-argument
+    """Replace the broker by an empty one configured with the current EVENT_BUS_MEMORY_* settings."""
+    get_broker.cache_clear()
+
+
+class MemoryEventBusProducer(EventBusProducer):
+    """
+    Producer appending events to the topics of a MemoryBroker.
+    """
+
+    def __init__(self, broker: Optional[MemoryBroker] = None):
+        self.broker = broker or get_broker()
+
+    def send(
+            self, *, signal: OpenEdxPublicSignal, topic: str, event_key_field: str, event_data: dict,
+            event_metadata: EventsMetadata
+    ) -> None:
+        self.send_batch([ProducerMessage(signal, topic, event_key_field, event_data, event_metadata)])
+
+    def send_batch(self, messages: Sequence[ProducerMessage]) -> None:
+        """
+        Serialize and append messages to their topics, serializing events sent to several topics once per codec.
+        """
+        for topic, records in get_records_by_topic(messages).items():
+            self.broker.append(topic, records)
+
+
+def create_producer() -> MemoryEventBusProducer:
+    """
+    Create a producer for the broker of the process, for the EVENT_BUS_PRODUCER setting.
+    """
+    return MemoryEventBusProducer()
+
+
+class MemoryEventBusConsumer(EventBusConsumer):
+    """
+    Consumer emitting the events of a topic of a MemoryBroker to their signals, as part of a consumer group.
+
+    Consumers of the same group share the partitions of the topic: each partition is consumed by a single consumer
+    of the group at a time, in order, and the group's offset is committed after each event. Consumers of different
+    groups each receive all events.
+    """
+
+    def __init__(
+            self, topic: str, group_id: str, *, broker: Optional[MemoryBroker] = None,
+            auto_offset_reset: str = "earliest", poll_timeout: float = 1.0, max_poll_records: int = 500,
+    ):
+        """
+        Arguments:
+            topic: The topic to consume
+            group_id: The consumer group to participate in
+            broker: The broker holding the topic, defaulting to the broker of the process
+            auto_offset_reset: Where the group starts consuming partitions without committed offset: "earliest"
+              (oldest event kept) or "latest" (events appended after the first poll)
+            poll_timeout: Seconds to wait for new events before polling partitions again
+            max_poll_records: Maximum number of events consumed from a partition before moving to the next one
+        """
+        if auto_offset_reset not in AUTO_OFFSET_RESETS:
+            raise ValueError(f"auto_offset_reset should be one of {AUTO_OFFSET_RESETS}")
+        self.topic = topic
+        self.group_id = group_id
+        self.broker = broker or get_broker()
+        self.auto_offset_reset = auto_offset_reset
+        self.poll_timeout = poll_timeout
+        self.max_poll_records = max_poll_records
+        self._stopped = threading.Event()
+
+    def consume_indefinitely(self) -> None:
+        """
+        Consume events until ``shutdown`` is called, waiting for new events when all partitions are consumed.
+        """
+        memory_topic = self.broker.get_topic(self.topic)
+        self._stopped.clear()
+        while not self._stopped.is_set():
+            appended = memory_topic.appended
+            if self.consume_available():
+                continue
+            with memory_topic.condition:
+                memory_topic.condition.wait_for(
+                    lambda: memory_topic.appended != appended or self._stopped.is_set(), timeout=self.poll_timeout,
+                )
+
+    def shutdown(self) -> None:
+        """
+        Stop ``consume_indefinitely`` once the event being processed, if any, is done.
+        """
+        self._stopped.set()
+        memory_topic = self.broker.get_topic(self.topic)
+        with memory_topic.condition:
+            memory_topic.condition.notify_all()
+
+    def consume_available(self) -> int:
+        """
+        Consume the events available in the partitions that no other consumer of the group is consuming.
+
+        Returns:
+            The number of events consumed.
+        """
+        consumed = 0
+        for partition in range(self.broker.num_partitions):
+            claim = self.broker.claim(self.group_id, self.topic, partition)
+            if claim is None:
+                continue
+            try:
+                consumed += self._consume_partition(partition)
+            finally:
+                claim.release()
+        return consumed
+
+    def _consume_partition(self, partition):
+        """
+        Consume up to max_poll_records events of a partition claimed by this consumer.
+        """
+        offset = self.broker.committed(self.group_id, self.topic, partition)
+        start_offset, end_offset = self.broker.offsets(self.topic, partition)
+        if offset is None:
+            offset = start_offset if self.auto_offset_reset == "earliest" else end_offset
+            self.broker.commit(self.group_id, self.topic, partition, offset)
+        elif offset < start_offset:
+            logger.warning(
+                f"Skipping {start_offset - offset} events of partition {partition} of topic {self.topic} dropped "
+                f"before being consumed by group {self.group_id}"
+            )
+        records = self.broker.read(self.topic, partition, offset, self.max_poll_records)
+        for record in records:
+            if self._stopped.is_set():
+                break
+            self.emit_record(record)
+            self.broker.commit(self.group_id, self.topic, partition, record.offset + 1)
+        return len(records)
+
+    def emit_record(self, record: MemoryRecord) -> None:
+        """
+        Deserialize an event and send it to its signal, logging errors instead of raising them.
+        """
+        emit_event(
+            record.event_type, record.payload, record.headers, record.metadata,
+            location=f"offset {record.offset} of topic {self.topic}",
+        )
@@ -0,0 +1,672 @@
+"""
+File-backed event bus, appending events to segmented log files per topic and partition, read through mmap.
+
+Events are durable and can be produced and consumed by any number of processes on the same machine, without running
+a broker, which suits small self-hosted installations and load tests standing in for Kafka. Select it with::
+
+    EVENT_BUS_PRODUCER = "openedx_events.event_bus.backends.mmap_log.create_producer"
+    EVENT_BUS_CONSUMER = "openedx_events.event_bus.backends.mmap_log.LogEventBusConsumer"
+    EVENT_BUS_LOG_DIR = "/var/lib/openedx/event-bus"
+
+Layout of ``EVENT_BUS_LOG_DIR``::
+
+    <topic>/<partition>/<offset>.log           segments, named by the offset of their first event
+    <topic>/<partition>/append.lock            locked by producers while appending to the partition
+    <topic>/<partition>/groups/<group>.offset  checkpoint: next offset to consume by the consumer group
+    <topic>/<partition>/groups/<group>.lock    locked by the consumer of the group consuming the partition
+
+Offsets are byte positions in the partition. Each event is a frame made of the length and CRC32 of its body,
+followed by the lengths of the event key, event type, headers (JSON) and metadata, then these fields and the
+serialized event data. Segments are immutable once a producer rolls over to a new segment. When rolling over,
+producers delete the segments that all consumer groups with a checkpoint in the partition have consumed, so
+consumers of new groups only find the events that were not consumed yet.
+"""
+import bisect
+import fcntl
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from functools import lru_cache
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+from openedx_events.data import EventsMetadata
+from openedx_events.event_bus import EventBusConsumer, EventBusProducer, ProducerMessage
+from openedx_events.event_bus.backends.utils import emit_event, get_records_by_topic
+from openedx_events.event_bus.partitioning import partition_for
+from openedx_events.tooling import OpenEdxPublicSignal
+
+logger = logging.getLogger(__name__)
+
+# .. setting_name: EVENT_BUS_LOG_DIR
+# .. setting_default: None
+# .. setting_description: Directory holding the topics of the file-backed event bus
+#   (``openedx_events.event_bus.backends.mmap_log``). Required to use it.
+
+# .. setting_name: EVENT_BUS_LOG_PARTITIONS
+# .. setting_default: 1
+# .. setting_description: Number of partitions of the topics created by producers of the file-backed event bus.
+#   Events are assigned to partitions by key (see ``partition_for``), and the consumers of a group share the
+#   partitions of a topic. Must be the same for all producers.
+DEFAULT_PARTITIONS = 1
+
+# .. setting_name: EVENT_BUS_LOG_SEGMENT_BYTES
+# .. setting_default: 64 * 1024 * 1024
+# .. setting_description: Size in bytes beyond which producers of the file-backed event bus start a new segment.
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+
+# .. toggle_name: EVENT_BUS_LOG_FSYNC
+# .. toggle_implementation: DjangoSetting
+# .. toggle_default: False
+# .. toggle_description: Whether producers and consumers of the file-backed event bus wait for events and
+#   checkpoints to be written to disk. Otherwise they survive process crashes, but not necessarily power losses.
+# .. toggle_use_cases: open_edx
+# .. toggle_creation_date: 2026-10-17
+DEFAULT_FSYNC = False
+
+AUTO_OFFSET_RESETS = ("earliest", "latest")
+
+# Length of the body, CRC32 of the body
+_FRAME_HEADER = struct.Struct(">II")
+# Lengths of the key, event type, headers and metadata; the event data takes the rest of the body
+_BODY_HEADER = struct.Struct(">HHHI")
+_SEGMENT_SUFFIX = ".log"
+_APPEND_LOCK = "append.lock"
+_GROUPS_DIR = "groups"
+_OFFSET_SUFFIX = ".offset"
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9._-]+$")
+
+
+def _check_name(kind, name):
+    """
+    Check that a topic or group name can be used as a file name.
+    """
+    if not _NAME_PATTERN.match(name) or name in (".", ".."):
+        raise ValueError(f"Invalid {kind} name for the file-backed event bus: '{name}'")
+
+
+def encode_frame(key: bytes, event_type: str, payload: bytes, headers: dict, metadata: str) -> bytes:
+    """
+    Encode a record as a frame of the log.
+    """
+    event_type_bytes = event_type.encode("utf-8")
+    headers_bytes = json.dumps(headers, separators=(",", ":")).encode("utf-8") if headers else b""
+    metadata_bytes = metadata.encode("utf-8")
+    body = b"".join((
+        _BODY_HEADER.pack(len(key), len(event_type_bytes), len(headers_bytes), len(metadata_bytes)),
+        key, event_type_bytes, headers_bytes, metadata_bytes, payload,
+    ))
+    return _FRAME_HEADER.pack(len(body), zlib.crc32(body)) + body
+
+
+def _read_frame(data, position: int, size: int):
+    """
+    Read the frame at position of a buffer holding size bytes of a segment.
+
+    Returns:
+        None if the frame is incomplete, or the position of the next frame and a memoryview of the body, which is
+        None if the body does not match its checksum.
+    """
+    if position + _FRAME_HEADER.size > size:
+        return None
+    length, checksum = _FRAME_HEADER.unpack_from(data, position)
+    start = position + _FRAME_HEADER.size
+    if start + length > size:
+        return None
+    body = memoryview(data)[start:start + length]
+    if zlib.crc32(body) != checksum:
+        body.release()
+        return start + length, None
+    return start + length, body
+
+
+class LogStore:
+    """
+    The topics of the file-backed event bus in a directory, shared by producers and consumers of all processes.
+    """
+
+    def __init__(self, path: str, num_partitions=DEFAULT_PARTITIONS, segment_bytes=DEFAULT_SEGMENT_BYTES,
+                 fsync=DEFAULT_FSYNC):
+        if num_partitions < 1:
+            raise ValueError("num_partitions should be a positive integer")
+        if segment_bytes < 1:
+            raise ValueError("segment_bytes should be a positive integer")
+        self.path = path
+        self.num_partitions = num_partitions
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self._created_topics = set()
+        # (topic, partition) -> (base offset, size) of the last segment, up to which frames were checked
+        self._checked_tails = {}
+
+    def partition_dir(self, topic: str, partition: int) -> str:
+        _check_name("topic", topic)
+        return os.path.join(self.path, topic, str(partition))
+
+    def partitions(self, topic: str) -> List[int]:
+        """
+        Get the partitions of a topic, as created by producers.
+        """
+        _check_name("topic", topic)
+        try:
+            names = os.listdir(os.path.join(self.path, topic))
+        except FileNotFoundError:
+            return []
+        return sorted(int(name) for name in names if name.isdigit())
+
+    def segments(self, topic: str, partition: int) -> List[int]:
+        """
+        Get the offsets of the segments of a partition, in order.
+        """
+        try:
+            names = os.listdir(self.partition_dir(topic, partition))
+        except FileNotFoundError:
+            return []
+        return sorted(int(name[:-len(_SEGMENT_SUFFIX)]) for name in names if name.endswith(_SEGMENT_SUFFIX))
+
+    def segment_path(self, topic: str, partition: int, base_offset: int) -> str:
+        return os.path.join(self.partition_dir(topic, partition), f"{base_offset:020d}{_SEGMENT_SUFFIX}")
+
+    def offsets(self, topic: str, partition: int) -> Tuple[int, int]:
+        """
+        Get the offsets of the oldest event kept in a partition, and of the next event to be appended.
+        """
+        segments = self.segments(topic, partition)
+        if not segments:
+            return 0, 0
+        return segments[0], segments[-1] + os.path.getsize(self.segment_path(topic, partition, segments[-1]))
+
+    def append(self, topic: str, records: Sequence[tuple]) -> None:
+        """
+        Append records to a topic, in order, assigning them to partitions by key.
+
+        Arguments:
+            topic: Name of the topic
+            records: (key, event_type, payload, headers, metadata) tuples
+        """
+        if topic not in self._created_topics:
+            for partition in range(self.num_partitions):
+                os.makedirs(os.path.join(self.partition_dir(topic, partition), _GROUPS_DIR), exist_ok=True)
+            self._created_topics.add(topic)
+        frames_by_partition = {}
+        for record in records:
+            frames_by_partition.setdefault(partition_for(record[0], self.num_partitions), []).append(
+                encode_frame(*record)
+            )
+        for partition, frames in frames_by_partition.items():
+            self._append_frames(topic, partition, frames)
+
+    def _append_frames(self, topic, partition, frames):
+        """
+        Append frames to the last segment of a partition, rolling over to new segments as they fill up.
+        """
+        with open(os.path.join(self.partition_dir(topic, partition), _APPEND_LOCK), "ab") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            segments = self.segments(topic, partition)
+            base_offset = segments[-1] if segments else 0
+            fd = self._open_segment(topic, partition, base_offset)
+            try:
+                size = self._check_tail(topic, partition, base_offset, fd)
+                if size is None:
+                    os.close(fd)
+                    fd = None
+                    base_offset += self._checked_tails.pop((topic, partition))[1]
+                    fd = self._open_segment(topic, partition, base_offset)
+                    size = 0
+                start = size
+                pending = []
+                for frame in frames:
+                    if size and size + len(frame) > self.segment_bytes:
+                        self._write(fd, pending, start)
+                        os.close(fd)
+                        fd = None
+                        base_offset += size
+                        fd = self._open_segment(topic, partition, base_offset)
+                        start = size = 0
+                        pending = []
+                    pending.append(frame)
+                    size += len(frame)
+                self._write(fd, pending, start)
+                self._checked_tails[(topic, partition)] = (base_offset, size)
+                if segments and base_offset != segments[-1]:
+                    self.delete_consumed_segments(topic, partition)
+            except BaseException:
+                self._checked_tails.pop((topic, partition), None)
+                raise
+            finally:
+                if fd is not None:
+                    os.close(fd)
+
+    def _open_segment(self, topic, partition, base_offset):
+        """
+        Open a segment for appending, creating it if needed.
+        """
+        return os.open(self.segment_path(topic, partition, base_offset), os.O_RDWR | os.O_CREAT | os.O_APPEND)
+
+    def _check_tail(self, topic, partition, base_offset, fd):
+        """
+        Check the frames of the last segment of a partition that were not checked yet by this store.
+
+        A frame left incomplete by a producer that crashed or failed to write it is truncated, so that later frames
+        are not appended after it.
+
+        Returns:
+            The size of the segment, or None if it has a corrupted frame, in which case a new segment should be
+            started after it.
+        """
+        size = os.fstat(fd).st_size
+        checked_base_offset, position = self._checked_tails.get((topic, partition), (None, 0))
+        if checked_base_offset != base_offset or position > size:
+            position = 0
+        incomplete = corrupted = False
+        if position < size:
+            with mmap.mmap(fd, size, access=mmap.ACCESS_READ) as data:
+                while position < size:
+                    frame = _read_frame(data, position, size)
+                    incomplete = frame is None
+                    corrupted = not incomplete and frame[1] is None
+                    if incomplete or corrupted:
+                        break
+                    frame[1].release()
+                    position = frame[0]
+        location = f"offset {base_offset + position} of partition {partition} of topic {topic}"
+        if incomplete:
+            logger.warning(f"Truncating incomplete event at {location}")
+            os.ftruncate(fd, position)
+            size = position
+        self._checked_tails[(topic, partition)] = (base_offset, size)
+        if corrupted:
+            logger.warning(f"Corrupted event at {location}, starting a new segment")
+            return None
+        return size
+
+    def _write(self, fd, frames, start):
+        """
+        Write frames to a segment of start bytes, in a single write unless it is interrupted.
+
+        If writing fails, the segment is truncated back to start bytes, so that no incomplete frame is left.
+        """
+        data = b"".join(frames)
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+            if self.fsync:
+                os.fsync(fd)
+        except BaseException:
+            os.ftruncate(fd, start)
+            raise
+
+    def delete_consumed_segments(self, topic: str, partition: int) -> int:
+        """
+        Delete the segments of a partition that all consumer groups with a checkpoint in it have consumed.
+
+        The last segment is always kept, and no segment is deleted if no consumer group committed an offset.
+
+        Returns:
+            The number of deleted segments.
+        """
+        groups_dir = os.path.join(self.partition_dir(topic, partition), _GROUPS_DIR)
+        try:
+            names = os.listdir(groups_dir)
+        except FileNotFoundError:
+            return 0
+        committed = [
+            self.committed(name[:-len(_OFFSET_SUFFIX)], topic, partition)
+            for name in names if name.endswith(_OFFSET_SUFFIX)
+        ]
+        committed = [offset for offset in committed if offset is not None]
+        if not committed:
+            return 0
+        min_committed = min(committed)
+        segments = self.segments(topic, partition)
+        deleted = 0
+        for base_offset, next_base_offset in zip(segments, segments[1:]):
+            if next_base_offset > min_committed:
+                break
+            try:
+                os.remove(self.segment_path(topic, partition, base_offset))
+            except FileNotFoundError:
+                # Deleted meanwhile by another producer
+                continue
+            deleted += 1
+        return deleted
+
+    def committed(self, group_id: str, topic: str, partition: int) -> Optional[int]:
+        """
+        Get the next offset to consume from a partition by a consumer group, if the group committed one.
+        """
+        _check_name("group", group_id)
+        path = os.path.join(self.partition_dir(topic, partition), _GROUPS_DIR, f"{group_id}{_OFFSET_SUFFIX}")
+        try:
+            with open(path, encoding="ascii") as checkpoint:
+                return int(checkpoint.read())
+        except FileNotFoundError:
+            return None
+
+    def commit(self, group_id: str, topic: str, partition: int, offset: int) -> None:
+        """
+        Commit the next offset to consume from a partition by a consumer group, replacing its checkpoint atomically.
+        """
+        _check_name("group", group_id)
+        path = os.path.join(self.partition_dir(topic, partition), _GROUPS_DIR, f"{group_id}{_OFFSET_SUFFIX}")
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "w", encoding="ascii") as checkpoint:
+            checkpoint.write(str(offset))
+            if self.fsync:
+                checkpoint.flush()
+                os.fsync(checkpoint.fileno())
+        os.replace(temporary_path, path)
+
+    def claim(self, group_id: str, topic: str, partition: int):
+        """
+        Claim a partition for a consumer of a group, so that the group consumes each partition in order.
+
+        Returns:
+            A file to close once done consuming, releasing the claim, or None if another consumer of the group
+            claimed the partition.
+        """
+        _check_name("group", group_id)
+        lock_file = open(  # pylint: disable=consider-using-with
+            os.path.join(self.partition_dir(topic, partition), _GROUPS_DIR, f"{group_id}.lock"), "ab",
+        )
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+        return lock_file
+
+
+class _PartitionReader:
+    """
+    Reader of the frames of a partition, mapping one segment at a time in memory.
+    """
+
+    def __init__(self, store: LogStore, topic: str, partition: int):
+        self.store = store
+        self.topic = topic
+        self.partition = partition
+        self._base_offset = None
+        self._file = None
+        self._map = None
+
+    def close(self):
+        """
+        Release the mapped segment, if any.
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._base_offset = None
+
+    def _map_segment(self, base_offset):
+        """
+        Map the segment starting at base_offset, remapping it if its size changed since it was mapped.
+
+        Returns:
+            The size of the mapped segment.
+        """
+        if base_offset != self._base_offset:
+            self.close()
+            self._file = open(  # pylint: disable=consider-using-with
+                self.store.segment_path(self.topic, self.partition, base_offset), "rb",
+            )
+            self._base_offset = base_offset
+        size = os.fstat(self._file.fileno()).st_size
+        # Segments shrink when producers truncate an incomplete frame.
+        if self._map is None or len(self._map) != size:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if size:
+                self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+        return len(self._map) if self._map is not None else 0
+
+    def read(self, offset: int, max_records: int) -> Iterator[tuple]:
+        """
+        Read up to max_records frames from offset, without copying event data.
+
+        Yields:
+            (offset, next_offset, event_type, payload, headers, metadata) tuples, where payload is a memoryview of the
+            mapped segment, only valid until the next frame is read. All fields but the offsets are None for frames
+            that do not match their checksum, and for the unreadable end of segments given up on by producers.
+        """
+        segments = self.store.segments(self.topic, self.partition)
+        if not segments:
+            return
+        if offset < segments[0]:
+            logger.warning(
+                f"Skipping {segments[0] - offset} bytes of partition {self.partition} of topic {self.topic} deleted "
+                "before being consumed"
+            )
+            offset = segments[0]
+        index = bisect.bisect_right(segments, offset) - 1
+        read = 0
+        while read < max_records:
+            base_offset = segments[index]
+            try:
+                size = self._map_segment(base_offset)
+            except FileNotFoundError:
+                # Deleted by a producer once consumed by all consumer groups; read the remaining segments next time.
+                return
+            position = offset - base_offset
+            frame = _read_frame(self._map, position, size) if self._map is not None else None
+            if frame is None:
+                if index + 1 == len(segments):
+                    return
+                # Producers rolled over to a new segment, so this one is fully written: move on to the next one,
+                # skipping the rest of this one if producers gave up on it, e.g. because of an incomplete frame.
+                next_base_offset = segments[index + 1]
+                index += 1
+                if offset != next_base_offset:
+                    read += 1
+                    yield offset, next_base_offset, None, None, None, None
+                    offset = next_base_offset
+                continue
+            next_position, body = frame
+            next_offset = base_offset + next_position
+            read += 1
+            if body is None:
+                yield offset, next_offset, None, None, None, None
+            else:
+                event_type, payload, headers, metadata = self._decode_body(body)
+                try:
+                    yield offset, next_offset, event_type, payload, headers, metadata
+                finally:
+                    # Segments can only be unmapped once no memoryview refers to them.
+                    payload.release()
+                    body.release()
+            offset = next_offset
+
+    @staticmethod
+    def _decode_body(body):
+        """
+        Decode the fields of a frame body.
+
+        Returns:
+            (event_type, payload, headers, metadata), where payload is a memoryview of body.
+        """
+        key_length, event_type_length, headers_length, metadata_length = _BODY_HEADER.unpack_from(body)
+        position = _BODY_HEADER.size + key_length
+        event_type = str(body[position:position + event_type_length], "utf-8")
+        position += event_type_length
+        headers = json.loads(bytes(body[position:position + headers_length])) if headers_length else {}
+        position += headers_length
+        metadata = str(body[position:position + metadata_length], "utf-8")
+        return event_type, body[position + metadata_length:], headers, metadata
+
+
+@lru_cache(maxsize=None)
+def get_store() -> LogStore:
+    """
+    Get the store configured with the ``EVENT_BUS_LOG_*`` settings.
+
+    Raises:
+        ImproperlyConfigured: If EVENT_BUS_LOG_DIR is not set.
+    """
+    path = getattr(settings, "EVENT_BUS_LOG_DIR", None)
+    if not path:
+        raise ImproperlyConfigured("EVENT_BUS_LOG_DIR is required to use the file-backed event bus")
+    return LogStore(
+        path,
+        num_partitions=getattr(settings, "EVENT_BUS_LOG_PARTITIONS", DEFAULT_PARTITIONS),
+        segment_bytes=getattr(settings, "EVENT_BUS_LOG_SEGMENT_BYTES", DEFAULT_SEGMENT_BYTES),
+        fsync=getattr(settings, "EVENT_BUS_LOG_FSYNC", DEFAULT_FSYNC),
+    )
+
+
+@receiver(setting_changed)
+def _reset_state(sender, **kwargs):  # pylint: disable=unused-argument
+    """Replace the store, so that it uses the current EVENT_BUS_LOG_* settings, e.g. another directory."""
+    get_store.cache_clear()
+
+
+class LogEventBusProducer(EventBusProducer):
+    """
+    Producer appending events to the log files of a LogStore.
+    """
+
+    def __init__(self, store: Optional[LogStore] = None):
+        self.store = store or get_store()
+
+    def send(
+            self, *, signal: OpenEdxPublicSignal, topic: str, event_key_field: str, event_data: dict,
+            event_metadata: EventsMetadata
+    ) -> None:
+        self.send_batch([ProducerMessage(signal, topic, event_key_field, event_data, event_metadata)])
+
+    def send_batch(self, messages: Sequence[ProducerMessage]) -> None:
+        """
+        Serialize and append messages to their topics, writing the events of each partition at once.
+        """
+        for topic, records in get_records_by_topic(messages).items():
+            self.store.append(topic, records)
+
+
+def create_producer() -> LogEventBusProducer:
+    """
+    Create a producer for the configured store, for the EVENT_BUS_PRODUCER setting.
+    """
+    return LogEventBusProducer()
+
+
+class LogEventBusConsumer(EventBusConsumer):
+    """
+    Consumer emitting the events of a topic of a LogStore to their signals, as part of a consumer group.
+
+    Consumers of the same group, in any process, share the partitions of the topic: each partition is consumed by a
+    single consumer of the group at a time, in order. The group's checkpoint is updated after each batch of events,
+    so events may be emitted again if a consumer stops in the middle of a batch.
+    """
+
+    def __init__(
+            self, topic: str, group_id: str, *, store: Optional[LogStore] = None,
+            auto_offset_reset: str = "earliest", poll_interval: float = 0.5, max_poll_records: int = 500,
+    ):
+        """
+        Arguments:
+            topic: The topic to consume
+            group_id: The consumer group to participate in
+            store: The store holding the topic, defaulting to the configured store
+            auto_offset_reset: Where the group starts consuming partitions without checkpoint: "earliest"
+              (oldest event kept) or "latest" (events appended after the first poll)
+            poll_interval: Seconds to wait before polling partitions again once all events are consumed
+            max_poll_records: Maximum number of events consumed from a partition before moving to the next one
+        """
+        if auto_offset_reset not in AUTO_OFFSET_RESETS:
+            raise ValueError(f"auto_offset_reset should be one of {AUTO_OFFSET_RESETS}")
+        _check_name("topic", topic)
+        _check_name("group", group_id)
+        self.topic = topic
+        self.group_id = group_id
+        self.store = store or get_store()
+        self.auto_offset_reset = auto_offset_reset
+        self.poll_interval = poll_interval
+        self.max_poll_records = max_poll_records
+        self._readers = {}
+        self._stopped = threading.Event()
+
+    def consume_indefinitely(self) -> None:
+        """
+        Consume events until ``shutdown`` is called, polling partitions for new events.
+        """
+        self._stopped.clear()
+        try:
+            while not self._stopped.is_set():
+                if not self.consume_available():
+                    self._stopped.wait(self.poll_interval)
+        finally:
+            self.close()
+
+    def shutdown(self) -> None:
+        """
+        Stop ``consume_indefinitely`` once the event being processed, if any, is done.
+        """
+        self._stopped.set()
+
+    def close(self) -> None:
+        """
+        Unmap the segments being read.
+        """
+        for reader in self._readers.values():
+            reader.close()
+        self._readers.clear()
+
+    def consume_available(self) -> int:
+        """
+        Consume the events available in the partitions that no other consumer of the group is consuming.
+
+        Returns:
+            The number of events consumed.
+        """
+        consumed = 0
+        for partition in self.store.partitions(self.topic):
+            claim = self.store.claim(self.group_id, self.topic, partition)
+            if claim is None:
+                continue
+            try:
+                consumed += self._consume_partition(partition)
+            finally:
+                claim.close()
+        return consumed
+
+    def _consume_partition(self, partition):
+        """
+        Consume up to max_poll_records events of a partition claimed by this consumer.
+        """
+        offset = self.store.committed(self.group_id, self.topic, partition)
+        if offset is None:
+            start_offset, end_offset = self.store.offsets(self.topic, partition)
+            offset = start_offset if self.auto_offset_reset == "earliest" else end_offset
+            self.store.commit(self.group_id, self.topic, partition, offset)
+        if partition not in self._readers:
+            self._readers[partition] = _PartitionReader(self.store, self.topic, partition)
+
+        consumed = 0
+        next_offset = offset
+        for frame_offset, next_offset, event_type, payload, headers, metadata in (
+            self._readers[partition].read(offset, self.max_poll_records)
+        ):
+            location = f"offset {frame_offset} of partition {partition} of topic {self.topic}"
+            if event_type is None:
+                logger.error(f"Skipping corrupted event at {location}")
+            else:
+                emit_event(event_type, payload, headers, metadata, location=location)
+            consumed += 1
+            if self._stopped.is_set():
+                break
+        if next_offset != offset:
+            self.store.commit(self.group_id, self.topic, partition, next_offset)
+        return consumed
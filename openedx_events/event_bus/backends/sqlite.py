@@ -0,0 +1,603 @@
+"""
+SQLite event bus, storing events in a database in WAL mode shared by the processes of a machine.
+
+Events are durable and can be produced and consumed by any number of processes without running a broker, which
+suits developer environments, small deployments and integration tests of ``consume_events``. Select it with::
+
+    EVENT_BUS_PRODUCER = "openedx_events.event_bus.backends.sqlite.create_producer"
+    EVENT_BUS_CONSUMER = "openedx_events.event_bus.backends.sqlite.SqliteEventBusConsumer"
+    EVENT_BUS_SQLITE_PATH = "/var/lib/openedx/event-bus.sqlite3"
+
+Producers of a process hand their events to a writer thread, which inserts all events waiting to be written in a
+single transaction (group commit), so that concurrent producers share the cost of syncing the database to disk.
+
+Consumers of a group claim ranges of consecutive events of a topic, and the claims of the group expire after
+``EVENT_BUS_SQLITE_CLAIM_TIMEOUT`` seconds so that the events claimed by a consumer that crashed are consumed again.
+Events of a range are emitted in order, but ranges claimed by different consumers of a group are consumed
+concurrently: use a single consumer per group when events with the same key must be emitted in order.
+
+Idle consumers periodically delete the events of their topic that all consumer groups of the topic have consumed,
+so consumers of new groups only find the events that were not consumed yet.
+"""
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+import attr
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+from openedx_events.data import EventsMetadata
+from openedx_events.event_bus import EventBusConsumer, EventBusProducer, ProducerMessage
+from openedx_events.event_bus.backends.utils import emit_event, get_records_by_topic
+from openedx_events.tooling import OpenEdxPublicSignal
+
+logger = logging.getLogger(__name__)
+
+# .. setting_name: EVENT_BUS_SQLITE_PATH
+# .. setting_default: None
+# .. setting_description: Path of the database of the SQLite event bus, created if needed. Required to use it.
+#   Must be on a local file system, since processes share it through memory-mapped WAL index files.
+
+# .. setting_name: EVENT_BUS_SQLITE_MAX_COMMIT_EVENTS
+# .. setting_default: 1000
+# .. setting_description: Maximum number of events written by the writer thread of a process in a single
+#   transaction of the SQLite event bus. Events waiting beyond it are written in the next transaction.
+DEFAULT_MAX_COMMIT_EVENTS = 1000
+
+# .. setting_name: EVENT_BUS_SQLITE_SYNCHRONOUS
+# .. setting_default: "FULL"
+# .. setting_description: SQLite ``synchronous`` pragma of the SQLite event bus: with "FULL", each transaction
+#   is synced to disk before producers return; with "NORMAL", events survive process crashes but not
+#   necessarily power losses.
+DEFAULT_SYNCHRONOUS = "FULL"
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+# .. setting_name: EVENT_BUS_SQLITE_CLAIM_TIMEOUT
+# .. setting_default: 300
+# .. setting_description: Seconds after which the events claimed by a consumer of the SQLite event bus can be
+#   claimed again by another consumer of its group, if the consumer has not finished emitting them.
+DEFAULT_CLAIM_TIMEOUT = 300
+
+AUTO_OFFSET_RESETS = ("earliest", "latest")
+
+# Seconds without events to write after which the writer thread of a store exits, until events are sent again.
+_WRITER_IDLE_TIMEOUT = 1.0
+
+# Minimum seconds between deletions of consumed events by an idle consumer.
+_DELETE_CONSUMED_INTERVAL = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS event (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic TEXT NOT NULL,
+    event_key BLOB NOT NULL,
+    event_type TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    headers TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS event_topic_id ON event (topic, id);
+CREATE TABLE IF NOT EXISTS consumer_group (
+    topic TEXT NOT NULL,
+    group_id TEXT NOT NULL,
+    next_id INTEGER NOT NULL,
+    PRIMARY KEY (topic, group_id)
+);
+CREATE TABLE IF NOT EXISTS claim (
+    topic TEXT NOT NULL,
+    group_id TEXT NOT NULL,
+    start_id INTEGER NOT NULL,
+    end_id INTEGER NOT NULL,
+    token TEXT NOT NULL,
+    expires REAL NOT NULL,
+    PRIMARY KEY (topic, group_id, start_id)
+);
+"""
+
+_SELECT_EVENTS = "SELECT id, event_type, payload, headers, metadata FROM event WHERE topic = ?"
+
+
+# Stores of the process, whose writer thread state and connections are reset in forked children.
+_stores = weakref.WeakSet()
+
+
+def _reset_stores():
+    """
+    Reset the stores of a newly forked process, since threads and locks of the parent process are not usable.
+    """
+    for store in list(_stores):
+        store._reset()  # pylint: disable=protected-access
+
+
+os.register_at_fork(after_in_child=_reset_stores)
+
+
+@attr.s(frozen=True)
+class SqliteClaim:
+    """
+    A range of events of a topic claimed by a consumer of a group.
+
+    Attributes:
+        topic: Name of the topic
+        group_id: The consumer group
+        start_id: Id of the first event of the range
+        end_id: Id of the last event of the range
+        token: Identifier of this claim, which changes when the range is claimed again after expiring
+        rows: (id, event_type, payload, headers, metadata) tuples of the events of the range, in order
+    """
+
+    topic = attr.ib(type=str)
+    group_id = attr.ib(type=str)
+    start_id = attr.ib(type=int)
+    end_id = attr.ib(type=int)
+    token = attr.ib(type=str)
+    rows = attr.ib(type=list)
+
+
+class _PendingWrite:
+    """
+    Records waiting to be written by the writer thread, and the outcome of their transaction.
+    """
+
+    def __init__(self, topic, records):
+        self.topic = topic
+        self.records = records
+        self.done = threading.Event()
+        self.error = None
+
+
+class SqliteStore:
+    """
+    The topics, consumer groups and claims of the SQLite event bus in a database, shared by all processes.
+
+    All methods are thread-safe. Each thread uses its own connection.
+    """
+
+    def __init__(self, path: str, max_commit_events=DEFAULT_MAX_COMMIT_EVENTS, synchronous=DEFAULT_SYNCHRONOUS,
+                 claim_timeout=DEFAULT_CLAIM_TIMEOUT):
+        if max_commit_events < 1:
+            raise ValueError("max_commit_events should be a positive integer")
+        if synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"synchronous should be one of {SYNCHRONOUS_MODES}")
+        self.path = path
+        self.max_commit_events = max_commit_events
+        self.synchronous = synchronous
+        self.claim_timeout = claim_timeout
+        self._reset()
+        _stores.add(self)
+        connection = self._connect()
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+        finally:
+            connection.close()
+
+    def _reset(self):
+        """
+        Initialize the writer thread state and connections of the current process.
+        """
+        self._lock = threading.Lock()
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+        self._local = threading.local()
+        # Notified when the writer thread of this process commits events
+        self.condition = threading.Condition()
+        self.committed_writes = 0
+
+    def _connect(self):
+        """
+        Open a connection in autocommit mode, so that transactions are started explicitly.
+        """
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.execute(f"PRAGMA synchronous={self.synchronous}")
+        return connection
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """
+        The connection of the current thread.
+        """
+        if not hasattr(self._local, "connection"):
+            self._local.connection = self._connect()
+        return self._local.connection
+
+    def append(self, topic: str, records: Sequence[tuple]) -> None:
+        """
+        Append records to a topic, in order, returning once they are committed.
+
+        Arguments:
+            topic: Name of the topic
+            records: (key, event_type, payload, headers, metadata) tuples
+
+        Raises:
+            Exception: If the records could not be written, e.g. ``sqlite3.Error``.
+        """
+        if not records:
+            return
+        pending = _PendingWrite(topic, records)
+        with self._lock:
+            self._queue.put(pending)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_pending, name="sqlite-event-bus-writer", daemon=True)
+                self._writer.start()
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+
+    def _write_pending(self):
+        """
+        Write the records waiting to be written, in as few transactions as possible, until idle.
+
+        If the writer thread dies, the records waiting to be written fail with its error, and the next append starts
+        a new writer thread.
+        """
+        connection = None
+        batch = []
+        try:
+            connection = self._connect()
+            while True:
+                try:
+                    batch = [self._queue.get(timeout=_WRITER_IDLE_TIMEOUT)]
+                except queue.Empty:
+                    with self._lock:
+                        if self._queue.empty():
+                            self._writer = None
+                            return
+                    continue
+                count = len(batch[0].records)
+                while count < self.max_commit_events:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                    count += len(batch[-1].records)
+                connection = self._commit(connection, batch)
+        except BaseException as exc:
+            logger.exception("The writer thread of the SQLite event bus failed")
+            with self._lock:
+                self._writer = None
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+            for pending in batch:
+                if not pending.done.is_set():
+                    pending.error = exc
+                    pending.done.set()
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def _commit(self, connection, batch):
+        """
+        Insert the records of a batch of pending writes in a single transaction, and notify their producers.
+
+        Returns:
+            The connection to use for the next transactions, a new one if rolling back failed.
+        """
+        error = None
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany(
+                "INSERT INTO event (topic, event_key, event_type, payload, headers, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (pending.topic, key, event_type, payload, json.dumps(headers), metadata)
+                    for pending in batch
+                    for key, event_type, payload, headers, metadata in pending.records
+                ],
+            )
+            connection.execute("COMMIT")
+        except Exception as exc:  # pylint: disable=broad-except
+            error = exc
+            connection = self._rollback(connection)
+        for pending in batch:
+            pending.error = error
+            pending.done.set()
+        with self.condition:
+            self.committed_writes += 1
+            self.condition.notify_all()
+        return connection
+
+    def _rollback(self, connection):
+        """
+        Roll back the transaction of a connection, if any, replacing the connection if that fails.
+        """
+        if not connection.in_transaction:
+            return connection
+        try:
+            connection.execute("ROLLBACK")
+            return connection
+        except sqlite3.Error:
+            logger.exception("Could not roll back the transaction of the SQLite event bus, reconnecting")
+            connection.close()
+            return self._connect()
+
+    def offsets(self, topic: str):
+        """
+        Get the ids of the oldest and newest events of a topic, or None if it has no events.
+        """
+        return self.connection.execute("SELECT MIN(id), MAX(id) FROM event WHERE topic = ?", (topic,)).fetchone()
+
+    def delete_consumed(self, topic: str) -> int:
+        """
+        Delete the events of a topic that all consumer groups of the topic have claimed and released.
+
+        No event is deleted if no consumer group claimed events of the topic.
+
+        Returns:
+            The number of deleted events.
+        """
+        return self.connection.execute(
+            "DELETE FROM event WHERE topic = ? AND id < ("
+            "SELECT MIN(id) FROM ("
+            "SELECT MIN(next_id) AS id FROM consumer_group WHERE topic = ? "
+            "UNION ALL SELECT MIN(start_id) FROM claim WHERE topic = ?))",
+            (topic, topic, topic),
+        ).rowcount
+
+    def next_id(self, topic: str, group_id: str) -> Optional[int]:
+        """
+        Get the id from which a consumer group claims the next events of a topic, if the group claimed any.
+        """
+        row = self.connection.execute(
+            "SELECT next_id FROM consumer_group WHERE topic = ? AND group_id = ?", (topic, group_id),
+        ).fetchone()
+        return row[0] if row else None
+
+    def claim(self, topic: str, group_id: str, max_events: int, auto_offset_reset: str = "earliest"):
+        """
+        Claim the oldest expired claim of a consumer group, or else up to max_events events not claimed by the group.
+
+        Arguments:
+            topic: Name of the topic
+            group_id: The consumer group
+            max_events: Maximum number of events to claim
+            auto_offset_reset: Where the group starts claiming events if it never claimed any: "earliest" (oldest
+              event) or "latest" (events appended after this call)
+
+        Returns:
+            A SqliteClaim to release once its events are emitted, or None if there are no events to claim.
+        """
+        connection = self.connection
+        now = time.time()
+        token = uuid.uuid4().hex
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            expired = connection.execute(
+                "SELECT start_id, end_id FROM claim WHERE topic = ? AND group_id = ? AND expires < ? "
+                "ORDER BY start_id LIMIT 1",
+                (topic, group_id, now),
+            ).fetchone()
+            if expired:
+                start_id, end_id = expired
+                connection.execute(
+                    "UPDATE claim SET token = ?, expires = ? WHERE topic = ? AND group_id = ? AND start_id = ?",
+                    (token, now + self.claim_timeout, topic, group_id, start_id),
+                )
+                rows = connection.execute(
+                    f"{_SELECT_EVENTS} AND id BETWEEN ? AND ? ORDER BY id", (topic, start_id, end_id),
+                ).fetchall()
+                if not rows:
+                    connection.execute(
+                        "DELETE FROM claim WHERE topic = ? AND group_id = ? AND start_id = ?",
+                        (topic, group_id, start_id),
+                    )
+            else:
+                next_id = self.next_id(topic, group_id)
+                if next_id is None:
+                    next_id = 0
+                    if auto_offset_reset == "latest":
+                        next_id = (self.offsets(topic)[1] or 0) + 1
+                    connection.execute(
+                        "INSERT INTO consumer_group (topic, group_id, next_id) VALUES (?, ?, ?)",
+                        (topic, group_id, next_id),
+                    )
+                rows = connection.execute(
+                    f"{_SELECT_EVENTS} AND id >= ? ORDER BY id LIMIT ?", (topic, next_id, max_events),
+                ).fetchall()
+                if rows:
+                    start_id, end_id = rows[0][0], rows[-1][0]
+                    connection.execute(
+                        "UPDATE consumer_group SET next_id = ? WHERE topic = ? AND group_id = ?",
+                        (end_id + 1, topic, group_id),
+                    )
+                    connection.execute(
+                        "INSERT INTO claim (topic, group_id, start_id, end_id, token, expires) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (topic, group_id, start_id, end_id, token, now + self.claim_timeout),
+                    )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        if not rows:
+            return None
+        return SqliteClaim(topic, group_id, start_id, end_id, token, rows)
+
+    def release(self, claim: SqliteClaim, next_id: Optional[int] = None) -> None:
+        """
+        Release a claim once its events are emitted, or up to next_id so that others claim the remaining events.
+
+        Claims that expired and were claimed again by another consumer are left to that consumer.
+        """
+        if next_id is None or next_id > claim.end_id:
+            self.connection.execute(
+                "DELETE FROM claim WHERE topic = ? AND group_id = ? AND start_id = ? AND token = ?",
+                (claim.topic, claim.group_id, claim.start_id, claim.token),
+            )
+        else:
+            self.connection.execute(
+                "UPDATE claim SET start_id = ?, expires = 0 "
+                "WHERE topic = ? AND group_id = ? AND start_id = ? AND token = ?",
+                (next_id, claim.topic, claim.group_id, claim.start_id, claim.token),
+            )
+
+    def claims(self, topic: str, group_id: str) -> List[tuple]:
+        """
+        Get the (start_id, end_id) ranges of events claimed by a consumer group and not released yet.
+        """
+        return self.connection.execute(
+            "SELECT start_id, end_id FROM claim WHERE topic = ? AND group_id = ? ORDER BY start_id",
+            (topic, group_id),
+        ).fetchall()
+
+
+@lru_cache(maxsize=None)
+def get_store() -> SqliteStore:
+    """
+    Get the store configured with the ``EVENT_BUS_SQLITE_*`` settings.
+
+    Raises:
+        ImproperlyConfigured: If EVENT_BUS_SQLITE_PATH is not set.
+    """
+    path = getattr(settings, "EVENT_BUS_SQLITE_PATH", None)
+    if not path:
+        raise ImproperlyConfigured("EVENT_BUS_SQLITE_PATH is required to use the SQLite event bus")
+    return SqliteStore(
+        path,
+        max_commit_events=getattr(settings, "EVENT_BUS_SQLITE_MAX_COMMIT_EVENTS", DEFAULT_MAX_COMMIT_EVENTS),
+        synchronous=getattr(settings, "EVENT_BUS_SQLITE_SYNCHRONOUS", DEFAULT_SYNCHRONOUS),
+        claim_timeout=getattr(settings, "EVENT_BUS_SQLITE_CLAIM_TIMEOUT", DEFAULT_CLAIM_TIMEOUT),
+    )
+
+
+@receiver(setting_changed)
+def _reset_state(sender, **kwargs):  # pylint: disable=unused-argument
+    """Replace the store, so that it uses the current EVENT_BUS_SQLITE_* settings, e.g. another database."""
+    get_store.cache_clear()
+
+
+class SqliteEventBusProducer(EventBusProducer):
+    """
+    Producer appending events to the topics of a SqliteStore.
+    """
+
+    def __init__(self, store: Optional[SqliteStore] = None):
+        self.store = store or get_store()
+
+    def send(
+            self, *, signal: OpenEdxPublicSignal, topic: str, event_key_field: str, event_data: dict,
+            event_metadata: EventsMetadata
+    ) -> None:
+        self.send_batch([ProducerMessage(signal, topic, event_key_field, event_data, event_metadata)])
+
+    def send_batch(self, messages: Sequence[ProducerMessage]) -> None:
+        """
+        Serialize and append messages to their topics, returning once they are committed.
+        """
+        for topic, records in get_records_by_topic(messages).items():
+            self.store.append(topic, records)
+
+
+def create_producer() -> SqliteEventBusProducer:
+    """
+    Create a producer for the configured store, for the EVENT_BUS_PRODUCER setting.
+    """
+    return SqliteEventBusProducer()
+
+
+class SqliteEventBusConsumer(EventBusConsumer):
+    """
+    Consumer emitting the events of a topic of a SqliteStore to their signals, as part of a consumer group.
+
+    Consumers of the same group, in any process, share the events of the topic by claiming ranges of events. Consumers
+    of different groups each receive all events. Events are emitted at least once: those of a range claimed by a
+    consumer that stops before emitting them all are claimed again once the claim expires.
+    """
+
+    def __init__(
+            self, topic: str, group_id: str, *, store: Optional[SqliteStore] = None,
+            auto_offset_reset: str = "earliest", poll_interval: float = 0.5, max_poll_records: int = 500,
+            stop_when_idle: bool = False,
+    ):
+        """
+        Arguments:
+            topic: The topic to consume
+            group_id: The consumer group to participate in
+            store: The store holding the topic, defaulting to the configured store
+            auto_offset_reset: Where the group starts consuming if it never claimed events: "earliest" (oldest
+              event) or "latest" (events appended after the first poll)
+            poll_interval: Seconds to wait before polling the topic again once all events are consumed. Consumers
+              are woken up earlier by events sent from their own process.
+            max_poll_records: Maximum number of events claimed at once
+            stop_when_idle: Whether ``consume_indefinitely`` returns once there are no events left to consume,
+              e.g. to run ``consume_events`` in integration tests
+        """
+        if auto_offset_reset not in AUTO_OFFSET_RESETS:
+            raise ValueError(f"auto_offset_reset should be one of {AUTO_OFFSET_RESETS}")
+        self.topic = topic
+        self.group_id = group_id
+        self.store = store or get_store()
+        self.auto_offset_reset = auto_offset_reset
+        self.poll_interval = poll_interval
+        self.max_poll_records = max_poll_records
+        self.stop_when_idle = stop_when_idle
+        self._stopped = threading.Event()
+        self._deleted_consumed_at = None
+
+    def consume_indefinitely(self) -> None:
+        """
+        Consume events until ``shutdown`` is called, polling the topic for new events.
+        """
+        self._stopped.clear()
+        while not self._stopped.is_set():
+            committed_writes = self.store.committed_writes
+            if self.consume_available():
+                continue
+            if self.stop_when_idle:
+                return
+            with self.store.condition:
+                self.store.condition.wait_for(
+                    lambda: self.store.committed_writes != committed_writes or self._stopped.is_set(),
+                    timeout=self.poll_interval,
+                )
+
+    def shutdown(self) -> None:
+        """
+        Stop ``consume_indefinitely`` once the event being processed, if any, is done.
+        """
+        self._stopped.set()
+        with self.store.condition:
+            self.store.condition.notify_all()
+
+    def consume_available(self) -> int:
+        """
+        Claim and consume up to max_poll_records events not claimed by other consumers of the group.
+
+        Returns:
+            The number of events consumed.
+        """
+        claim = self.store.claim(self.topic, self.group_id, self.max_poll_records, self.auto_offset_reset)
+        if claim is None:
+            now = time.monotonic()
+            if self._deleted_consumed_at is None or now - self._deleted_consumed_at >= _DELETE_CONSUMED_INTERVAL:
+                self.store.delete_consumed(self.topic)
+                self._deleted_consumed_at = now
+            return 0
+        consumed = 0
+        try:
+            for row_id, event_type, payload, headers, metadata in claim.rows:
+                emit_event(
+                    event_type, payload, json.loads(headers), metadata,
+                    location=f"id {row_id} of topic {self.topic}",
+                )
+                consumed += 1
+                if self._stopped.is_set():
+                    break
+        finally:
+            next_id = claim.rows[consumed][0] if consumed < len(claim.rows) else None
+            self.store.release(claim, next_id)
+        return consumed
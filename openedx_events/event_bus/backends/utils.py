@@ -0,0 +1,64 @@
+"""
+Helpers shared by the event bus backends: turning producer messages into records, and records back into events.
+"""
+import logging
+from typing import Dict, List, Sequence
+
+from openedx_events.data import EventsMetadata
+from openedx_events.event_bus import ProducerMessage
+from openedx_events.event_bus.avro.deserializer import deserialize_bytes_to_event_data
+from openedx_events.event_bus.avro.serializer import serialize_event_data_to_payload
+from openedx_events.tooling import OpenEdxPublicSignal
+
+logger = logging.getLogger(__name__)
+
+
+def get_records_by_topic(messages: Sequence[ProducerMessage]) -> Dict[str, List[tuple]]:
+    """
+    Serialize messages into records grouped by topic, in order.
+
+    Events sent to several topics are serialized once per codec.
+
+    Returns:
+        A dict of topic to lists of (key, event_type, payload, headers, metadata) records, where key is the serialized
+        event key, payload the serialized event data compressed with the topic's codec if any, headers the message
+        headers (see ``encode_payload``) and metadata the event metadata serialized by ``EventsMetadata.to_json``.
+    """
+    records_by_topic = {}
+    payloads = {}
+    for message in messages:
+        # Messages of the same event share their event data dict, which stays alive during the loop.
+        payload_id = (id(message.event_data), message.signal.event_type, message.codec)
+        if payload_id not in payloads:
+            payloads[payload_id] = serialize_event_data_to_payload(message.event_data, message.signal, message.codec)
+        payload, headers = payloads[payload_id]
+        records_by_topic.setdefault(message.topic, []).append((
+            message.event_key_bytes, message.signal.event_type, payload, headers, message.event_metadata.to_json(),
+        ))
+    return records_by_topic
+
+
+def emit_event(event_type: str, payload, headers: dict, metadata: str, *, location: str) -> None:
+    """
+    Deserialize an event and send it to its signal, logging errors instead of raising them.
+
+    Arguments:
+        event_type: Type of the event
+        payload: The serialized event data, as bytes or any other buffer
+        headers: Message headers, see ``decode_payload``
+        metadata: The event metadata, as serialized by ``EventsMetadata.to_json``
+        location: Description of where the event was read from, for logs
+    """
+    try:
+        signal = OpenEdxPublicSignal.get_signal_by_type(event_type)
+        event_data = deserialize_bytes_to_event_data(payload, signal, headers=headers)
+        event_metadata = EventsMetadata.from_json(metadata)
+    except Exception:  # pylint: disable=broad-except
+        logger.exception(f"Error deserializing event at {location}, skipping it")
+        return
+    for receiver_function, response in signal.send_event_with_custom_metadata(event_metadata, **event_data):
+        if isinstance(response, Exception):
+            logger.error(
+                f"Receiver {receiver_function} of {event_type} failed on event {event_metadata.id}",
+                exc_info=response,
+            )
@@ -0,0 +1,276 @@
+"""
+Producer wrapper grouping events sent to the same topic into batches.
+
+See ``EVENT_BUS_PRODUCER_BATCHING`` for how to enable it.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Sequence, Tuple
+
+from openedx_events.data import EventsMetadata
+from openedx_events.event_bus import EventBusProducer, ProducerMessage
+from openedx_events.event_bus.avro.serializer import serialize_event_data_to_bytes
+from openedx_events.tooling import OpenEdxPublicSignal
+
+logger = logging.getLogger(__name__)
+
+# Producers not closed yet, flushed when the interpreter exits.
+_open_producers = weakref.WeakSet()
+
+
+@atexit.register
+def _close_open_producers():
+    """
+    Close the producers that were not closed yet, waiting up to their exit timeout for each of them.
+    """
+    for producer in list(_open_producers):
+        producer.close(timeout=producer.exit_timeout)
+
+
+class _Batch:
+    """
+    Messages for a single topic waiting to be sent together.
+    """
+
+    __slots__ = ("messages", "size", "deadline")
+
+    def __init__(self, deadline):
+        self.messages = []
+        self.size = 0
+        self.deadline = deadline
+
+
+class BatchingEventBusProducer(EventBusProducer):
+    """
+    Producer grouping events per topic and sending them in batches with another producer's ``send_batch``.
+
+    A batch is sent as soon as it holds ``max_batch`` events or ``max_batch_bytes`` bytes of event data, or once its
+    first event has waited for ``linger_ms`` milliseconds. Batches are sent in order from a background thread.
+
+    Pending events are lost if the process dies before sending them. They are flushed when the interpreter exits
+    normally, and events batched by a parent process are never sent by its forked children.
+    """
+
+    def __init__(self, producer: EventBusProducer, *, max_batch=500, max_batch_bytes=None, linger_ms=50,
+                 max_pending_batches=100, exit_timeout=10.0):
+        """
+        Initialize the producer.
+
+        Arguments:
+            producer: The producer actually sending batches of events
+            max_batch: Maximum number of events per batch
+            max_batch_bytes: Maximum size of the Avro-serialized event data of a batch, or None for no limit.
+              Measuring it costs an extra serialization of each event.
+            linger_ms: Maximum number of milliseconds an event waits for its batch to fill up
+            max_pending_batches: Maximum number of full batches waiting to be sent before senders are blocked
+            exit_timeout: Maximum number of seconds to wait for pending events when the interpreter exits
+        """
+        if max_batch < 1:
+            raise ValueError("max_batch should be a positive integer")
+        if max_batch_bytes is not None and max_batch_bytes < 1:
+            raise ValueError("max_batch_bytes should be a positive integer or None")
+        if linger_ms < 0:
+            raise ValueError("linger_ms should not be negative")
+        self.producer = producer
+        self.max_batch = max_batch
+        self.max_batch_bytes = max_batch_bytes
+        self.linger = linger_ms / 1000
+        self.max_pending_batches = max_pending_batches
+        self.exit_timeout = exit_timeout
+        self._reset()
+        _open_producers.add(self)
+
+    def _reset(self):
+        """
+        Start over without pending events nor background thread, e.g. in a newly forked process.
+        """
+        self._pid = os.getpid()
+        self._condition = threading.Condition()
+        # Batches still accepting events, by topic.
+        self._open_batches = {}
+        # Batches ready to be sent, in order.
+        self._ready_batches = deque()
+        self._sending = False
+        self._thread = None
+        self._closed = False
+
+    def send(
+            self, *, signal: OpenEdxPublicSignal, topic: str, event_key_field: str, event_data: dict,
+            event_metadata: EventsMetadata
+    ) -> None:
+        """
+        Add a signal event to the batch of the specified topic.
+
+        See ``EventBusProducer.send`` for arguments.
+        """
+        self.send_many(
+            signal=signal, topics=((topic, event_key_field),), event_data=event_data, event_metadata=event_metadata,
+        )
+
+    def send_many(
+            self, *, signal: OpenEdxPublicSignal, topics: Sequence[Tuple[str, str]], event_data: dict,
+            event_metadata: EventsMetadata
+    ) -> None:
+        """
+        Add a signal event to the batch of each of the specified topics.
+
+        See ``EventBusProducer.send_many`` for arguments.
+        """
+        self.send_batch([
+            ProducerMessage(
+                signal=signal, topic=topic, event_key_field=event_key_field, event_data=event_data,
+                event_metadata=event_metadata,
+            )
+            for topic, event_key_field in topics
+        ])
+
+    def send_batch(self, messages: Sequence[ProducerMessage]) -> None:
+        """
+        Add events to the batches of their topics.
+
+        See ``EventBusProducer.send_batch`` for arguments.
+        """
+        if not messages:
+            return
+        sizes = self._measure(messages)
+        if self._pid != os.getpid():
+            self._reset()
+        with self._condition:
+            if self._closed:
+                closed = True
+            else:
+                closed = False
+                for message, size in zip(messages, sizes):
+                    self._add(message, size)
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="openedx-events-batching-producer", daemon=True,
+                    )
+                    self._thread.start()
+                self._condition.notify_all()
+                self._condition.wait_for(
+                    lambda: len(self._ready_batches) < self.max_pending_batches or self._closed
+                )
+        if closed:
+            self.producer.send_batch(messages)
+
+    def _measure(self, messages):
+        """
+        Get the size of the event data of each message, serializing events sent to several topics once.
+        """
+        if self.max_batch_bytes is None:
+            return [0] * len(messages)
+        sizes_by_event = {}
+        sizes = []
+        for message in messages:
+            event_id = id(message.event_metadata)
+            if event_id not in sizes_by_event:
+                sizes_by_event[event_id] = len(serialize_event_data_to_bytes(message.event_data, message.signal))
+            sizes.append(sizes_by_event[event_id])
+        return sizes
+
+    def _add(self, message, size):
+        """
+        Add a message to the open batch of its topic, closing batches that are full. Must hold the lock.
+        """
+        batch = self._open_batches.get(message.topic)
+        if batch is not None and self.max_batch_bytes is not None and batch.size + size > self.max_batch_bytes:
+            self._ready_batches.append(self._open_batches.pop(message.topic))
+            batch = None
+        if batch is None:
+            batch = self._open_batches[message.topic] = _Batch(deadline=time.monotonic() + self.linger)
+        batch.messages.append(message)
+        batch.size += size
+        if len(batch.messages) >= self.max_batch or (
+            self.max_batch_bytes is not None and batch.size >= self.max_batch_bytes
+        ):
+            self._ready_batches.append(self._open_batches.pop(message.topic))
+
+    def _close_batches(self, now=None):
+        """
+        Mark open batches as ready, or only those whose deadline has passed if now is given. Must hold the lock.
+        """
+        for topic, batch in list(self._open_batches.items()):
+            if now is None or batch.deadline <= now:
+                self._ready_batches.append(self._open_batches.pop(topic))
+
+    def _take(self):
+        """
+        Wait for a batch to be ready and take it, or return None once closed without pending events.
+        """
+        with self._condition:
+            while True:
+                self._close_batches(now=time.monotonic())
+                if self._ready_batches:
+                    self._sending = True
+                    batch = self._ready_batches.popleft()
+                    self._condition.notify_all()
+                    return batch
+                if self._closed and not self._open_batches:
+                    return None
+                timeout = None
+                if self._open_batches:
+                    next_deadline = min(batch.deadline for batch in self._open_batches.values())
+                    timeout = max(next_deadline - time.monotonic(), 0)
+                self._condition.wait(timeout=timeout)
+
+    def _run(self):
+        """
+        Send batches until closed.
+        """
+        while (batch := self._take()) is not None:
+            try:
+                self.producer.send_batch(batch.messages)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception(
+                    f"Failed to send a batch of {len(batch.messages)} events to topic {batch.messages[0].topic} "
+                    "to the event bus"
+                )
+            finally:
+                with self._condition:
+                    self._sending = False
+                    self._condition.notify_all()
+
+    def _is_idle(self):
+        return not (self._open_batches or self._ready_batches or self._sending)
+
+    def flush(self, timeout=None) -> bool:
+        """
+        Send pending events without waiting for their batches to fill up, and wait until they have been sent.
+
+        Arguments:
+            timeout: Maximum number of seconds to wait, or None to wait as long as needed
+
+        Returns:
+            True if all pending events were sent (or failed to be sent), False if the timeout expired first.
+        """
+        if self._pid != os.getpid():
+            return True
+        with self._condition:
+            self._close_batches()
+            self._condition.notify_all()
+            return self._condition.wait_for(self._is_idle, timeout=timeout)
+
+    def close(self, timeout=None) -> bool:
+        """
+        Flush pending events and stop the background thread. Events sent afterwards are sent synchronously.
+
+        Arguments:
+            timeout: Maximum number of seconds to wait for pending events, or None to wait as long as needed
+
+        Returns:
+            True if all pending events were sent, False if the timeout expired first.
+        """
+        flushed = self.flush(timeout=timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        _open_producers.discard(self)
+        if not flushed:
+            logger.warning("Closed batching event bus producer with events still waiting to be sent")
+        return flushed
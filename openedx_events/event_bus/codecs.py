@@ -0,0 +1,150 @@
+"""
+Payload codecs: optional compression of serialized events, chosen per topic.
+
+Producers compress payloads with ``encode_payload`` and send the name of the codec in the ``CODEC_HEADER`` message
+header, so that consumers can decompress them with ``decode_payload`` (see also the ``headers`` argument of
+``deserialize_bytes_to_event_data``). Payloads smaller than ``EVENT_BUS_CODEC_MIN_SIZE`` bytes, or that would not
+shrink, are sent uncompressed and without the header.
+
+Codecs are chosen per topic with a ``codec`` key in ``EVENT_BUS_PRODUCER_CONFIG``::
+
+    "org.openedx.content_authoring.content.object.associations.changed.v1": {
+        "content-object-associations": {"event_key_field": "content_object.object_id", "enabled": True,
+                                        "codec": "lzma"},
+    }
+
+Additional codecs can be added with ``register_codec``, before the openedx_events app is ready.
+"""
+import bz2
+import gzip
+import lzma
+import zlib
+from functools import lru_cache
+from typing import Callable, Mapping, Optional, Tuple
+
+import attr
+from django.conf import settings
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+# Name of the message header holding the name of the codec compressing the payload, when there is one.
+CODEC_HEADER = "content-encoding"
+
+# .. setting_name: EVENT_BUS_CODEC_MIN_SIZE
+# .. setting_default: 1024
+# .. setting_description: Size in bytes of serialized events below which they are not compressed, even when a codec
+#   is configured for their topic. Compressing small payloads costs CPU time without saving much space.
+DEFAULT_CODEC_MIN_SIZE = 1024
+
+
+@attr.s(frozen=True)
+class PayloadCodec:
+    """
+    A compression codec for serialized events.
+
+    Attributes:
+        name: Name of the codec, used in the producer configuration and in the ``CODEC_HEADER`` header
+        compress: Function compressing bytes
+        decompress: Function decompressing bytes
+    """
+
+    name = attr.ib(type=str)
+    compress = attr.ib(type=Callable[[bytes], bytes])
+    decompress = attr.ib(type=Callable[[bytes], bytes])
+
+
+_CODECS = {}
+
+
+def register_codec(name: str, compress: Callable[[bytes], bytes], decompress: Callable[[bytes], bytes]) -> None:
+    """
+    Register a codec, replacing any codec with the same name.
+    """
+    _CODECS[name] = PayloadCodec(name=name, compress=compress, decompress=decompress)
+
+
+def get_codec(name: str) -> PayloadCodec:
+    """
+    Get a registered codec by name.
+
+    Raises:
+        ValueError: If no codec is registered under this name.
+    """
+    try:
+        return _CODECS[name]
+    except KeyError as exc:
+        raise ValueError(f"Unknown codec: '{name}', expected one of {sorted(_CODECS)}") from exc
+
+
+register_codec("deflate", lambda data: zlib.compress(data, wbits=-15), lambda data: zlib.decompress(data, wbits=-15))
+register_codec("gzip", gzip.compress, gzip.decompress)
+register_codec("bz2", bz2.compress, bz2.decompress)
+register_codec("lzma", lzma.compress, lzma.decompress)
+
+
+@lru_cache(maxsize=None)
+def _get_topic_codecs():
+    """
+    Get the codec names configured in `EVENT_BUS_PRODUCER_CONFIG`, by (event_type, topic).
+    """
+    return {
+        (event_type, topic): topic_configuration["codec"]
+        for event_type, configurations in getattr(settings, "EVENT_BUS_PRODUCER_CONFIG", {}).items()
+        for topic, topic_configuration in configurations.items()
+        if topic_configuration.get("codec")
+    }
+
+
+@lru_cache(maxsize=None)
+def _get_min_size():
+    return getattr(settings, "EVENT_BUS_CODEC_MIN_SIZE", DEFAULT_CODEC_MIN_SIZE)
+
+
+@receiver(setting_changed)
+def _reset_state(sender, **kwargs):  # pylint: disable=unused-argument
+    """Reload the codecs of topics from EVENT_BUS_PRODUCER_CONFIG, and EVENT_BUS_CODEC_MIN_SIZE."""
+    _get_topic_codecs.cache_clear()
+    _get_min_size.cache_clear()
+
+
+def get_topic_codec(event_type: str, topic: str) -> Optional[str]:
+    """
+    Get the name of the codec configured for events of a type produced to a topic, if any.
+    """
+    return _get_topic_codecs().get((event_type, topic))
+
+
+def encode_payload(payload: bytes, codec: Optional[str]) -> Tuple[bytes, Mapping[str, str]]:
+    """
+    Compress a serialized event with a codec, unless it is too small to be worth it.
+
+    Arguments:
+        payload: The serialized event
+        codec: Name of the codec, or None to leave the payload uncompressed
+
+    Returns:
+        The payload, compressed or not, and the message headers to send along with it: ``CODEC_HEADER`` when the
+        payload was compressed, nothing otherwise.
+    """
+    if codec is None or len(payload) < _get_min_size():
+        return payload, {}
+    compressed = get_codec(codec).compress(payload)
+    if len(compressed) >= len(payload):
+        return payload, {}
+    return compressed, {CODEC_HEADER: codec}
+
+
+def decode_payload(payload: bytes, headers: Optional[Mapping] = None) -> bytes:
+    """
+    Decompress a serialized event according to its message headers, as produced by ``encode_payload``.
+
+    Arguments:
+        payload: The payload, compressed or not
+        headers: The message headers. Header values may be str or UTF-8 encoded bytes.
+    """
+    codec = (headers or {}).get(CODEC_HEADER)
+    if not codec:
+        return payload
+    if isinstance(codec, bytes):
+        codec = codec.decode("utf-8")
+    return get_codec(codec).decompress(payload)
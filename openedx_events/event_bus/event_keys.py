@@ -0,0 +1,88 @@
+"""
+Event keys: the event data fields whose values order and partition events on the event bus.
+
+An event key field is a period-delimited path starting with an event data key and followed by attribute names,
+e.g. ``xblock_info.usage_key``. Paths are compiled once per signal into accessor functions, and checked against the
+attrs classes declared in the signal's ``init_data``.
+"""
+import operator
+import types
+from functools import lru_cache
+from typing import Any, Callable, Union, get_args, get_origin
+
+import attr
+
+from openedx_events.exceptions import ProducerConfigurationError
+from openedx_events.tooling import OpenEdxPublicSignal
+
+
+def _unwrap_optional(data_type):
+    """
+    Get X from Optional[X], or return data_type unchanged.
+    """
+    if get_origin(data_type) in (Union, types.UnionType):
+        not_none_types = [arg for arg in get_args(data_type) if arg is not types.NoneType]
+        if len(not_none_types) == 1:
+            return not_none_types[0]
+    return data_type
+
+
+def compile_event_key_accessor(signal: OpenEdxPublicSignal, event_key_field: str) -> Callable[[dict], Any]:
+    """
+    Compile an event key field of a signal into a function getting the event key from the event data.
+
+    Arguments:
+        signal: The OpenEdxPublicSignal the events are sent to
+        event_key_field: Period-delimited path to the field, e.g. "xblock_info.usage_key"
+
+    Returns:
+        A function taking the event data (kwargs) sent to the signal and returning the event key.
+
+    Raises:
+        ProducerConfigurationError: If the path does not lead to a field of the signal's event data.
+    """
+    data_key, *attribute_names = event_key_field.split(".")
+    if data_key not in signal.init_data:
+        raise ProducerConfigurationError(
+            event_type=signal.event_type,
+            message=(f"Invalid event_key_field '{event_key_field}': '{data_key}' is not one of the event data keys "
+                     f"{sorted(signal.init_data)}")
+        )
+    data_type = signal.init_data[data_key]
+    for attribute_name in attribute_names:
+        data_type = _unwrap_optional(data_type)
+        fields = attr.fields_dict(data_type) if attr.has(data_type) else {}
+        if attribute_name not in fields:
+            raise ProducerConfigurationError(
+                event_type=signal.event_type,
+                message=f"Invalid event_key_field '{event_key_field}': {data_type} has no field '{attribute_name}'"
+            )
+        data_type = fields[attribute_name].type
+
+    if not attribute_names:
+        return operator.itemgetter(data_key)
+    get_attributes = operator.attrgetter(".".join(attribute_names))
+
+    def get_event_key(event_data):
+        return get_attributes(event_data[data_key])
+
+    return get_event_key
+
+
+@lru_cache(maxsize=None)
+def get_event_key_accessor(signal: OpenEdxPublicSignal, event_key_field: str) -> Callable[[dict], Any]:
+    """
+    Get the compiled accessor of an event key field, see ``compile_event_key_accessor``.
+
+    Accessors are compiled once per signal and event key field, when the producer configuration is validated.
+    """
+    return compile_event_key_accessor(signal, event_key_field)
+
+
+def serialize_event_key(event_key) -> bytes:
+    """
+    Serialize an event key to bytes, e.g. to hash it to a partition.
+
+    Keys are encoded as the UTF-8 string representation of their value, which is the serialized form of opaque keys.
+    """
+    return str(event_key).encode("utf-8")
@@ -0,0 +1,279 @@
+"""
+Transactional outbox: events are saved to the database within the transaction that sent them, and relayed to the
+event bus by a separate worker.
+
+See docs/decisions/0015-outbox-pattern-and-production-modes.rst and the ``relay_outbox`` management command.
+"""
+import logging
+import time
+from typing import Sequence, Tuple
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from openedx_events.data import EventsMetadata
+from openedx_events.event_bus import EventBusProducer, ProducerMessage
+from openedx_events.event_bus.avro.deserializer import deserialize_bytes_to_event_data
+from openedx_events.event_bus.avro.serializer import serialize_event_data_to_bytes
+from openedx_events.event_bus.codecs import CODEC_HEADER, encode_payload, get_topic_codec
+from openedx_events.event_bus.event_keys import get_event_key_accessor, serialize_event_key
+from openedx_events.event_bus.partitioning import murmur2
+from openedx_events.models import OutboxEvent
+from openedx_events.tooling import OpenEdxPublicSignal
+
+logger = logging.getLogger(__name__)
+
+
+def get_key_hash(key_bytes: bytes) -> int:
+    """
+    Get the non-negative 31-bit hash of a serialized event key, stable across processes.
+
+    The hash modulo a number of partitions is the partition chosen by ``partition_for`` with the murmur2 strategy,
+    so that outbox partitions match the partitions of the local event bus backends.
+    """
+    return murmur2(key_bytes) & 0x7FFFFFFF
+
+
+def save_to_outbox(
+        *, signal: OpenEdxPublicSignal, topics: Sequence[Tuple[str, str]], event_data: dict,
+        event_metadata: EventsMetadata, using=DEFAULT_DB_ALIAS,
+) -> None:
+    """
+    Save an event to the outbox, to be published to topics once the current transaction commits.
+
+    The event data is serialized once, however many topics it is published to, and compressed with the codec
+    configured for each topic, if any.
+
+    Arguments:
+        signal: The original OpenEdxPublicSignal the event was sent to
+        topics: (topic, event_key_field) pairs, see ``EventBusProducer.send_many``
+        event_data: The event data (kwargs) sent to the signal
+        event_metadata: The CloudEvent metadata
+        using: Alias of the database holding the outbox
+    """
+    payload = serialize_event_data_to_bytes(event_data, signal)
+    metadata = event_metadata.to_json()
+    # Topics usually share a codec, if any, so compress the payload once per codec.
+    encoded_payloads = {}
+    events = []
+    for topic, event_key_field in topics:
+        codec = get_topic_codec(signal.event_type, topic)
+        if codec not in encoded_payloads:
+            encoded_payload, headers = encode_payload(payload, codec)
+            encoded_payloads[codec] = (encoded_payload, headers.get(CODEC_HEADER, ""))
+        encoded_payload, payload_codec = encoded_payloads[codec]
+        event_key = get_event_key_accessor(signal, event_key_field)(event_data)
+        events.append(OutboxEvent(
+            event_type=signal.event_type,
+            topic=topic,
+            event_key_field=event_key_field,
+            key_hash=get_key_hash(serialize_event_key(event_key)),
+            payload=encoded_payload,
+            codec=payload_codec,
+            metadata=metadata,
+        ))
+    OutboxEvent.objects.using(using).bulk_create(events)
+
+
+def get_pending_events(partitions=1, partition=0, using=DEFAULT_DB_ALIAS):
+    """
+    Get the outbox events waiting to be published in a partition of the key space, in publishing order.
+
+    Events marked as failed are left out.
+
+    Events with the same key are always in the same partition.
+
+    Arguments:
+        partitions: Number of partitions the outbox is split into
+        partition: Partition number, from 0 to partitions - 1
+        using: Alias of the database holding the outbox
+    """
+    pending_events = OutboxEvent.objects.using(using).filter(processed_at__isnull=True, failed_at__isnull=True)
+    if partitions > 1:
+        pending_events = pending_events.alias(key_partition=Mod(F("key_hash"), partitions)).filter(
+            key_partition=partition
+        )
+    return pending_events.order_by("id")
+
+
+def relay_batch(
+        producer: EventBusProducer, *, batch_size=500, partitions=1, partition=0, delete=True, max_attempts=5,
+        using=DEFAULT_DB_ALIAS,
+) -> int:
+    """
+    Publish the next batch of pending outbox events with the producer's ``send_batch``.
+
+    Events are claimed with SELECT ... FOR UPDATE SKIP LOCKED where supported, so that concurrent relays never
+    publish the same events. Events with the same key are only published in order if there is a single relay per
+    partition, since a relay may otherwise claim events after events locked by another relay.
+
+    A bad event must not block the events after it. Events that cannot be decoded are marked as failed right away.
+    If the producer fails to publish the batch, events are published one at a time: those the producer still fails
+    to publish while others succeed count a failed attempt, and are marked as failed after ``max_attempts``
+    attempts. An event failing alone in its batch is retried without counting attempts, since the event bus may as
+    well be unavailable. Events published after a failed event with the same key are then published out of order.
+
+    Arguments:
+        producer: The producer publishing events, e.g. ``get_backend_producer()``. Events are removed from the outbox
+          once ``send_batch`` returns and, if the producer has a ``flush`` method, once it returns, so producers
+          queueing events in memory must deliver them in ``flush``, and other producers in ``send_batch``.
+        batch_size: Maximum number of events to publish
+        partitions: Number of partitions the outbox is split into
+        partition: Partition of the outbox to relay, from 0 to partitions - 1
+        delete: Whether to delete published events, or only mark them as processed
+        max_attempts: Number of failed attempts after which an event is marked as failed
+        using: Alias of the database holding the outbox
+
+    Returns:
+        The number of events published, or that failed to be.
+
+    Raises:
+        Any exception raised by the producer when it fails to publish all events of the batch, e.g. because the event
+        bus is unavailable, or to flush them, in which case no event is removed from the outbox and no attempt is
+        counted.
+    """
+    with transaction.atomic(using=using):
+        events = list(
+            get_pending_events(partitions=partitions, partition=partition, using=using)
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        if not events:
+            return 0
+        messages = {}
+        # event id -> (error, whether the event can be published at all)
+        errors = {}
+        for event in events:
+            try:
+                messages[event.id] = _to_message(event)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.exception(f"Error decoding {event}, marking it as failed")
+                errors[event.id] = (exc, False)
+        published_ids = _publish(producer, messages, errors)
+        if published_ids:
+            _flush(producer)
+
+        now = timezone.now()
+        published = OutboxEvent.objects.using(using).filter(id__in=published_ids)
+        if delete:
+            published.delete()
+        else:
+            published.update(processed_at=now)
+        failed_events = [event for event in events if event.id in errors]
+        for event in failed_events:
+            error, retryable = errors[event.id]
+            event.attempts += 1
+            event.last_error = f"{type(error).__name__}: {error}"
+            if not retryable or event.attempts >= max_attempts:
+                event.failed_at = now
+                logger.error(f"Giving up on {event} after {event.attempts} failed attempts")
+        OutboxEvent.objects.using(using).bulk_update(failed_events, ["attempts", "last_error", "failed_at"])
+    return len(events)
+
+
+def _publish(producer, messages, errors):
+    """
+    Publish messages with the producer, one at a time if the producer fails to publish them at once.
+
+    Arguments:
+        producer: The producer publishing events
+        messages: Dict of event id to message
+        errors: Dict of event id to (error, whether the event can be published at all), updated with the events
+          that failed to be published
+
+    Returns:
+        The ids of the published events.
+    """
+    if not messages:
+        return []
+    try:
+        producer.send_batch(list(messages.values()))
+        return list(messages)
+    except Exception:  # pylint: disable=broad-except
+        if len(messages) == 1:
+            raise
+        logger.exception(f"Error publishing a batch of {len(messages)} outbox events, publishing them one at a time")
+    published_ids = []
+    last_error = None
+    for event_id, message in messages.items():
+        try:
+            producer.send_batch([message])
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.exception(f"Error publishing OutboxEvent {event_id}")
+            errors[event_id] = (exc, True)
+            last_error = exc
+        else:
+            published_ids.append(event_id)
+    if not published_ids:
+        # No event could be published: the event bus is likely unavailable rather than the events at fault.
+        raise last_error
+    return published_ids
+
+
+def _flush(producer):
+    """
+    Wait for the producer to deliver the events it queued in memory, if it can.
+    """
+    flush = getattr(producer, "flush", None)
+    if flush is not None:
+        flush()
+
+
+def get_purgeable_events(older_than, using=DEFAULT_DB_ALIAS):
+    """
+    Get the outbox events published before a date and kept as processed (see ``relay_batch``).
+
+    Arguments:
+        older_than: Datetime before which events were published
+        using: Alias of the database holding the outbox
+    """
+    return OutboxEvent.objects.using(using).filter(processed_at__lt=older_than)
+
+
+def purge_processed_events(older_than, *, chunk_size=1000, pause=0.0, using=DEFAULT_DB_ALIAS):
+    """
+    Delete the outbox events processed before a date, in chunks of consecutive ids.
+
+    Each chunk is deleted by its own statement, bounded by a primary key range of at most ``chunk_size`` rows, so
+    that locks are held briefly and database replicas can keep up, unlike with a single large DELETE.
+
+    Arguments:
+        older_than: Datetime before which events were published
+        chunk_size: Maximum number of events deleted by each statement
+        pause: Seconds to wait between chunks
+        using: Alias of the database holding the outbox
+
+    Yields:
+        The number of events deleted by each chunk.
+    """
+    purgeable_events = get_purgeable_events(older_than, using=using)
+    start_id = None
+    while True:
+        chunk = purgeable_events.order_by("id")
+        if start_id is not None:
+            chunk = chunk.filter(id__gt=start_id)
+        chunk_ids = list(chunk.values_list("id", flat=True)[:chunk_size])
+        if not chunk_ids:
+            return
+        if start_id is not None and pause:
+            time.sleep(pause)
+        deleted, _ = purgeable_events.filter(id__gte=chunk_ids[0], id__lte=chunk_ids[-1]).delete()
+        start_id = chunk_ids[-1]
+        yield deleted
+
+
+def _to_message(event: OutboxEvent) -> ProducerMessage:
+    """
+    Convert an outbox event back to a message for producers.
+    """
+    signal = OpenEdxPublicSignal.get_signal_by_type(event.event_type)
+    return ProducerMessage(
+        signal=signal,
+        topic=event.topic,
+        event_key_field=event.event_key_field,
+        event_data=deserialize_bytes_to_event_data(
+            event.payload, signal, headers={CODEC_HEADER: event.codec} if event.codec else None,
+        ),
+        event_metadata=EventsMetadata.from_json(event.metadata),
+    )
@@ -0,0 +1,95 @@
+"""
+Stable partitioning of events by key, so that events with the same key are handled in order by a single partition.
+
+``partition_for`` maps serialized event keys (see ``ProducerMessage.event_key_bytes``) to partitions:
+
+- ``murmur2`` (default) uses the hash function and formula of the default partitioner of Kafka clients. Since
+  ``event_key_bytes`` is the UTF-8 string of the key, not the Avro-serialized key (with schema registry framing)
+  that Kafka producers send, the partitions do not match those of Kafka topics.
+- ``consistent`` uses jump consistent hashing, which only moves about 1/n of the keys when going from n - 1 to n
+  partitions, all of them to the new partition.
+"""
+import hashlib
+import struct
+
+PARTITIONER_MURMUR2 = "murmur2"
+PARTITIONER_CONSISTENT = "consistent"
+PARTITIONERS = (PARTITIONER_MURMUR2, PARTITIONER_CONSISTENT)
+
+_UINT32 = struct.Struct("<I")
+_MURMUR2_SEED = 0x9747B28C
+_MURMUR2_M = 0x5BD1E995
+_MASK_32 = 0xFFFFFFFF
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+def murmur2(data: bytes) -> int:
+    """
+    Compute the 32-bit MurmurHash2 of data, exactly as ``org.apache.kafka.common.utils.Utils.murmur2``.
+
+    Returns:
+        The hash, as a signed 32-bit integer like in Java.
+    """
+    length = len(data)
+    h = (_MURMUR2_SEED ^ length) & _MASK_32
+    body_length = length & ~3
+    for (k,) in _UINT32.iter_unpack(data[:body_length]):
+        k = (k * _MURMUR2_M) & _MASK_32
+        k ^= k >> 24
+        k = (k * _MURMUR2_M) & _MASK_32
+        h = ((h * _MURMUR2_M) & _MASK_32) ^ k
+
+    tail = length & 3
+    if tail == 3:
+        h ^= data[body_length + 2] << 16
+    if tail >= 2:
+        h ^= data[body_length + 1] << 8
+    if tail >= 1:
+        h ^= data[body_length]
+        h = (h * _MURMUR2_M) & _MASK_32
+
+    h ^= h >> 13
+    h = (h * _MURMUR2_M) & _MASK_32
+    h ^= h >> 15
+    return h - (1 << 32) if h & 0x80000000 else h
+
+
+def jump_consistent_hash(key: int, num_buckets: int) -> int:
+    """
+    Map a 64-bit key to one of num_buckets buckets with the jump consistent hash of Lamping and Veach.
+
+    See https://arxiv.org/abs/1406.2294
+    """
+    bucket, jump = -1, 0
+    while jump < num_buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & _MASK_64
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def partition_for(key_bytes: bytes, num_partitions: int, strategy: str = PARTITIONER_MURMUR2) -> int:
+    """
+    Get the partition of a serialized event key, stable across processes and machines.
+
+    Partitions only depend on key_bytes: keys serialized differently, e.g. by Kafka producers, land elsewhere.
+
+    Arguments:
+        key_bytes: The serialized event key, e.g. ``ProducerMessage.event_key_bytes``
+        num_partitions: Number of partitions
+        strategy: One of ``PARTITIONERS``
+
+    Returns:
+        A partition number, from 0 to num_partitions - 1.
+
+    Raises:
+        ValueError: If num_partitions is not positive, or the strategy is unknown.
+    """
+    if num_partitions < 1:
+        raise ValueError(f"num_partitions should be a positive integer, got {num_partitions}")
+    if strategy == PARTITIONER_MURMUR2:
+        return (murmur2(key_bytes) & 0x7FFFFFFF) % num_partitions
+    if strategy == PARTITIONER_CONSISTENT:
+        key = int.from_bytes(hashlib.blake2b(key_bytes, digest_size=8).digest(), "little")
+        return jump_consistent_hash(key, num_partitions)
+    raise ValueError(f"Unknown partitioning strategy: '{strategy}', expected one of {PARTITIONERS}")
@@ -0,0 +1,96 @@
+"""
+Publishing modes, deciding when events sent to OpenEdxPublicSignals are published to the event bus.
+
+See docs/decisions/0015-outbox-pattern-and-production-modes.rst and the ``EVENT_BUS_PRODUCER_MODE`` setting.
+"""
+from typing import Sequence, Tuple
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from openedx_events.data import EventsMetadata
+from openedx_events.event_bus import EventBusProducer, ProducerMessage
+from openedx_events.tooling import OpenEdxPublicSignal
+
+# Publish events as soon as they are sent.
+MODE_IMMEDIATE = "immediate"
+# Publish events once the current transaction commits, or immediately if there is none.
+MODE_ON_COMMIT = "on-commit"
+# Save events to the outbox within the current transaction, for the relay_outbox management command to publish.
+MODE_OUTBOX = "outbox"
+
+PRODUCER_MODES = (MODE_IMMEDIATE, MODE_ON_COMMIT, MODE_OUTBOX)
+DEFAULT_PRODUCER_MODE = MODE_ON_COMMIT
+
+
+class _OnCommitBatch:
+    """
+    Events sent within the same transaction and savepoint, published together when the transaction commits.
+
+    A single on_commit callback is registered per batch rather than per event. Django discards the callbacks
+    registered within a savepoint when it is rolled back, so a batch only collects events sent while the
+    savepoints in ``savepoint_ids`` are active.
+    """
+
+    def __init__(self, producer, savepoint_ids):
+        self.producer = producer
+        self.savepoint_ids = savepoint_ids
+        self.messages = []
+
+    def __call__(self):
+        """Publish the events of the batch."""
+        self.producer.send_batch(self.messages)
+
+
+def publish_on_commit(
+        producer: EventBusProducer, *, signal: OpenEdxPublicSignal, topics: Sequence[Tuple[str, str]],
+        event_data: dict, event_metadata: EventsMetadata, using=DEFAULT_DB_ALIAS,
+) -> None:
+    """
+    Publish an event to topics once the current transaction commits, or immediately if there is none.
+
+    Events are discarded if the transaction, or the savepoint they were sent in, is rolled back.
+
+    Arguments:
+        producer: The producer publishing the event
+        signal: The original OpenEdxPublicSignal the event was sent to
+        topics: (topic, event_key_field) pairs, see ``EventBusProducer.send_many``
+        event_data: The event data (kwargs) sent to the signal
+        event_metadata: The CloudEvent metadata
+        using: Alias of the database whose transaction the event belongs to
+    """
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        producer.send_many(
+            signal=signal, topics=topics, event_data=event_data, event_metadata=event_metadata,
+        )
+        return
+
+    savepoint_ids = set(connection.savepoint_ids)
+    batch = connection.run_on_commit[-1][1] if connection.run_on_commit else None
+    # Only reuse the last registered batch if rolling back a savepoint would discard exactly the same events.
+    if not (
+        isinstance(batch, _OnCommitBatch) and batch.savepoint_ids == savepoint_ids and batch.producer is producer
+    ):
+        batch = _OnCommitBatch(producer, savepoint_ids)
+        connection.on_commit(batch, robust=True)
+    batch.messages.extend(
+        ProducerMessage(
+            signal=signal, topic=topic, event_key_field=event_key_field, event_data=event_data,
+            event_metadata=event_metadata,
+        )
+        for topic, event_key_field in topics
+    )
+
+
+def publish_to_outbox(
+        *, signal: OpenEdxPublicSignal, topics: Sequence[Tuple[str, str]], event_data: dict,
+        event_metadata: EventsMetadata, using=DEFAULT_DB_ALIAS,
+) -> None:
+    """
+    Save an event to the outbox within the current transaction, to be published to topics by an outbox relay.
+
+    See ``openedx_events.event_bus.outbox.save_to_outbox`` for arguments.
+    """
+    # The outbox relies on models, which cannot be imported until apps are loaded.
+    from openedx_events.event_bus.outbox import save_to_outbox  # pylint: disable=import-outside-toplevel
+    save_to_outbox(signal=signal, topics=topics, event_data=event_data, event_metadata=event_metadata, using=using)
@@ -0,0 +1,227 @@
+"""
+Tests for the asynchronous event bus producer.
+"""
+import threading
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+import pytest
+from django.test import override_settings
+
+from openedx_events.data import EventsMetadata
+from openedx_events.event_bus import EventBusProducer, ProducerMessage, get_producer
+from openedx_events.event_bus.async_producer import AsyncEventBusProducer, _close_open_producers
+from openedx_events.learning.signals import SESSION_LOGIN_COMPLETED
+
+
+class RecordingProducer(EventBusProducer):
+    """
+    Producer recording sent events, optionally waiting for a gate to open before sending events to most topics.
+    """
+
+    def __init__(self, gate=None, ungated_topics=()):
+        self.gate = gate
+        self.ungated_topics = ungated_topics
+        self.sending = threading.Event()
+        self.sent = []
+
+    def send(self, *, signal, topic, event_key_field, event_data, event_metadata):
+        self.sending.set()
+        if self.gate and topic not in self.ungated_topics:
+            self.gate.wait()
+        self.sent.append((topic, event_metadata))
+
+
+def create_producer(*args, **kwargs):
+    return RecordingProducer(*args, **kwargs)
+
+
+class TestAsyncEventBusProducer(TestCase):
+    """
+    Tests for AsyncEventBusProducer.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.gate = threading.Event()
+        self.wrapped = RecordingProducer(gate=self.gate)
+
+    def _make_producer(self, **kwargs):
+        producer = AsyncEventBusProducer(self.wrapped, **kwargs)
+        self.addCleanup(producer.close, timeout=1)
+        self.addCleanup(self.gate.set)
+        return producer
+
+    def _send(self, producer, topic="topic"):
+        metadata = EventsMetadata(event_type=SESSION_LOGIN_COMPLETED.event_type)
+        producer.send(
+            signal=SESSION_LOGIN_COMPLETED, topic=topic, event_key_field="user.id", event_data={},
+            event_metadata=metadata,
+        )
+        return topic, metadata
+
+    def test_events_are_sent_in_background(self):
+        producer = self._make_producer()
+
+        expected = [self._send(producer, topic=f"topic-{i}") for i in range(5)]
+
+        self.assertEqual(self.wrapped.sent, [])
+        self.assertFalse(producer.flush(timeout=0.01))
+        self.gate.set()
+        self.assertTrue(producer.flush(timeout=5))
+        self.assertEqual(self.wrapped.sent, expected)
+
+    def test_send_many_is_sent_at_once(self):
+        self.wrapped.send_many = Mock()
+        producer = self._make_producer()
+        metadata = EventsMetadata(event_type=SESSION_LOGIN_COMPLETED.event_type)
+
+        producer.send_many(
+            signal=SESSION_LOGIN_COMPLETED, topics=[("topic-a", "user.id"), ("topic-b", "user.id")],
+            event_data={"user": None}, event_metadata=metadata,
+        )
+        self.assertTrue(producer.flush(timeout=5))
+
+        self.wrapped.send_many.assert_called_once_with(
+            signal=SESSION_LOGIN_COMPLETED, topics=[("topic-a", "user.id"), ("topic-b", "user.id")],
+            event_data={"user": None}, event_metadata=metadata,
+        )
+
+    def test_send_batch_is_sent_at_once(self):
+        self.wrapped.send_batch = Mock()
+        producer = self._make_producer(max_queue_size=2)
+        messages = [
+            ProducerMessage(
+                signal=SESSION_LOGIN_COMPLETED, topic=f"topic-{i}", event_key_field="user.id", event_data={},
+                event_metadata=EventsMetadata(event_type=SESSION_LOGIN_COMPLETED.event_type),
+            )
+            for i in range(3)
+        ]
+
+        producer.send_batch(messages)
+        self.assertTrue(producer.flush(timeout=5))
+
+        self.wrapped.send_batch.assert_called_once_with(messages)
+
+    def test_overflow_drop_oldest(self):
+        producer = self._make_producer(max_queue_size=2, overflow="drop-oldest")
+
+        sent = [self._send(producer, topic=f"topic-{i}") for i in range(5)]
+        self.gate.set()
+        self.assertTrue(producer.flush(timeout=5))
+
+        # The first event may have been taken by the background thread before the queue overflowed.
+        self.assertEqual(self.wrapped.sent[-2:], sent[-2:])
+        self.assertEqual(producer.dropped_count, 5 - len(self.wrapped.sent))
+
+    def test_overflow_spill(self):
+        self.wrapped.ungated_topics = {"spilled"}
+        producer = self._make_producer(max_queue_size=1, overflow="spill")
+        queued = self._send(producer, topic="queued")
+
+        # Wait for the background thread to be stuck sending the first event, then fill the queue.
+        self.assertTrue(self.wrapped.sending.wait(timeout=5))
+        self._send(producer, topic="queued-too")
+        spilled = self._send(producer, topic="spilled")
+
+        self.assertEqual(self.wrapped.sent, [spilled])
+        self.gate.set()
+        self.assertTrue(producer.flush(timeout=5))
+        self.assertEqual([topic for topic, _ in self.wrapped.sent], ["spilled", "queued", "queued-too"])
+        self.assertEqual(self.wrapped.sent[1], queued)
+
+    def test_overflow_block(self):
+        producer = self._make_producer(max_queue_size=1)
+        sender = threading.Thread(target=lambda: [self._send(producer, topic=f"topic-{i}") for i in range(3)])
+
+        sender.start()
+        sender.join(timeout=0.1)
+        self.assertTrue(sender.is_alive())
+        self.gate.set()
+        sender.join(timeout=5)
+
+        self.assertFalse(sender.is_alive())
+        self.assertTrue(producer.flush(timeout=5))
+        self.assertEqual([topic for topic, _ in self.wrapped.sent], ["topic-0", "topic-1", "topic-2"])
+
+    @patch("openedx_events.event_bus.async_producer.logger")
+    def test_send_errors_are_logged(self, mock_logger):
+        self.wrapped.send = Mock(side_effect=[Exception("broker down"), None])
+        producer = self._make_producer()
+
+        self._send(producer)
+        self._send(producer)
+        self.assertTrue(producer.flush(timeout=5))
+
+        self.assertEqual(self.wrapped.send.call_count, 2)
+        mock_logger.exception.assert_called_once()
+
+    def test_send_after_close_is_synchronous(self):
+        self.gate.set()
+        producer = self._make_producer()
+        self.assertTrue(producer.close(timeout=5))
+
+        sent = self._send(producer)
+
+        self.assertEqual(self.wrapped.sent, [sent])
+
+    def test_open_producers_are_closed_at_exit(self):
+        self.gate.set()
+        producer = self._make_producer(exit_timeout=5)
+        closed = self._make_producer()
+        closed.close(timeout=5)
+        sent = self._send(producer)
+
+        with patch.object(
+            AsyncEventBusProducer, "close", autospec=True, side_effect=AsyncEventBusProducer.close,
+        ) as close:
+            _close_open_producers()
+
+        close.assert_any_call(producer, timeout=5)
+        self.assertNotIn(closed, [call.args[0] for call in close.call_args_list])
+        self.assertEqual(self.wrapped.sent, [sent])
+
+    def test_invalid_options(self):
+        with pytest.raises(ValueError, match="Unknown overflow policy"):
+            AsyncEventBusProducer(self.wrapped, overflow="explode")
+        with pytest.raises(ValueError, match="max_queue_size"):
+            AsyncEventBusProducer(self.wrapped, max_queue_size=0)
+
+
+class TestGetAsyncProducer(TestCase):
+    """
+    Tests for loading the asynchronous producer from settings.
+    """
+
+    @override_settings(
+        EVENT_BUS_PRODUCER="openedx_events.event_bus.tests.test_async_producer.create_producer",
+        EVENT_BUS_PRODUCER_ASYNC={"max_queue_size": 5, "overflow": "spill"},
+    )
+    def test_producer_is_wrapped(self):
+        producer = get_producer()
+
+        self.assertIsInstance(producer, AsyncEventBusProducer)
+        # This module may be imported under another name by the test runner, compare class names only.
+        self.assertEqual(type(producer.producer).__name__, "RecordingProducer")
+        self.assertEqual((producer.max_queue_size, producer.overflow), (5, "spill"))
+
+    def test_producer_is_closed_when_settings_change(self):
+        with override_settings(
+            EVENT_BUS_PRODUCER="openedx_events.event_bus.tests.test_async_producer.create_producer",
+            EVENT_BUS_PRODUCER_ASYNC={},
+            EVENT_BUS_PRODUCER_BATCHING={"linger_ms": 60000},
+        ):
+            producer = get_producer()
+            metadata = EventsMetadata(event_type=SESSION_LOGIN_COMPLETED.event_type)
+            producer.send(
+                signal=SESSION_LOGIN_COMPLETED, topic="topic", event_key_field="user.id", event_data={},
+                event_metadata=metadata,
+            )
+
+        # The queued and batched event was sent before the wrappers were dropped.
+        self.assertEqual(producer.producer.producer.sent, [("topic", metadata)])
+        self.assertEqual(get_producer.cache_info().currsize, 0)
+
+    @override_settings(EVENT_BUS_PRODUCER="openedx_events.event_bus.tests.test_async_producer.create_producer")
+    def test_producer_is_not_wrapped_by_default(self):
+        self.assertEqual(type(get_producer()).__name__, "RecordingProducer")
@@ -0,0 +1,170 @@
+"""
+Tests for the batching event bus producer.
+"""
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+from django.test import override_settings
+
+from openedx_events.content_authoring.data import XBlockData
+from openedx_events.content_authoring.signals import XBLOCK_PUBLISHED
+from openedx_events.event_bus import EventBusProducer, ProducerMessage, get_producer
+from openedx_events.event_bus.async_producer import AsyncEventBusProducer
+from openedx_events.event_bus.avro.serializer import serialize_event_data_to_bytes
+from openedx_events.event_bus.batching_producer import BatchingEventBusProducer, _close_open_producers
+
+
+class BatchRecordingProducer(EventBusProducer):
+    """
+    Producer recording the topics and event ids of the batches it sends.
+    """
+
+    def __init__(self):
+        self.batches = []
+        self.sent = threading.Event()
+
+    def send(self, *, signal, topic, event_key_field, event_data, event_metadata):
+        self.send_batch([ProducerMessage(signal, topic, event_key_field, event_data, event_metadata)])
+
+    def send_batch(self, messages):
+        self.batches.append([(message.topic, message.event_metadata.id) for message in messages])
+        self.sent.set()
+
+
+def create_producer():
+    return BatchRecordingProducer()
+
+
+class TestBatchingEventBusProducer(TestCase):
+    """
+    Tests for BatchingEventBusProducer.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.wrapped = BatchRecordingProducer()
+        self.event_data = {"xblock_info": XBlockData(
+            usage_key="block-v1:edx+DemoX+Demo_course+type@video+block@UaEBjyMjcLW65gaTXggB93WmvoxGAJa0JeHRrDThk",
+            block_type="video",
+        )}
+
+    def _make_producer(self, **kwargs):
+        producer = BatchingEventBusProducer(self.wrapped, **kwargs)
+        self.addCleanup(producer.close, timeout=1)
+        return producer
+
+    def _send(self, producer, topics=("topic",)):
+        metadata = XBLOCK_PUBLISHED.generate_signal_metadata()
+        producer.send_many(
+            signal=XBLOCK_PUBLISHED, topics=[(topic, "xblock_info.usage_key") for topic in topics],
+            event_data=self.event_data, event_metadata=metadata,
+        )
+        return metadata.id
+
+    def test_full_batches_are_sent(self):
+        producer = self._make_producer(max_batch=3, linger_ms=60000)
+
+        ids = [self._send(producer, topics=("topic-a", "topic-b")) for _ in range(3)]
+
+        self.assertTrue(self.wrapped.sent.wait(timeout=5))
+        self.assertTrue(producer.flush(timeout=5))
+        self.assertEqual(self.wrapped.batches, [
+            [("topic-a", event_id) for event_id in ids],
+            [("topic-b", event_id) for event_id in ids],
+        ])
+
+    def test_batches_are_sent_after_linger(self):
+        producer = self._make_producer(max_batch=100, linger_ms=10)
+
+        first_id = self._send(producer)
+
+        self.assertTrue(self.wrapped.sent.wait(timeout=5))
+        self.assertEqual(self.wrapped.batches, [[("topic", first_id)]])
+
+    def test_flush_sends_partial_batches(self):
+        producer = self._make_producer(max_batch=100, linger_ms=60000)
+
+        ids = [self._send(producer) for _ in range(5)]
+
+        self.assertEqual(self.wrapped.batches, [])
+        self.assertTrue(producer.flush(timeout=5))
+        self.assertEqual(self.wrapped.batches, [[("topic", event_id) for event_id in ids]])
+
+    def test_max_batch_bytes(self):
+        event_size = len(serialize_event_data_to_bytes(self.event_data, XBLOCK_PUBLISHED))
+        producer = self._make_producer(max_batch=100, max_batch_bytes=2 * event_size + 1, linger_ms=60000)
+
+        ids = [self._send(producer) for _ in range(5)]
+
+        self.assertTrue(producer.flush(timeout=5))
+        self.assertEqual([len(batch) for batch in self.wrapped.batches], [2, 2, 1])
+        self.assertEqual(sum(self.wrapped.batches, []), [("topic", event_id) for event_id in ids])
+
+    @patch("openedx_events.event_bus.batching_producer.logger")
+    def test_send_errors_are_logged(self, mock_logger):
+        with patch.object(self.wrapped, "send_batch", side_effect=Exception("broker down")):
+            producer = self._make_producer(linger_ms=0)
+            self._send(producer)
+            self.assertTrue(producer.flush(timeout=5))
+
+        mock_logger.exception.assert_called_once()
+
+    def test_send_after_close_is_synchronous(self):
+        producer = self._make_producer()
+        self.assertTrue(producer.close(timeout=5))
+
+        event_id = self._send(producer)
+
+        self.assertEqual(self.wrapped.batches, [[("topic", event_id)]])
+
+    def test_open_producers_are_closed_at_exit(self):
+        producer = self._make_producer(linger_ms=60000, exit_timeout=5)
+        closed = self._make_producer()
+        closed.close(timeout=5)
+        event_id = self._send(producer)
+
+        with patch.object(
+            BatchingEventBusProducer, "close", autospec=True, side_effect=BatchingEventBusProducer.close,
+        ) as close:
+            _close_open_producers()
+
+        close.assert_any_call(producer, timeout=5)
+        self.assertNotIn(closed, [call.args[0] for call in close.call_args_list])
+        self.assertEqual(self.wrapped.batches, [[("topic", event_id)]])
+
+    def test_invalid_options(self):
+        with pytest.raises(ValueError, match="max_batch should"):
+            BatchingEventBusProducer(self.wrapped, max_batch=0)
+        with pytest.raises(ValueError, match="max_batch_bytes"):
+            BatchingEventBusProducer(self.wrapped, max_batch_bytes=0)
+        with pytest.raises(ValueError, match="linger_ms"):
+            BatchingEventBusProducer(self.wrapped, linger_ms=-1)
+
+
+class TestGetBatchingProducer(TestCase):
+    """
+    Tests for loading the batching producer from settings.
+    """
+
+    @override_settings(
+        EVENT_BUS_PRODUCER="openedx_events.event_bus.tests.test_batching_producer.create_producer",
+        EVENT_BUS_PRODUCER_BATCHING={"max_batch": 10, "linger_ms": 5},
+    )
+    def test_producer_is_wrapped(self):
+        producer = get_producer()
+
+        self.assertIsInstance(producer, BatchingEventBusProducer)
+        self.assertEqual((producer.max_batch, producer.linger), (10, 0.005))
+
+    @override_settings(
+        EVENT_BUS_PRODUCER="openedx_events.event_bus.tests.test_batching_producer.create_producer",
+        EVENT_BUS_PRODUCER_BATCHING={},
+        EVENT_BUS_PRODUCER_ASYNC={},
+    )
+    def test_async_producer_queues_before_batching(self):
+        producer = get_producer()
+
+        self.assertIsInstance(producer, AsyncEventBusProducer)
+        self.assertIsInstance(producer.producer, BatchingEventBusProducer)
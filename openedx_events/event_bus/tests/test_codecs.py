@@ -0,0 +1,104 @@
+"""
+Tests for payload compression codecs.
+"""
+import zlib
+from unittest import TestCase
+
+import ddt
+import pytest
+from django.test import override_settings
+
+from openedx_events.content_authoring.data import ContentObjectChangedData
+from openedx_events.content_authoring.signals import CONTENT_OBJECT_ASSOCIATIONS_CHANGED
+from openedx_events.event_bus import ProducerMessage
+from openedx_events.event_bus.avro.deserializer import deserialize_bytes_to_event_data
+from openedx_events.event_bus.avro.serializer import serialize_event_data_to_bytes, serialize_event_data_to_payload
+from openedx_events.event_bus.codecs import (
+    _CODECS,
+    CODEC_HEADER,
+    decode_payload,
+    encode_payload,
+    get_codec,
+    register_codec,
+)
+
+LARGE_PAYLOAD = b"tags,collections," * 200
+
+
+@ddt.ddt
+class TestCodecs(TestCase):
+    """
+    Tests for encoding and decoding payloads.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.event_data = {"content_object": ContentObjectChangedData(
+            object_id="block-v1:SampleTaxonomyOrg2+STC1+2023_1+type@vertical+block@f8de78f0897049ce997777a3a31b6ea0",
+            changes=["tags", "collections"] * 200,
+        )}
+
+    @ddt.data("deflate", "gzip", "bz2", "lzma")
+    def test_round_trip(self, codec):
+        encoded, headers = encode_payload(LARGE_PAYLOAD, codec)
+
+        self.assertEqual(headers, {CODEC_HEADER: codec})
+        self.assertLess(len(encoded), len(LARGE_PAYLOAD))
+        self.assertEqual(decode_payload(encoded, headers), LARGE_PAYLOAD)
+        self.assertEqual(decode_payload(encoded, {CODEC_HEADER: codec.encode()}), LARGE_PAYLOAD)
+
+    def test_payloads_left_uncompressed(self):
+        self.assertEqual(encode_payload(LARGE_PAYLOAD, None), (LARGE_PAYLOAD, {}))
+        self.assertEqual(encode_payload(b"small", "lzma"), (b"small", {}))
+        with override_settings(EVENT_BUS_CODEC_MIN_SIZE=0):
+            # lzma output is larger than tiny inputs.
+            self.assertEqual(encode_payload(b"small", "lzma"), (b"small", {}))
+        with override_settings(EVENT_BUS_CODEC_MIN_SIZE=len(LARGE_PAYLOAD) + 1):
+            self.assertEqual(encode_payload(LARGE_PAYLOAD, "lzma"), (LARGE_PAYLOAD, {}))
+        self.assertEqual(decode_payload(b"small"), b"small")
+
+    def test_unknown_codec(self):
+        with pytest.raises(ValueError, match="Unknown codec: 'zstd'"):
+            encode_payload(LARGE_PAYLOAD, "zstd")
+        with pytest.raises(ValueError, match="Unknown codec: 'zstd'"):
+            decode_payload(LARGE_PAYLOAD, {CODEC_HEADER: "zstd"})
+
+    def test_register_codec(self):
+        self.addCleanup(_CODECS.pop, "zlib")
+        register_codec("zlib", zlib.compress, zlib.decompress)
+
+        encoded, headers = encode_payload(LARGE_PAYLOAD, "zlib")
+
+        self.assertEqual(get_codec("zlib").name, "zlib")
+        self.assertEqual(headers, {CODEC_HEADER: "zlib"})
+        self.assertEqual(decode_payload(encoded, headers), LARGE_PAYLOAD)
+
+    def test_serialized_events_round_trip(self):
+        payload, headers = serialize_event_data_to_payload(self.event_data, CONTENT_OBJECT_ASSOCIATIONS_CHANGED, "bz2")
+
+        self.assertEqual(headers, {CODEC_HEADER: "bz2"})
+        self.assertLess(
+            len(payload), len(serialize_event_data_to_bytes(self.event_data, CONTENT_OBJECT_ASSOCIATIONS_CHANGED)) / 4
+        )
+        self.assertEqual(
+            deserialize_bytes_to_event_data(payload, CONTENT_OBJECT_ASSOCIATIONS_CHANGED, headers=headers),
+            self.event_data,
+        )
+
+    @override_settings(EVENT_BUS_PRODUCER_CONFIG={
+        "org.openedx.content_authoring.content.object.associations.changed.v1": {
+            "compressed": {"event_key_field": "content_object.object_id", "enabled": True, "codec": "lzma"},
+            "uncompressed": {"event_key_field": "content_object.object_id", "enabled": True},
+        },
+    })
+    def test_producer_message_codec(self):
+        metadata = CONTENT_OBJECT_ASSOCIATIONS_CHANGED.generate_signal_metadata()
+
+        def make_message(topic):
+            return ProducerMessage(
+                signal=CONTENT_OBJECT_ASSOCIATIONS_CHANGED, topic=topic, event_key_field="content_object.object_id",
+                event_data=self.event_data, event_metadata=metadata,
+            )
+
+        self.assertEqual(make_message("compressed").codec, "lzma")
+        self.assertIsNone(make_message("uncompressed").codec)
@@ -0,0 +1,63 @@
+"""
+Tests for compiled event key accessors.
+"""
+from unittest import TestCase
+
+import pytest
+from opaque_keys.edx.keys import UsageKey
+
+from openedx_events.content_authoring.data import XBlockData
+from openedx_events.content_authoring.signals import XBLOCK_PUBLISHED
+from openedx_events.event_bus import ProducerMessage
+from openedx_events.event_bus.event_keys import compile_event_key_accessor, get_event_key_accessor, serialize_event_key
+from openedx_events.event_bus.partitioning import partition_for
+from openedx_events.exceptions import ProducerConfigurationError
+
+
+class TestEventKeyAccessors(TestCase):
+    """
+    Tests for compiling event key fields into accessors.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.usage_key = UsageKey.from_string(
+            "block-v1:edx+DemoX+Demo_course+type@video+block@UaEBjyMjcLW65gaTXggB93WmvoxGAJa0JeHRrDThk"
+        )
+        self.xblock_info = XBlockData(usage_key=self.usage_key, block_type="video")
+        self.event_data = {"xblock_info": self.xblock_info}
+
+    def test_accessors(self):
+        self.assertEqual(
+            compile_event_key_accessor(XBLOCK_PUBLISHED, "xblock_info.usage_key")(self.event_data), self.usage_key
+        )
+        get_block_type = compile_event_key_accessor(XBLOCK_PUBLISHED, "xblock_info.block_type")
+        self.assertEqual(get_block_type(self.event_data), "video")
+        self.assertEqual(compile_event_key_accessor(XBLOCK_PUBLISHED, "xblock_info")(self.event_data), self.xblock_info)
+
+    def test_invalid_paths(self):
+        with pytest.raises(ProducerConfigurationError, match="'block_info' is not one of the event data keys"):
+            compile_event_key_accessor(XBLOCK_PUBLISHED, "block_info.usage_key")
+        with pytest.raises(ProducerConfigurationError, match="has no field 'block_key'"):
+            compile_event_key_accessor(XBLOCK_PUBLISHED, "xblock_info.block_key")
+        # Opaque keys are not attrs classes, so their attributes cannot be checked.
+        with pytest.raises(ProducerConfigurationError, match="has no field 'course_key'"):
+            compile_event_key_accessor(XBLOCK_PUBLISHED, "xblock_info.usage_key.course_key")
+
+    def test_accessors_are_cached(self):
+        self.assertIs(
+            get_event_key_accessor(XBLOCK_PUBLISHED, "xblock_info.usage_key"),
+            get_event_key_accessor(XBLOCK_PUBLISHED, "xblock_info.usage_key"),
+        )
+
+    def test_producer_message_event_key(self):
+        message = ProducerMessage(
+            signal=XBLOCK_PUBLISHED, topic="topic", event_key_field="xblock_info.usage_key",
+            event_data=self.event_data, event_metadata=XBLOCK_PUBLISHED.generate_signal_metadata(),
+        )
+
+        self.assertEqual(message.event_key, self.usage_key)
+        self.assertEqual(message.event_key_bytes, serialize_event_key(self.usage_key))
+        self.assertEqual(message.event_key_bytes, str(self.usage_key).encode("utf-8"))
+        self.assertEqual(message.partition(4), partition_for(message.event_key_bytes, 4))
+        self.assertEqual(message.partition(4, "consistent"), partition_for(message.event_key_bytes, 4, "consistent"))
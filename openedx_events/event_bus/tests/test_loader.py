@@ -13,7 +13,14 @@ import pytest
 from django.test import override_settings
 
 from openedx_events.data import EventsMetadata
-from openedx_events.event_bus import _try_load, get_producer, make_single_consumer, merge_producer_configs
+from openedx_events.event_bus import (
+    EventBusProducer,
+    ProducerMessage,
+    _try_load,
+    get_producer,
+    make_single_consumer,
+    merge_producer_configs,
+)
 from openedx_events.learning.signals import SESSION_LOGIN_COMPLETED
 
 
@@ -129,6 +136,58 @@ class TestProducer(TestCase):
                 event_key_field='user.id', event_data={},
                 event_metadata=EventsMetadata(event_type='eh')
             ) is None
+            assert producer.send_many(
+                signal=SESSION_LOGIN_COMPLETED, topics=[('user-logins', 'user.id')], event_data={},
+                event_metadata=EventsMetadata(event_type='eh')
+            ) is None
+
+    def test_send_many_defaults_to_send(self):
+        """
+        Test that send_many sends the event to each topic with send, unless overridden.
+        """
+        sent = []
+
+        class RecordingProducer(EventBusProducer):
+            def send(self, **kwargs):
+                sent.append(kwargs)
+
+        metadata = EventsMetadata(event_type='eh')
+        RecordingProducer().send_many(
+            signal=SESSION_LOGIN_COMPLETED, topics=[('topic-a', 'user.id'), ('topic-b', 'user.pii.email')],
+            event_data={'user': None}, event_metadata=metadata,
+        )
+
+        assert sent == [
+            {
+                'signal': SESSION_LOGIN_COMPLETED, 'topic': 'topic-a', 'event_key_field': 'user.id',
+                'event_data': {'user': None}, 'event_metadata': metadata,
+            },
+            {
+                'signal': SESSION_LOGIN_COMPLETED, 'topic': 'topic-b', 'event_key_field': 'user.pii.email',
+                'event_data': {'user': None}, 'event_metadata': metadata,
+            },
+        ]
+
+    def test_send_batch_defaults_to_send(self):
+        """
+        Test that send_batch sends each message with send, unless overridden.
+        """
+        sent = []
+
+        class RecordingProducer(EventBusProducer):
+            def send(self, **kwargs):
+                sent.append((kwargs['topic'], kwargs['event_metadata']))
+
+        messages = [
+            ProducerMessage(
+                signal=SESSION_LOGIN_COMPLETED, topic=topic, event_key_field='user.id', event_data={},
+                event_metadata=EventsMetadata(event_type='eh'),
+            )
+            for topic in ('topic-a', 'topic-b', 'topic-a')
+        ]
+        RecordingProducer().send_batch(messages)
+
+        assert sent == [(message.topic, message.event_metadata) for message in messages]
 
 
 class TestConsumer(TestCase):
@@ -216,3 +275,47 @@ class TestSettings(TestCase):
                 'topic_c': {'event_key_field': 'field', 'enabled': True},
             }
         })
+
+    def test_merge_configs_with_mode(self):
+        overrides = {
+            'event_type_0': {
+                'topic_a': {'mode': 'immediate'},
+            },
+            'event_type_1': {
+                'topic_c': {'enabled': False},
+            }
+        }
+        result = merge_producer_configs({**self.base_config, 'event_type_1': {
+            'topic_c': {'event_key_field': 'field', 'enabled': True, 'mode': 'on-commit'},
+        }}, overrides)
+        self.assertDictEqual(result, {
+            'event_type_0': {
+                'topic_a': {'event_key_field': 'field', 'enabled': True, 'mode': 'immediate'},
+                'topic_b': {'event_key_field': 'field', 'enabled': True}
+            },
+            'event_type_1': {
+                'topic_c': {'event_key_field': 'field', 'enabled': False, 'mode': 'on-commit'},
+            }
+        })
+
+    def test_merge_configs_with_codec(self):
+        overrides = {
+            'event_type_0': {
+                'topic_a': {'codec': 'gzip'},
+            },
+            'event_type_1': {
+                'topic_c': {'enabled': False},
+            }
+        }
+        result = merge_producer_configs({**self.base_config, 'event_type_1': {
+            'topic_c': {'event_key_field': 'field', 'enabled': True, 'codec': 'lzma'},
+        }}, overrides)
+        self.assertDictEqual(result, {
+            'event_type_0': {
+                'topic_a': {'event_key_field': 'field', 'enabled': True, 'codec': 'gzip'},
+                'topic_b': {'event_key_field': 'field', 'enabled': True}
+            },
+            'event_type_1': {
+                'topic_c': {'event_key_field': 'field', 'enabled': False, 'codec': 'lzma'},
+            }
+        })
@@ -0,0 +1,156 @@
+"""
+Tests for the in-memory event bus.
+"""
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+from django.test import override_settings
+
+from openedx_events.content_authoring.signals import XBLOCK_PUBLISHED
+from openedx_events.event_bus import get_producer, make_single_consumer
+from openedx_events.event_bus.backends.memory import (
+    MemoryBroker,
+    MemoryEventBusConsumer,
+    MemoryEventBusProducer,
+    get_broker,
+)
+from openedx_events.tests.utils import ReceiveEventsMixin, send_events
+
+
+class TestMemoryEventBus(ReceiveEventsMixin, TestCase):
+    """
+    Tests for producing and consuming events with the in-memory event bus.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.broker = MemoryBroker(num_partitions=4)
+        self.producer = MemoryEventBusProducer(self.broker)
+
+    def _send(self, block_id):
+        [event_id] = send_events(self.producer, [block_id])
+        return event_id
+
+    def _make_consumer(self, group_id="group", **kwargs):
+        return MemoryEventBusConsumer("topic", group_id, broker=self.broker, **kwargs)
+
+    def test_events_are_emitted_to_their_signal(self):
+        event_id = self._send("video1")
+
+        self.assertEqual(self._make_consumer().consume_available(), 1)
+
+        self.assertEqual(self.received, [("video1", event_id, True)])
+
+    def test_events_with_the_same_key_are_consumed_in_order(self):
+        sent = [(f"video{i % 5}", self._send(f"video{i % 5}")) for i in range(20)]
+
+        self.assertEqual(self._make_consumer().consume_available(), 20)
+
+        for block_id in {block_id for block_id, _ in sent}:
+            self.assertEqual(
+                [event_id for received_block_id, event_id, _ in self.received if received_block_id == block_id],
+                [event_id for sent_block_id, event_id in sent if sent_block_id == block_id],
+            )
+        self.assertGreater(len({partition for partition in range(4) if self.broker.offsets("topic", partition)[1]}), 1)
+
+    def test_committed_offsets(self):
+        consumer = self._make_consumer()
+        self._send("video1")
+        consumer.consume_available()
+
+        second_id = self._send("video2")
+        self.assertEqual(self._make_consumer().consume_available(), 1)
+
+        self.assertEqual(self.received[-1][1], second_id)
+        self.assertEqual(consumer.consume_available(), 0)
+
+    def test_consumer_groups(self):
+        self._send("video1")
+
+        self.assertEqual(self._make_consumer("group-a").consume_available(), 1)
+        self.assertEqual(self._make_consumer("group-b").consume_available(), 1)
+        self.assertEqual(self._make_consumer("group-c", auto_offset_reset="latest").consume_available(), 0)
+
+    def test_claimed_partitions_are_skipped(self):
+        for i in range(20):
+            self._send(f"video{i}")
+        claim = self.broker.claim("group", "topic", 0)
+        partition_size = self.broker.offsets("topic", 0)[1]
+
+        self.assertIsNone(self.broker.claim("group", "topic", 0))
+        self.assertEqual(self._make_consumer().consume_available(), 20 - partition_size)
+        claim.release()
+        self.assertEqual(self._make_consumer().consume_available(), partition_size)
+
+    @patch("openedx_events.event_bus.backends.memory.logger")
+    def test_retention(self, mock_logger):
+        self.broker = MemoryBroker(num_partitions=1, retention=8)
+        self.producer = MemoryEventBusProducer(self.broker)
+        sent = [self._send(f"video{i}") for i in range(2)]
+        self._make_consumer().consume_available()
+        sent += [self._send(f"video{i}") for i in range(2, 20)]
+
+        self._make_consumer().consume_available()
+
+        self.assertEqual(self.broker.offsets("topic", 0), (12, 20))
+        self.assertEqual([event_id for _, event_id, _ in self.received], sent[:2] + sent[12:])
+        mock_logger.warning.assert_called_once()
+
+    @patch("openedx_events.event_bus.backends.utils.logger")
+    def test_errors_are_logged(self, mock_logger):
+        self.broker.append("topic", [(b"key", XBLOCK_PUBLISHED.event_type, b"invalid", {}, "{}")])
+
+        def failing_receiver(**kwargs):
+            raise Exception("receiver failed")  # pylint: disable=broad-exception-raised
+
+        XBLOCK_PUBLISHED.connect(failing_receiver)
+        self.addCleanup(XBLOCK_PUBLISHED.disconnect, failing_receiver)
+        self._send("video1")
+
+        self.assertEqual(self._make_consumer().consume_available(), 2)
+
+        mock_logger.exception.assert_called_once()
+        mock_logger.error.assert_called_once()
+        self.assertEqual(len(self.received), 1)
+
+    def test_consume_indefinitely(self):
+        consumer = self._make_consumer(poll_timeout=5)
+        thread = threading.Thread(target=consumer.consume_indefinitely)
+        thread.start()
+
+        event_id = self._send("video1")
+        self.event_received.wait(timeout=5)
+        consumer.shutdown()
+        thread.join(timeout=5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(self.received, [("video1", event_id, True)])
+
+    def test_invalid_options(self):
+        with pytest.raises(ValueError, match="num_partitions"):
+            MemoryBroker(num_partitions=0)
+        with pytest.raises(ValueError, match="auto_offset_reset"):
+            self._make_consumer(auto_offset_reset="middle")
+
+
+class TestMemoryEventBusSettings(TestCase):
+    """
+    Tests for selecting the in-memory event bus with settings.
+    """
+
+    @override_settings(
+        EVENT_BUS_PRODUCER="openedx_events.event_bus.backends.memory.create_producer",
+        EVENT_BUS_CONSUMER="openedx_events.event_bus.backends.memory.MemoryEventBusConsumer",
+        EVENT_BUS_MEMORY_PARTITIONS=3,
+    )
+    def test_loaded_from_settings(self):
+        producer = get_producer()
+        consumer = make_single_consumer(topic="topic", group_id="group")
+
+        self.assertIsInstance(producer, MemoryEventBusProducer)
+        self.assertIsInstance(consumer, MemoryEventBusConsumer)
+        self.assertIs(producer.broker, get_broker())
+        self.assertIs(consumer.broker, get_broker())
+        self.assertEqual(get_broker().num_partitions, 3)
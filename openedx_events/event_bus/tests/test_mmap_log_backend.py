@@ -0,0 +1,280 @@
+"""
+Tests for the file-backed event bus.
+"""
+import errno
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+
+from openedx_events.event_bus import get_producer, make_single_consumer
+from openedx_events.event_bus.backends.mmap_log import LogEventBusConsumer, LogEventBusProducer, LogStore, get_store
+from openedx_events.tests.utils import ReceiveEventsMixin, send_events
+
+
+class TestLogEventBus(ReceiveEventsMixin, TestCase):
+    """
+    Tests for producing and consuming events with the file-backed event bus.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.store = LogStore(self.path, num_partitions=2)
+        self.producer = LogEventBusProducer(self.store)
+
+    def _make_consumer(self, group_id="group", store=None, **kwargs):
+        consumer = LogEventBusConsumer("topic", group_id, store=store or self.store, **kwargs)
+        self.addCleanup(consumer.close)
+        return consumer
+
+    def test_events_are_emitted_to_their_signal(self):
+        [event_id] = send_events(self.producer, ["video1"])
+
+        self.assertEqual(self._make_consumer().consume_available(), 1)
+
+        self.assertEqual(self.received, [("video1", event_id, True)])
+
+    def test_segments_roll_over(self):
+        self.store = LogStore(self.path, num_partitions=1, segment_bytes=1000)
+        self.producer = LogEventBusProducer(self.store)
+        sent = send_events(self.producer, [f"video{i}" for i in range(30)])
+        consumer = self._make_consumer()
+
+        self.assertGreater(len(self.store.segments("topic", 0)), 3)
+        while consumer.consume_available():
+            pass
+
+        self.assertEqual([event_id for _, event_id, _ in self.received], sent)
+        self.assertEqual(self.store.committed("group", "topic", 0), self.store.offsets("topic", 0)[1])
+
+    def test_consumed_segments_are_deleted(self):
+        self.store = LogStore(self.path, num_partitions=1, segment_bytes=1000)
+        self.producer = LogEventBusProducer(self.store)
+        send_events(self.producer, [f"video{i}" for i in range(10)])
+        consumer = self._make_consumer()
+        while consumer.consume_available():
+            pass
+        lagging = self._make_consumer("lagging", max_poll_records=1)
+        lagging.consume_available()
+        segments = self.store.segments("topic", 0)
+
+        # Segments are kept until all consumer groups with a checkpoint consumed them.
+        send_events(self.producer, [f"video{i}" for i in range(10, 20)])
+        self.assertEqual(self.store.segments("topic", 0)[0], segments[0])
+        for group_consumer in (consumer, lagging):
+            while group_consumer.consume_available():
+                pass
+        send_events(self.producer, [f"video{i}" for i in range(20, 30)])
+
+        first_offset = self.store.segments("topic", 0)[0]
+        self.assertGreater(first_offset, segments[-1])
+        self.assertLessEqual(first_offset, self.store.committed("lagging", "topic", 0))
+        self.received.clear()
+        new_consumer = self._make_consumer("new")
+        while new_consumer.consume_available():
+            pass
+        self.assertEqual(self.received[-1][0], "video29")
+        self.assertLess(len(self.received), 20)
+
+    def test_checkpoints(self):
+        send_events(self.producer, ["video1", "video2"])
+        self._make_consumer(max_poll_records=1).consume_available()
+        sent = send_events(self.producer, ["video3"])
+
+        # A consumer of the same group, e.g. after a restart, continues from the group's checkpoints.
+        restarted = self._make_consumer(store=LogStore(self.path, num_partitions=2))
+
+        self.assertEqual(restarted.consume_available(), 1)
+        self.assertEqual(len(self.received), 3)
+        self.assertEqual(self.received[-1][1], sent[0])
+        self.assertEqual(restarted.consume_available(), 0)
+
+    def test_consumer_groups(self):
+        send_events(self.producer, ["video1"])
+
+        self.assertEqual(self._make_consumer("group-a").consume_available(), 1)
+        self.assertEqual(self._make_consumer("group-b").consume_available(), 1)
+        self.assertEqual(self._make_consumer("group-c", auto_offset_reset="latest").consume_available(), 0)
+
+    def test_claimed_partitions_are_skipped(self):
+        send_events(self.producer, [f"video{i}" for i in range(20)])
+        claim = self.store.claim("group", "topic", 0)
+
+        self.assertIsNone(self.store.claim("group", "topic", 0))
+        consumed = self._make_consumer().consume_available()
+        claim.close()
+
+        self.assertGreater(consumed, 0)
+        self.assertEqual(consumed + self._make_consumer().consume_available(), 20)
+
+    def test_incomplete_frames_are_not_consumed(self):
+        self.store = LogStore(self.path, num_partitions=1)
+        self.producer = LogEventBusProducer(self.store)
+        send_events(self.producer, ["video1", "video2"])
+        segment_path = self.store.segment_path("topic", 0, 0)
+        with open(segment_path, "rb") as segment:
+            data = segment.read()
+        with open(segment_path, "wb") as segment:
+            segment.write(data[:-10])
+        consumer = self._make_consumer()
+
+        self.assertEqual(consumer.consume_available(), 1)
+        with open(segment_path, "ab") as segment:
+            segment.write(data[-10:])
+        self.assertEqual(consumer.consume_available(), 1)
+        self.assertEqual([block_id for block_id, _, _ in self.received], ["video1", "video2"])
+
+    @patch("openedx_events.event_bus.backends.mmap_log.logger")
+    def test_corrupted_frames_are_skipped(self, mock_logger):
+        self.store = LogStore(self.path, num_partitions=1)
+        self.producer = LogEventBusProducer(self.store)
+        send_events(self.producer, ["video1", "video2"])
+        with open(self.store.segment_path("topic", 0, 0), "r+b") as segment:
+            segment.seek(20)
+            segment.write(b"\xff")
+
+        self.assertEqual(self._make_consumer().consume_available(), 2)
+
+        mock_logger.error.assert_called_once()
+        self.assertEqual([block_id for block_id, _, _ in self.received], ["video2"])
+
+    @patch("openedx_events.event_bus.backends.mmap_log.logger")
+    def test_incomplete_frames_are_truncated_by_producers(self, mock_logger):
+        self.store = LogStore(self.path, num_partitions=1)
+        send_events(LogEventBusProducer(self.store), ["video1"])
+        segment_path = self.store.segment_path("topic", 0, 0)
+        size = os.path.getsize(segment_path)
+        # An incomplete frame left by a producer that crashed, with a length beyond the end of the segment
+        with open(segment_path, "ab") as segment:
+            segment.write(b"\x00\x10\x00\x00torn")
+
+        send_events(LogEventBusProducer(LogStore(self.path, num_partitions=1)), ["video2"])
+
+        mock_logger.warning.assert_called_once()
+        self.assertIn(f"Truncating incomplete event at offset {size}", mock_logger.warning.call_args[0][0])
+        self.assertEqual(self._make_consumer().consume_available(), 2)
+        self.assertEqual([block_id for block_id, _, _ in self.received], ["video1", "video2"])
+
+    @patch("openedx_events.event_bus.backends.mmap_log.logger")
+    def test_corrupted_tails_start_new_segments(self, mock_logger):
+        self.store = LogStore(self.path, num_partitions=1)
+        send_events(LogEventBusProducer(self.store), ["video1"])
+        with open(self.store.segment_path("topic", 0, 0), "ab") as segment:
+            segment.write(b"\x00\x00\x00\x04\x00\x00\x00\x00junk")
+
+        send_events(LogEventBusProducer(LogStore(self.path, num_partitions=1)), ["video2"])
+
+        self.assertEqual(len(self.store.segments("topic", 0)), 2)
+        self.assertEqual(self._make_consumer().consume_available(), 3)
+        self.assertEqual([block_id for block_id, _, _ in self.received], ["video1", "video2"])
+        mock_logger.error.assert_called_once()
+
+    @patch("openedx_events.event_bus.backends.mmap_log.logger")
+    def test_incomplete_frames_before_newer_segments_are_skipped(self, mock_logger):
+        self.store = LogStore(self.path, num_partitions=1)
+        send_events(LogEventBusProducer(self.store), ["video1"])
+        segment_path = self.store.segment_path("topic", 0, 0)
+        # An incomplete frame followed by a newer segment, as left by producers that did not truncate it
+        with open(segment_path, "ab") as segment:
+            segment.write(b"\x00\x10\x00\x00torn")
+        with open(self.store.segment_path("topic", 0, os.path.getsize(segment_path)), "wb"):
+            pass
+        send_events(LogEventBusProducer(LogStore(self.path, num_partitions=1)), ["video2"])
+
+        self.assertEqual(self._make_consumer().consume_available(), 3)
+
+        self.assertEqual([block_id for block_id, _, _ in self.received], ["video1", "video2"])
+        mock_logger.error.assert_called_once()
+
+    def test_failed_writes_are_rolled_back(self):
+        self.store = LogStore(self.path, num_partitions=1)
+        self.producer = LogEventBusProducer(self.store)
+        send_events(self.producer, ["video1"])
+        size = os.path.getsize(self.store.segment_path("topic", 0, 0))
+
+        def write_partially(fd, data):
+            os_write(fd, data[:10])
+            raise OSError(errno.ENOSPC, "No space left on device")
+
+        os_write = os.write
+        with patch("openedx_events.event_bus.backends.mmap_log.os.write", write_partially):
+            with pytest.raises(OSError):
+                send_events(self.producer, ["video2"])
+
+        self.assertEqual(os.path.getsize(self.store.segment_path("topic", 0, 0)), size)
+        send_events(self.producer, ["video3"])
+        self.assertEqual(self._make_consumer().consume_available(), 2)
+        self.assertEqual([block_id for block_id, _, _ in self.received], ["video1", "video3"])
+
+    def test_concurrent_producer_processes(self):
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=send_events, args=(self.producer, [f"video{i}-{j}" for j in range(50)]))
+            for i in range(3)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=30)
+
+        consumer = self._make_consumer()
+        while consumer.consume_available():
+            pass
+        self.assertEqual(len(self.received), 150)
+
+    def test_consume_indefinitely(self):
+        consumer = self._make_consumer(poll_interval=0.01)
+        thread = threading.Thread(target=consumer.consume_indefinitely)
+        thread.start()
+
+        [event_id] = send_events(self.producer, ["video1"])
+        self.event_received.wait(timeout=5)
+        consumer.shutdown()
+        thread.join(timeout=5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(self.received, [("video1", event_id, True)])
+
+    def test_invalid_names(self):
+        with pytest.raises(ValueError, match="Invalid topic name"):
+            LogEventBusConsumer("../topic", "group", store=self.store)
+        with pytest.raises(ValueError, match="Invalid group name"):
+            LogEventBusConsumer("topic", "group/1", store=self.store)
+
+
+class TestLogEventBusSettings(TestCase):
+    """
+    Tests for selecting the file-backed event bus with settings.
+    """
+
+    def test_loaded_from_settings(self):
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        with override_settings(
+            EVENT_BUS_PRODUCER="openedx_events.event_bus.backends.mmap_log.create_producer",
+            EVENT_BUS_CONSUMER="openedx_events.event_bus.backends.mmap_log.LogEventBusConsumer",
+            EVENT_BUS_LOG_DIR=path,
+            EVENT_BUS_LOG_PARTITIONS=3,
+        ):
+            producer = get_producer()
+            consumer = make_single_consumer(topic="topic", group_id="group")
+            send_events(producer, ["video1"])
+
+            self.assertIsInstance(producer, LogEventBusProducer)
+            self.assertIsInstance(consumer, LogEventBusConsumer)
+            self.assertIs(producer.store, get_store())
+            self.assertEqual(sorted(os.listdir(os.path.join(path, "topic"))), ["0", "1", "2"])
+
+    @override_settings(EVENT_BUS_LOG_DIR=None)
+    def test_log_dir_is_required(self):
+        with pytest.raises(ImproperlyConfigured, match="EVENT_BUS_LOG_DIR"):
+            get_store()
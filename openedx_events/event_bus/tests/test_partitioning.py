@@ -0,0 +1,59 @@
+"""
+Tests for partitioning events by key.
+"""
+from collections import Counter
+from unittest import TestCase
+
+import ddt
+import pytest
+
+from openedx_events.event_bus.partitioning import PARTITIONER_CONSISTENT, PARTITIONER_MURMUR2, murmur2, partition_for
+
+KEYS = [f"course-v1:edX+DemoX+Demo_{i}".encode() for i in range(1000)]
+
+
+@ddt.ddt
+class TestPartitioning(TestCase):
+    """
+    Tests for partition_for and its hash functions.
+    """
+
+    @ddt.data(
+        # Test vectors of Kafka's UtilsTest.testMurmur2
+        (b"21", -973932308),
+        (b"foobar", -790332482),
+        (b"a-little-bit-long-string", -985981536),
+        (b"a-little-bit-longer-string", -1486304829),
+        (b"lkjh234lh9fiuh90y23oiuhsafujhadof229phr9h19h89h8", -58897971),
+        (b"abc", 479470107),
+    )
+    @ddt.unpack
+    def test_murmur2_matches_kafka(self, data, expected_hash):
+        self.assertEqual(murmur2(data), expected_hash)
+
+    def test_murmur2_partition_formula(self):
+        # Formula of Kafka's default partitioner, for the same key bytes: toPositive(murmur2(keyBytes)) % numPartitions
+        self.assertEqual(partition_for(b"foobar", 7), (-790332482 & 0x7FFFFFFF) % 7)
+
+    @ddt.data(PARTITIONER_MURMUR2, PARTITIONER_CONSISTENT)
+    def test_partitions_are_stable_and_balanced(self, strategy):
+        partitions = [partition_for(key, 8, strategy) for key in KEYS]
+
+        self.assertEqual(partitions, [partition_for(key, 8, strategy) for key in KEYS])
+        counts = Counter(partitions)
+        self.assertEqual(set(counts), set(range(8)))
+        self.assertTrue(all(count > 1000 / 8 / 2 for count in counts.values()))
+
+    def test_consistent_partitions_only_move_to_new_partitions(self):
+        before = [partition_for(key, 9, PARTITIONER_CONSISTENT) for key in KEYS]
+        after = [partition_for(key, 10, PARTITIONER_CONSISTENT) for key in KEYS]
+
+        moved = [new for old, new in zip(before, after) if old != new]
+        self.assertEqual(set(moved), {9})
+        self.assertLess(len(moved), len(KEYS) / 5)
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError, match="num_partitions"):
+            partition_for(b"key", 0)
+        with pytest.raises(ValueError, match="Unknown partitioning strategy"):
+            partition_for(b"key", 2, "round-robin")
@@ -0,0 +1,237 @@
+"""
+Tests for the SQLite event bus.
+"""
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+
+from openedx_events.content_authoring.signals import XBLOCK_PUBLISHED
+from openedx_events.event_bus import get_producer, make_single_consumer
+from openedx_events.event_bus.backends.sqlite import (
+    SqliteEventBusConsumer,
+    SqliteEventBusProducer,
+    SqliteStore,
+    get_store,
+)
+from openedx_events.tests.utils import ReceiveEventsMixin, send_events, wait_until
+
+
+class TestSqliteEventBus(ReceiveEventsMixin, TestCase):
+    """
+    Tests for producing and consuming events with the SQLite event bus.
+    """
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "event-bus.sqlite3")
+        self.store = SqliteStore(self.path, synchronous="NORMAL")
+        self.producer = SqliteEventBusProducer(self.store)
+
+    def _make_consumer(self, group_id="group", **kwargs):
+        return SqliteEventBusConsumer("topic", group_id, store=kwargs.pop("store", self.store), **kwargs)
+
+    def test_events_are_emitted_to_their_signal(self):
+        [event_id] = send_events(self.producer, ["video1"])
+
+        self.assertEqual(self._make_consumer().consume_available(), 1)
+
+        self.assertEqual(self.received, [("video1", event_id, True)])
+        with sqlite3.connect(self.path) as connection:
+            self.assertEqual(connection.execute("PRAGMA journal_mode").fetchone(), ("wal",))
+
+    def test_group_commits(self):
+        # Hold the database lock so that events sent meanwhile wait for the writer thread.
+        blocker = sqlite3.connect(self.path, isolation_level=None)
+        blocker.execute("BEGIN IMMEDIATE")
+        threads = [
+            threading.Thread(target=send_events, args=(self.producer, [f"video{i}"])) for i in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        wait_until(lambda: self.store._queue.qsize() == 4)  # pylint: disable=protected-access
+        blocker.execute("COMMIT")
+        blocker.close()
+        for thread in threads:
+            thread.join(timeout=30)
+
+        self.assertEqual(self.store.committed_writes, 2)
+        self.assertEqual(self._make_consumer().consume_available(), 5)
+
+    def test_failed_writes(self):
+        with pytest.raises(TypeError):
+            self.store.append("topic", [(b"key", "type", b"payload", object(), b"metadata")])
+
+        # The writer thread rolled back the failed transaction and keeps writing events.
+        [event_id] = send_events(self.producer, ["video1"])
+        self.assertEqual(self._make_consumer().consume_available(), 1)
+        self.assertEqual(self.received, [("video1", event_id, True)])
+
+    def test_writer_thread_failures(self):
+        with patch.object(SqliteStore, "_commit", side_effect=ValueError("writer failed")):
+            with pytest.raises(ValueError, match="writer failed"):
+                send_events(self.producer, ["video1"])
+
+        # The next event is written by a new writer thread.
+        [event_id] = send_events(self.producer, ["video2"])
+        self.assertEqual(self._make_consumer().consume_available(), 1)
+        self.assertEqual(self.received, [("video2", event_id, True)])
+
+    def test_checkpoints(self):
+        send_events(self.producer, ["video1", "video2"])
+        self._make_consumer(max_poll_records=1).consume_available()
+        sent = send_events(self.producer, ["video3"])
+
+        # A consumer of the same group, e.g. after a restart, continues where the group stopped.
+        restarted = self._make_consumer(store=SqliteStore(self.path))
+
+        self.assertEqual(restarted.consume_available(), 2)
+        self.assertEqual(len(self.received), 3)
+        self.assertEqual(self.received[-1][1], sent[0])
+        self.assertEqual(restarted.consume_available(), 0)
+
+    def test_consumer_groups(self):
+        send_events(self.producer, ["video1"])
+
+        self.assertEqual(self._make_consumer("group-a").consume_available(), 1)
+        self.assertEqual(self._make_consumer("group-b").consume_available(), 1)
+        self.assertEqual(self._make_consumer("group-c", auto_offset_reset="latest").consume_available(), 0)
+        send_events(self.producer, ["video2"])
+        self.assertEqual(self._make_consumer("group-c", auto_offset_reset="latest").consume_available(), 1)
+
+    def test_consumed_events_are_deleted(self):
+        send_events(self.producer, [f"video{i}" for i in range(5)])
+        self._make_consumer("group-a").consume_available()
+        self._make_consumer("group-b", max_poll_records=2).consume_available()
+        claim = self.store.claim("topic", "group-c", 1)
+
+        # Events are kept until all consumer groups claimed and released them.
+        self.assertEqual(self.store.delete_consumed("topic"), 0)
+        self.store.release(claim)
+        self.assertEqual(self.store.delete_consumed("topic"), 1)
+        self.assertEqual(self._make_consumer("group-c").consume_available(), 4)
+        self.assertEqual(self.store.delete_consumed("topic"), 1)
+        self.assertEqual(self._make_consumer("group-b").consume_available(), 3)
+        # Idle consumers delete the consumed events.
+        self.assertEqual(self._make_consumer("group-a").consume_available(), 0)
+        self.assertEqual(self.store.offsets("topic"), (None, None))
+
+    def test_claimed_ranges_are_skipped(self):
+        sent = send_events(self.producer, [f"video{i}" for i in range(5)])
+        claim = self.store.claim("topic", "group", 2)
+
+        self.assertEqual(self._make_consumer().consume_available(), 3)
+        self.assertEqual([event_id for _, event_id, _ in self.received], sent[2:])
+        self.assertEqual(self.store.claims("topic", "group"), [(claim.start_id, claim.end_id)])
+        self.store.release(claim)
+        self.assertEqual(self.store.claims("topic", "group"), [])
+
+    def test_expired_claims_are_claimed_again(self):
+        self.store = SqliteStore(self.path, claim_timeout=-1)
+        sent = send_events(self.producer, ["video1", "video2"])
+        crashed = self.store.claim("topic", "group", 10)
+
+        self.assertEqual(self._make_consumer().consume_available(), 2)
+        self.assertEqual([event_id for _, event_id, _ in self.received], sent)
+
+        # The crashed consumer does not release the range claimed again by the other consumer.
+        self.store.release(crashed)
+        self.assertEqual(self.store.claims("topic", "group"), [])
+
+    def test_shutdown_releases_unconsumed_events(self):
+        sent = send_events(self.producer, ["video1", "video2", "video3"])
+        consumer = self._make_consumer()
+
+        def shutdown(**kwargs):  # pylint: disable=unused-argument
+            consumer.shutdown()
+
+        XBLOCK_PUBLISHED.connect(shutdown)
+        try:
+            self.assertEqual(consumer.consume_available(), 1)
+        finally:
+            XBLOCK_PUBLISHED.disconnect(shutdown)
+
+        self.assertEqual(len(self.store.claims("topic", "group")), 1)
+        self.assertEqual(self._make_consumer().consume_available(), 2)
+        self.assertEqual([event_id for _, event_id, _ in self.received], sent)
+
+    def test_forked_producers(self):
+        send_events(self.producer, ["video0"])
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=send_events, args=(self.producer, [f"video{i}-{j}" for j in range(20)]))
+            for i in range(3)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=30)
+
+        self.assertEqual([process.exitcode for process in processes], [0, 0, 0])
+        self.assertEqual(self._make_consumer(max_poll_records=100).consume_available(), 61)
+
+    def test_consume_indefinitely(self):
+        consumer = self._make_consumer(poll_interval=5)
+        thread = threading.Thread(target=consumer.consume_indefinitely)
+        thread.start()
+
+        [event_id] = send_events(self.producer, ["video1"])
+        self.event_received.wait(timeout=5)
+        consumer.shutdown()
+        thread.join(timeout=5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(self.received, [("video1", event_id, True)])
+
+    def test_stop_when_idle(self):
+        send_events(self.producer, [f"video{i}" for i in range(5)])
+
+        self._make_consumer(max_poll_records=2, stop_when_idle=True).consume_indefinitely()
+
+        self.assertEqual(len(self.received), 5)
+
+    def test_invalid_options(self):
+        with pytest.raises(ValueError, match="synchronous"):
+            SqliteStore(self.path, synchronous="SOMETIMES")
+        with pytest.raises(ValueError, match="max_commit_events"):
+            SqliteStore(self.path, max_commit_events=0)
+        with pytest.raises(ValueError, match="auto_offset_reset"):
+            self._make_consumer(auto_offset_reset="middle")
+
+
+class TestSqliteEventBusSettings(TestCase):
+    """
+    Tests for selecting the SQLite event bus with settings.
+    """
+
+    def test_loaded_from_settings(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with override_settings(
+            EVENT_BUS_PRODUCER="openedx_events.event_bus.backends.sqlite.create_producer",
+            EVENT_BUS_CONSUMER="openedx_events.event_bus.backends.sqlite.SqliteEventBusConsumer",
+            EVENT_BUS_SQLITE_PATH=os.path.join(directory, "event-bus.sqlite3"),
+            EVENT_BUS_SQLITE_SYNCHRONOUS="NORMAL",
+        ):
+            producer = get_producer()
+            consumer = make_single_consumer(topic="topic", group_id="group")
+
+            self.assertIsInstance(producer, SqliteEventBusProducer)
+            self.assertIsInstance(consumer, SqliteEventBusConsumer)
+            self.assertIs(producer.store, get_store())
+            self.assertEqual(get_store().synchronous, "NORMAL")
+
+    @override_settings(EVENT_BUS_SQLITE_PATH=None)
+    def test_path_is_required(self):
+        with pytest.raises(ImproperlyConfigured, match="EVENT_BUS_SQLITE_PATH"):
+            get_store()
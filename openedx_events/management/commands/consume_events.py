@@ -3,14 +3,29 @@ Makes ``consume_events`` management command available.
 """
 import json
 import logging
+import os
+import queue
+import signal
+import threading
+import time
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
 
 from openedx_events.event_bus import make_single_consumer
 from openedx_events.tooling import load_all_signals
 
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for all consumers to finish processing their current event when consuming several topics
+SHUTDOWN_TIMEOUT = 30
+
+# Minimum seconds between the start of a worker process and its restart after it crashed
+WORKER_RESTART_DELAY = 1
+
+# Signals passed on by the parent process to worker processes
+FORWARDED_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
 
 class Command(BaseCommand):
     """
@@ -18,7 +33,7 @@ class Command(BaseCommand):
     """
 
     help = """
-    Consume messages from a topic and emit their data with the correct signal.
+    Consume messages from topics and emit their data with the correct signal.
 
     Example::
 
@@ -30,45 +45,221 @@ class Command(BaseCommand):
         # send extra args, for example replay events from specific redis msg id.
         python manage.py cms consume_events -t user-login -g user-activity-service \
             --extra '{"last_read_msg_id": "1679676448892-0"}'
+
+        # consume several topics in a single process, with a consumer per topic, in the same group
+        python manage.py cms consume_events -t user-login course-enrollment -g user-activity-service
+
+        # or in a group per topic
+        python manage.py cms consume_events -t user-login course-enrollment -g login-service enrollment-service
+
+        # fork 4 worker processes consuming the topic in the same group, restarted if they crash
+        python manage.py cms consume_events -t user-login -g user-activity-service --workers 4
     """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # topic -> consumer, as created by ``consume``
+        self.event_consumers = {}
+
     def add_arguments(self, parser):
         """
-        Add arguments for parsing topic, group, and extra args.
+        Add arguments for parsing topics, groups, and extra args.
         """
         parser.add_argument(
             '-t', '--topic',
-            nargs=1,
+            nargs='+',
             required=True,
-            help='Topic to consume (without environment prefix)'
+            help='Topics to consume (without environment prefix)'
         )
         parser.add_argument(
             '-g', '--group_id',
-            nargs=1,
+            nargs='+',
             required=True,
-            help='Consumer group id'
+            help='Consumer group id, for all topics, or one per topic'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of worker processes to fork, each consuming the topics in the same consumer groups.'
         )
         parser.add_argument(
             '--extra',
             nargs='?',
             type=str,
             required=False,
-            help='JSON object to pass additional arguments to the consumer.'
+            help='JSON object to pass additional arguments to the consumers.'
         )
 
     def handle(self, *args, **options):
         """
-        Create consumer based on django settings and consume events.
+        Create consumers based on django settings and consume events.
         """
         try:
+            topics = options['topic']
+            group_ids = options['group_id']
+            if len(group_ids) == 1:
+                group_ids = group_ids * len(topics)
+            elif len(group_ids) != len(topics):
+                raise ValueError(f"Expected 1 or {len(topics)} group ids, got {len(group_ids)}")
+            workers = options.get('workers', 1)
+            if workers < 1:
+                raise ValueError("--workers should be a positive integer")
             # load additional arguments specific for the underlying implementation of event_bus.
             extra = json.loads(options.get('extra') or '{}')
             load_all_signals()
-            event_consumer = make_single_consumer(
-                topic=options['topic'][0],
-                group_id=options['group_id'][0],
-                **extra,
-            )
-            event_consumer.consume_indefinitely()
+            if workers == 1:
+                self.consume(topics, group_ids, extra)
+            else:
+                self.run_workers(workers, topics, group_ids, extra)
+        except CommandError:
+            raise
         except Exception:  # pylint: disable=broad-except
             logger.exception("Error consuming events")
+
+    def consume(self, topics, group_ids, extra):
+        """
+        Create a consumer per topic and consume events, in threads if there are several topics.
+        """
+        self.event_consumers = {
+            topic: make_single_consumer(topic=topic, group_id=group_id, **extra)
+            for topic, group_id in zip(topics, group_ids)
+        }
+        if len(self.event_consumers) == 1:
+            self.event_consumers[topics[0]].consume_indefinitely()
+        else:
+            self.consume_in_threads(self.event_consumers)
+
+    def run_workers(self, num_workers, topics, group_ids, extra):
+        """
+        Fork worker processes consuming events, and supervise them until they all exit.
+
+        Workers inherit the Django setup and signals loaded by this process, and each creates its own consumers, in
+        the same consumer groups. Workers that crash are restarted. SIGTERM and SIGINT are passed on to the workers
+        for them to shut down gracefully.
+        """
+        # Forked processes must not share database connections with their parent.
+        connections.close_all()
+        workers = {}  # pid -> start time
+        shutting_down = False
+
+        def forward_signal(signum, frame):  # pylint: disable=unused-argument
+            nonlocal shutting_down
+            shutting_down = True
+            for pid in workers:
+                try:
+                    os.kill(pid, signum)
+                except ProcessLookupError:
+                    pass
+
+        previous_handlers = {signum: signal.signal(signum, forward_signal) for signum in FORWARDED_SIGNALS}
+        try:
+            for _ in range(num_workers):
+                self.start_worker(workers, topics, group_ids, extra)
+            while workers:
+                pid, status = os.wait()
+                started = workers.pop(pid, None)
+                exit_code = os.waitstatus_to_exitcode(status)
+                if started is None or exit_code == 0 or shutting_down:
+                    continue
+                logger.error(f"Consumer worker {pid} exited with code {exit_code}, restarting it")
+                # Avoid restarting workers in a tight loop, e.g. when the event bus is unreachable.
+                if time.monotonic() - started < WORKER_RESTART_DELAY:
+                    time.sleep(WORKER_RESTART_DELAY)
+                if not shutting_down:
+                    self.start_worker(workers, topics, group_ids, extra)
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+    def start_worker(self, workers, topics, group_ids, extra):
+        """
+        Fork a worker process consuming events, and add it to workers.
+        """
+        # Block signals until the worker is registered to receive forwarded signals, or has its own handlers.
+        mask = signal.pthread_sigmask(signal.SIG_BLOCK, FORWARDED_SIGNALS)
+        try:
+            pid = os.fork()
+            if pid == 0:
+                self.run_worker(mask, topics, group_ids, extra)
+            workers[pid] = time.monotonic()
+        finally:
+            signal.pthread_sigmask(signal.SIG_SETMASK, mask)
+
+    def run_worker(self, mask, topics, group_ids, extra):
+        """
+        Consume events in a worker process, then exit it with a non-zero code if consuming failed.
+        """
+        exit_code = 1
+        try:
+            for signum in FORWARDED_SIGNALS:
+                signal.signal(signum, self.shutdown_worker)
+            signal.pthread_sigmask(signal.SIG_SETMASK, mask)
+            self.consume(topics, group_ids, extra)
+            exit_code = 0
+        except SystemExit as exc:
+            exit_code = exc.code if isinstance(exc.code, int) else 0 if exc.code is None else 1
+        except BaseException:
+            logger.exception("Error consuming events")
+        finally:
+            # Skip the cleanup of the parent process, e.g. atexit handlers, inherited by the worker.
+            os._exit(exit_code)
+
+    def shutdown_worker(self, signum, frame):  # pylint: disable=unused-argument
+        """
+        Shut the consumers of a worker down, or exit right away if some of them do not support it.
+        """
+        event_consumers = list(self.event_consumers.values())
+        if not event_consumers or not all(hasattr(consumer, 'shutdown') for consumer in event_consumers):
+            raise SystemExit(0)
+        for consumer in event_consumers:
+            consumer.shutdown()
+
+    def consume_in_threads(self, event_consumers):
+        """
+        Run the consumer of each topic in its own thread, until they all stop or one of them fails.
+
+        When a consumer fails, the others are shut down if they support it, so that the command exits with an error
+        and the process can be restarted rather than keep consuming only some of its topics.
+
+        Arguments:
+            event_consumers: Dict of topic to consumer
+
+        Raises:
+            CommandError: If a consumer failed, once the other consumers stopped or the shutdown timed out.
+        """
+        # (topic, exception) of each consumer as it stops, with no exception unless it failed
+        stopped = queue.SimpleQueue()
+
+        def consume(topic, event_consumer):
+            error = None
+            try:
+                event_consumer.consume_indefinitely()
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.exception(f"Error consuming events from topic {topic}")
+                error = exc
+            finally:
+                stopped.put((topic, error))
+
+        threads = [
+            threading.Thread(target=consume, args=(topic, event_consumer), name=f"consume-{topic}", daemon=True)
+            for topic, event_consumer in event_consumers.items()
+        ]
+        for thread in threads:
+            thread.start()
+        failed_topic, error = None, None
+        try:
+            for _ in threads:
+                failed_topic, error = stopped.get()
+                if error is not None:
+                    break
+        finally:
+            for event_consumer in event_consumers.values():
+                shutdown = getattr(event_consumer, 'shutdown', None)
+                if shutdown is not None:
+                    shutdown()
+            deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+            for thread in threads:
+                thread.join(timeout=max(0, deadline - time.monotonic()))
+        if error is not None:
+            raise CommandError(f"Error consuming events from topic {failed_topic}") from error
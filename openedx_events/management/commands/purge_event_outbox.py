@@ -0,0 +1,96 @@
+"""
+Makes ``purge_event_outbox`` management command available.
+"""
+import logging
+import math
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from openedx_events.event_bus.outbox import get_purgeable_events, purge_processed_events
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Management command deleting old processed events from the outbox.
+    """
+
+    help = """
+    Delete the outbox events published more than --days days ago and kept as processed (see relay_outbox --keep).
+
+    Events are deleted in chunks of consecutive ids, pausing between chunks, to avoid holding locks on the outbox
+    for long and to let database replicas keep up.
+
+    Example::
+
+        python manage.py lms purge_event_outbox --days 7
+
+        # report how many events would be deleted
+        python manage.py lms purge_event_outbox --days 7 --dry-run
+    """
+
+    def add_arguments(self, parser):
+        """
+        Add arguments for retention, chunking and dry runs.
+        """
+        parser.add_argument(
+            '--days',
+            type=float,
+            default=7.0,
+            help='Retention window: only delete events published more than this many days ago'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Maximum number of events deleted at once'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.5,
+            help='Seconds to wait between chunks'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report the number of events that would be deleted, without deleting them'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Delete processed events older than the retention window, and report the throughput.
+        """
+        chunk_size = options['chunk_size']
+        if options['days'] < 0:
+            raise CommandError("--days should not be negative")
+        if chunk_size < 1:
+            raise CommandError("--chunk-size should be a positive integer")
+        if options['sleep'] < 0:
+            raise CommandError("--sleep should not be negative")
+
+        older_than = timezone.now() - timedelta(days=options['days'])
+        if options['dry_run']:
+            count = get_purgeable_events(older_than).count()
+            logger.info(
+                f"Would delete {count} outbox events processed before {older_than.isoformat()}, "
+                f"in {math.ceil(count / chunk_size)} chunks of up to {chunk_size} events"
+            )
+            return
+
+        start = time.monotonic()
+        deleted = chunks = 0
+        for chunk_deleted in purge_processed_events(older_than, chunk_size=chunk_size, pause=options['sleep']):
+            deleted += chunk_deleted
+            chunks += 1
+            logger.debug(f"Deleted {chunk_deleted} outbox events ({deleted} so far)")
+        elapsed = time.monotonic() - start
+        rate = deleted / elapsed if elapsed else 0.0
+        logger.info(
+            f"Deleted {deleted} outbox events processed before {older_than.isoformat()} in {chunks} chunks, "
+            f"in {elapsed:.1f}s ({rate:.0f} events/s)"
+        )
@@ -0,0 +1,122 @@
+"""
+Makes ``relay_outbox`` management command available.
+"""
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from openedx_events.event_bus import get_backend_producer
+from openedx_events.event_bus.outbox import relay_batch
+from openedx_events.tooling import load_all_signals
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Management command for outbox relay workers.
+    """
+
+    help = """
+    Publish the events saved to the outbox (see the "outbox" publishing mode) to the event bus, in batches.
+
+    Run exactly one relay per partition to publish events with the same key in order.
+
+    Example::
+
+        python manage.py lms relay_outbox
+
+        # split the outbox between 4 relays, each running one of:
+        python manage.py lms relay_outbox --partitions 4 --partition 0
+        python manage.py lms relay_outbox --partitions 4 --partition 1
+        ...
+    """
+
+    def add_arguments(self, parser):
+        """
+        Add arguments for batching, partitioning and polling.
+        """
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Maximum number of events claimed and published at once'
+        )
+        parser.add_argument(
+            '--partitions',
+            type=int,
+            default=1,
+            help='Number of partitions of the event key space, one per relay'
+        )
+        parser.add_argument(
+            '--partition',
+            type=int,
+            default=0,
+            help='Partition relayed by this relay, from 0 to partitions - 1'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait when the outbox is empty, or after failing to publish events'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Mark published events as processed instead of deleting them (see purge_event_outbox)'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=5,
+            help='Number of failed attempts to publish an event after which it is marked as failed and skipped'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the outbox is empty instead of waiting for new events'
+        )
+
+    def handle(self, *args, **options):
+        """
+        Relay batches of outbox events until interrupted, or until the outbox is empty with --once.
+        """
+        partitions, partition = options['partitions'], options['partition']
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size should be a positive integer")
+        if partitions < 1 or not 0 <= partition < partitions:
+            raise CommandError("--partition should be between 0 and --partitions - 1")
+        if options['max_attempts'] < 1:
+            raise CommandError("--max-attempts should be a positive integer")
+
+        load_all_signals()
+        producer = get_backend_producer()
+        relayed = 0
+        while True:
+            # Replace database connections that were closed or broken, e.g. by a database restart.
+            close_old_connections()
+            try:
+                count = relay_batch(
+                    producer,
+                    batch_size=options['batch_size'],
+                    partitions=partitions,
+                    partition=partition,
+                    delete=not options['keep'],
+                    max_attempts=options['max_attempts'],
+                )
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Error relaying events from the outbox")
+                close_old_connections()
+                if options['once']:
+                    raise
+                time.sleep(options['poll_interval'])
+                continue
+            relayed += count
+            if not count and options['once']:
+                break
+            if count < options['batch_size'] and not options['once']:
+                # The outbox was emptied, wait for new events.
+                time.sleep(options['poll_interval'])
+        logger.info(f"Relayed {relayed} events from the outbox")
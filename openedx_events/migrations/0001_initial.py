@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('event_type', models.CharField(max_length=255)),
+                ('topic', models.CharField(help_text='Topic to publish to, without environment prefix', max_length=255)),
+                ('event_key_field', models.CharField(max_length=255)),
+                ('key_hash', models.PositiveIntegerField(help_text='Non-negative hash of the event key, used to split the outbox between relays')),
+                ('payload', models.BinaryField(help_text='Avro-serialized event data, compressed with codec if set')),
+                ('codec', models.CharField(blank=True, default='', help_text='Name of the codec compressing the payload, if any', max_length=32)),
+                ('metadata', models.TextField(help_text='Event metadata, as serialized by EventsMetadata.to_json')),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Number of failed attempts to publish the event')),
+                ('last_error', models.TextField(blank=True, default='', help_text='Error of the last failed attempt, if any')),
+                ('failed_at', models.DateTimeField(blank=True, help_text='When the event was given up on; it is no longer relayed once set', null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['processed_at', 'id'], name='openedx_events_outbox_pending')],
+            },
+        ),
+    ]
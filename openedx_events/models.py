@@ -0,0 +1,49 @@
+"""
+Database models for openedx_events.
+"""
+from django.db import models
+from django.utils import timezone
+
+
+class OutboxEvent(models.Model):
+    """
+    An event waiting in the transactional outbox to be published to an event bus topic.
+
+    Rows are written within the transaction that sent the event (see the ``outbox`` publishing mode) and relayed to
+    the event bus by the ``relay_outbox`` management command, in ``id`` order. Events that cannot be published are
+    marked as failed, and skipped by relays from then on; clear ``failed_at`` to relay them again.
+
+    .. no_pii:
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    created = models.DateTimeField(default=timezone.now, db_index=True)
+    event_type = models.CharField(max_length=255)
+    topic = models.CharField(max_length=255, help_text="Topic to publish to, without environment prefix")
+    event_key_field = models.CharField(max_length=255)
+    key_hash = models.PositiveIntegerField(
+        help_text="Non-negative hash of the event key, used to split the outbox between relays",
+    )
+    payload = models.BinaryField(help_text="Avro-serialized event data, compressed with codec if set")
+    codec = models.CharField(
+        max_length=32, blank=True, default="", help_text="Name of the codec compressing the payload, if any",
+    )
+    metadata = models.TextField(help_text="Event metadata, as serialized by EventsMetadata.to_json")
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0, help_text="Number of failed attempts to publish the event")
+    last_error = models.TextField(blank=True, default="", help_text="Error of the last failed attempt, if any")
+    failed_at = models.DateTimeField(
+        null=True, blank=True, help_text="When the event was given up on; it is no longer relayed once set",
+    )
+
+    class Meta:
+        """
+        Index the pending events in publishing order.
+        """
+
+        indexes = [
+            models.Index(fields=["processed_at", "id"], name="openedx_events_outbox_pending"),
+        ]
+
+    def __str__(self):
+        return f"OutboxEvent {self.id}: {self.event_type} to {self.topic}"
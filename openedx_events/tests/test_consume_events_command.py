@@ -1,11 +1,22 @@
 """
 Tests for consume_events command.
 """
-from unittest.mock import patch
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from unittest.mock import Mock, call, patch
 
-from django.core.management import call_command
-from django.test import TestCase
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from opaque_keys.edx.keys import UsageKey
 
+from openedx_events.content_authoring.data import XBlockData
+from openedx_events.content_authoring.signals import XBLOCK_PUBLISHED
+from openedx_events.event_bus import EventBusConsumer
+from openedx_events.event_bus.backends.sqlite import SqliteEventBusProducer, get_store
 from openedx_events.management.commands.consume_events import Command
 
 
@@ -63,3 +74,350 @@ class TestCommand(TestCase):
         )
         mock_logger.exception.assert_called_once_with("Error consuming events")
         mock_make_consumer.assert_not_called()
+
+    @patch('openedx_events.management.commands.consume_events.make_single_consumer', autospec=True)
+    def test_consumer_per_topic(self, mock_make_consumer):
+        """
+        This method checks that a consumer is created and run for each topic, in the same group.
+
+        Expected behavior:
+            A consumer is created for each topic with the group id, and each consumes events.
+        """
+        call_command(Command(), topic=['topic-a', 'topic-b'], group_id=['test'])
+
+        mock_make_consumer.assert_has_calls([
+            call(topic='topic-a', group_id='test'),
+            call(topic='topic-b', group_id='test'),
+        ], any_order=True)
+        self.assertEqual(mock_make_consumer.return_value.consume_indefinitely.call_count, 2)
+
+    @patch('openedx_events.management.commands.consume_events.make_single_consumer', autospec=True)
+    def test_group_per_topic(self, mock_make_consumer):
+        """
+        This method checks that group ids can be given for each topic.
+
+        Expected behavior:
+            The consumer of each topic is created with the group id of the topic.
+        """
+        call_command(Command(), topic=['topic-a', 'topic-b'], group_id=['group-a', 'group-b'], extra='{"x": 1}')
+
+        mock_make_consumer.assert_has_calls([
+            call(topic='topic-a', group_id='group-a', x=1),
+            call(topic='topic-b', group_id='group-b', x=1),
+        ], any_order=True)
+
+    @patch('openedx_events.management.commands.consume_events.logger', autospec=True)
+    @patch('openedx_events.management.commands.consume_events.make_single_consumer', autospec=True)
+    def test_group_ids_mismatch(self, mock_make_consumer, mock_logger):
+        """
+        This method checks that consumers are not created if the number of group ids does not match the topics.
+
+        Expected behavior:
+            The command logs and skips execution.
+        """
+        call_command(Command(), topic=['topic-a', 'topic-b', 'topic-c'], group_id=['group-a', 'group-b'])
+
+        mock_logger.exception.assert_called_once_with("Error consuming events")
+        mock_make_consumer.assert_not_called()
+
+    @patch('openedx_events.management.commands.consume_events.logger', autospec=True)
+    @patch('openedx_events.management.commands.consume_events.make_single_consumer', autospec=True)
+    def test_failing_consumer_shuts_down_others(self, mock_make_consumer, mock_logger):
+        """
+        This method checks that the consumers of other topics are shut down when one of them fails.
+
+        Expected behavior:
+            The failure is logged, the other consumer is shut down and the command fails, exiting with code 1.
+        """
+        shutdown = threading.Event()
+        failing_consumer = Mock(**{'consume_indefinitely.side_effect': Exception("consumer failed")})
+        other_consumer = Mock(**{
+            'consume_indefinitely.side_effect': lambda: shutdown.wait(5),
+            'shutdown.side_effect': shutdown.set,
+        })
+        mock_make_consumer.side_effect = [failing_consumer, other_consumer]
+
+        with self.assertRaisesRegex(CommandError, "Error consuming events from topic topic-a") as context:
+            call_command(Command(), topic=['topic-a', 'topic-b'], group_id=['test'])
+
+        self.assertEqual(context.exception.returncode, 1)
+        self.assertIsInstance(context.exception.__cause__, Exception)
+        mock_logger.exception.assert_called_once_with("Error consuming events from topic topic-a")
+        other_consumer.shutdown.assert_called_once_with()
+        self.assertTrue(shutdown.is_set())
+
+    @patch('openedx_events.management.commands.consume_events.SHUTDOWN_TIMEOUT', 0.5)
+    @patch('openedx_events.management.commands.consume_events.logger', autospec=True)
+    @patch('openedx_events.management.commands.consume_events.make_single_consumer', autospec=True)
+    def test_shutdown_timeout_is_shared(self, mock_make_consumer, mock_logger):  # pylint: disable=unused-argument
+        """
+        This method checks that the consumers still running after a failure are waited for SHUTDOWN_TIMEOUT overall.
+
+        Expected behavior:
+            The command fails once SHUTDOWN_TIMEOUT expires, even if several consumers ignore the shutdown.
+        """
+        release = threading.Event()
+        self.addCleanup(release.set)
+        failing_consumer = Mock(**{'consume_indefinitely.side_effect': Exception("consumer failed")})
+        stuck_consumers = [
+            Mock(**{'consume_indefinitely.side_effect': lambda: release.wait(10)}) for _ in range(3)
+        ]
+        mock_make_consumer.side_effect = [failing_consumer, *stuck_consumers]
+        started = time.monotonic()
+
+        with self.assertRaises(CommandError):
+            call_command(Command(), topic=['topic-a', 'topic-b', 'topic-c', 'topic-d'], group_id=['test'])
+
+        self.assertLess(time.monotonic() - started, 1.5)
+
+    @patch('openedx_events.management.commands.consume_events.logger', autospec=True)
+    @patch('openedx_events.management.commands.consume_events.make_single_consumer', autospec=True)
+    def test_invalid_workers(self, mock_make_consumer, mock_logger):
+        """
+        This method checks that consumers are not created with a number of workers below 1.
+
+        Expected behavior:
+            The command logs and skips execution.
+        """
+        call_command(Command(), topic=['test'], group_id=['test'], workers=0)
+
+        mock_logger.exception.assert_called_once_with("Error consuming events")
+        mock_make_consumer.assert_not_called()
+
+
+class WorkerConsumer(EventBusConsumer):
+    """
+    Consumer recording its runs in worker processes as files of a directory.
+
+    The first ``crashes`` runs, across all workers, crash. The others wait for ``shutdown`` if ``wait`` is set.
+    """
+
+    def __init__(self, directory, crashes=0, wait=False):
+        self.directory = directory
+        self.crashes = crashes
+        self.wait = wait
+        self.stopped = threading.Event()
+
+    def _create_file(self, name):
+        """
+        Create a file in the directory, returning False if it already exists.
+        """
+        try:
+            os.close(os.open(os.path.join(self.directory, name), os.O_CREAT | os.O_EXCL))
+        except FileExistsError:
+            return False
+        return True
+
+    def consume_indefinitely(self):
+        """
+        Crash if some crashes are left, else record the run, once shut down if ``wait`` is set.
+        """
+        for crash in range(self.crashes):
+            if self._create_file(f"crashed-{crash}"):
+                raise Exception("consumer crashed")  # pylint: disable=broad-exception-raised
+        self._create_file(f"started-{os.getpid()}")
+        if self.wait:
+            self.stopped.wait(10)
+        self._create_file(f"stopped-{os.getpid()}")
+
+    def shutdown(self):
+        """
+        Stop waiting.
+        """
+        self.stopped.set()
+
+
+@patch('openedx_events.management.commands.consume_events.WORKER_RESTART_DELAY', 0)
+class TestCommandWorkers(TestCase):
+    """
+    Tests for the consume_events management command with worker processes.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def _files(self, prefix):
+        """
+        Get the files of the directory starting with prefix.
+        """
+        return [name for name in os.listdir(self.directory) if name.startswith(prefix)]
+
+    @patch('openedx_events.management.commands.consume_events.make_single_consumer', autospec=True)
+    def test_workers_consume(self, mock_make_consumer):
+        """
+        This method checks that each worker process creates its consumers and consumes events.
+
+        Expected behavior:
+            A consumer runs in each worker, in a process other than the command's, and the command returns once
+            the workers exit.
+        """
+        mock_make_consumer.side_effect = lambda **kwargs: WorkerConsumer(self.directory)
+
+        call_command(Command(), topic=['test'], group_id=['test'], workers=3)
+
+        self.assertEqual(len(self._files("stopped-")), 3)
+        self.assertNotIn(f"stopped-{os.getpid()}", self._files("stopped-"))
+        mock_make_consumer.assert_not_called()
+
+    @patch('openedx_events.management.commands.consume_events.logger', autospec=True)
+    @patch('openedx_events.management.commands.consume_events.make_single_consumer', autospec=True)
+    def test_crashed_workers_are_restarted(self, mock_make_consumer, mock_logger):
+        """
+        This method checks that worker processes that crash are restarted.
+
+        Expected behavior:
+            Crashes are logged, and restarted workers consume events.
+        """
+        mock_make_consumer.side_effect = lambda **kwargs: WorkerConsumer(self.directory, crashes=3)
+
+        call_command(Command(), topic=['test'], group_id=['test'], workers=2)
+
+        self.assertEqual(len(self._files("crashed-")), 3)
+        self.assertEqual(len(self._files("stopped-")), 2)
+        self.assertEqual(mock_logger.error.call_count, 3)
+
+    @patch('openedx_events.management.commands.consume_events.logger', autospec=True)
+    @patch('openedx_events.management.commands.consume_events.make_single_consumer', autospec=True)
+    def test_workers_with_a_crashed_topic_are_restarted(self, mock_make_consumer, mock_logger):
+        """
+        This method checks that worker processes consuming several topics are restarted when one consumer crashes.
+
+        Expected behavior:
+            The worker exits with an error when the consumer of a topic crashes, and is restarted.
+        """
+        mock_make_consumer.side_effect = lambda topic, **kwargs: WorkerConsumer(
+            self.directory, crashes=3 if topic == 'topic-a' else 0,
+        )
+
+        call_command(Command(), topic=['topic-a', 'topic-b'], group_id=['test'], workers=2)
+
+        self.assertEqual(len(self._files("crashed-")), 3)
+        self.assertEqual(mock_logger.error.call_count, 3)
+        self.assertIn("exited with code 1", mock_logger.error.call_args[0][0])
+
+    @patch('openedx_events.management.commands.consume_events.make_single_consumer', autospec=True)
+    def test_signals_are_forwarded(self, mock_make_consumer):
+        """
+        This method checks that SIGTERM is passed on to the worker processes, which shut their consumers down.
+
+        Expected behavior:
+            Each worker shuts its consumer down and exits, and the command returns.
+        """
+        mock_make_consumer.side_effect = lambda **kwargs: WorkerConsumer(self.directory, wait=True)
+
+        def terminate():
+            for _ in range(500):
+                if len(self._files("started-")) == 2:
+                    break
+                time.sleep(0.01)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        thread = threading.Thread(target=terminate)
+        thread.start()
+        started = time.monotonic()
+        call_command(Command(), topic=['test'], group_id=['test'], workers=2)
+        thread.join()
+
+        self.assertEqual(len(self._files("stopped-")), 2)
+        self.assertLess(time.monotonic() - started, 10)
+
+
+class TestCommandWithSqliteEventBus(TestCase):
+    """
+    Integration tests for the consume_events management command, with the SQLite event bus.
+    """
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(
+            EVENT_BUS_CONSUMER="openedx_events.event_bus.backends.sqlite.SqliteEventBusConsumer",
+            EVENT_BUS_SQLITE_PATH=os.path.join(directory, "event-bus.sqlite3"),
+            EVENT_BUS_SQLITE_SYNCHRONOUS="NORMAL",
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _send(self, topic, block_ids):
+        """
+        Send an XBLOCK_PUBLISHED event per block id to a topic.
+        """
+        producer = SqliteEventBusProducer(get_store())
+        for block_id in block_ids:
+            producer.send(
+                signal=XBLOCK_PUBLISHED, topic=topic, event_key_field="xblock_info.usage_key",
+                event_data={"xblock_info": XBlockData(
+                    usage_key=UsageKey.from_string(f"block-v1:edx+DemoX+Demo_course+type@video+block@{block_id}"),
+                    block_type="video",
+                )},
+                event_metadata=XBLOCK_PUBLISHED.generate_signal_metadata(),
+            )
+
+    def _connect_receiver(self):
+        """
+        Connect a receiver to XBLOCK_PUBLISHED, returning the list of block ids it receives.
+        """
+        received = []
+
+        def receiver(xblock_info, **kwargs):  # pylint: disable=unused-argument
+            received.append(xblock_info.usage_key.block_id)
+
+        XBLOCK_PUBLISHED.connect(receiver)
+        self.addCleanup(XBLOCK_PUBLISHED.disconnect, receiver)
+        return received
+
+    def test_events_are_consumed(self):
+        """
+        This method checks that events sent to the event bus are emitted by the command.
+
+        Expected behavior:
+            The events sent to the topic are emitted to their signal, in order.
+        """
+        block_ids = [f"video{i}" for i in range(3)]
+        self._send("content-authoring", block_ids)
+        received = self._connect_receiver()
+
+        call_command(
+            Command(), topic=["content-authoring"], group_id=["test"],
+            extra='{"stop_when_idle": true, "max_poll_records": 2}',
+        )
+
+        self.assertEqual(received, block_ids)
+
+    def test_several_topics_are_consumed(self):
+        """
+        This method checks that the events of several topics are emitted by a single command.
+
+        Expected behavior:
+            The events sent to each topic are emitted to their signal.
+        """
+        self._send("topic-a", ["video1", "video2"])
+        self._send("topic-b", ["video3"])
+        received = self._connect_receiver()
+
+        call_command(Command(), topic=["topic-a", "topic-b"], group_id=["test"], extra='{"stop_when_idle": true}')
+
+        self.assertEqual(sorted(received), ["video1", "video2", "video3"])
+
+    def test_workers_share_consumer_groups(self):
+        """
+        This method checks that worker processes consume the events of a topic in the same consumer group.
+
+        Expected behavior:
+            All events are claimed and released by the consumer group of the workers, then deleted.
+        """
+        self._send("content-authoring", [f"video{i}" for i in range(10)])
+        store = get_store()
+        last_id = store.offsets("content-authoring")[1]
+
+        call_command(
+            Command(), topic=["content-authoring"], group_id=["test"], workers=2,
+            extra='{"stop_when_idle": true, "max_poll_records": 3}',
+        )
+
+        self.assertEqual(store.next_id("content-authoring", "test"), last_id + 1)
+        self.assertEqual(store.claims("content-authoring", "test"), [])
+        self.assertEqual(store.offsets("content-authoring"), (None, None))
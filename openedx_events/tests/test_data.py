@@ -1,5 +1,6 @@
 """ Tests for openedx_events.data module."""
 from datetime import datetime, timezone
+from unittest.mock import patch
 from uuid import UUID
 
 import ddt
@@ -30,6 +31,10 @@ class TestEventsMetadata(TestCase):
         from_json = EventsMetadata.from_json(as_json)
         self.assertEqual(self.metadata, from_json)
 
+    def test_events_metadata_minorversion_from_json(self):
+        metadata = EventsMetadata(event_type='test_type', minorversion=2)
+        self.assertEqual(EventsMetadata.from_json(metadata.to_json()).minorversion, 2)
+
     @ddt.data(
         ('settings_variant', None, 'openedx/settings_variant/web'),
         (None, 'my_service', 'openedx/my_service/web'),
@@ -46,3 +51,21 @@ class TestEventsMetadata(TestCase):
                 event_type='test_type'
             )
             self.assertEqual(metadata.source, expected_source)
+
+    @patch("openedx_events.data.socket")
+    def test_events_metadata_process_fields_are_computed_once(self, socket_mock):
+        socket_mock.gethostname.return_value = "edx.devstack.lms"
+        with override_settings(EVENTS_SERVICE_NAME="my_service"):
+            first = EventsMetadata(event_type='test_type')
+            second = EventsMetadata(event_type='test_type')
+
+        socket_mock.gethostname.assert_called_once()
+        self.assertEqual(second.sourcehost, "edx.devstack.lms")
+        self.assertEqual(second.source, first.source)
+        self.assertNotEqual(second.id, first.id)
+
+    def test_events_metadata_process_fields_follow_settings(self):
+        with override_settings(EVENTS_SERVICE_NAME="my_service"):
+            self.assertEqual(EventsMetadata(event_type='test_type').source, 'openedx/my_service/web')
+        with override_settings(EVENTS_SERVICE_NAME="other_service"):
+            self.assertEqual(EventsMetadata(event_type='test_type').source, 'openedx/other_service/web')
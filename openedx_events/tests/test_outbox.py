@@ -0,0 +1,425 @@
+"""
+Tests for the transactional outbox and its management commands.
+"""
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from opaque_keys.edx.keys import UsageKey
+
+from openedx_events.content_authoring.data import XBlockData
+from openedx_events.content_authoring.signals import XBLOCK_PUBLISHED
+from openedx_events.event_bus import EventBusProducer
+from openedx_events.event_bus.outbox import purge_processed_events, relay_batch, save_to_outbox
+from openedx_events.event_bus.partitioning import partition_for
+from openedx_events.models import OutboxEvent
+
+OUTBOX_CONFIG = {
+    'org.openedx.content_authoring.xblock.published.v1': {
+        'topic_a': {'event_key_field': 'xblock_info.usage_key', 'enabled': True, 'mode': 'outbox'},
+        'topic_b': {'event_key_field': 'xblock_info.usage_key', 'enabled': True, 'mode': 'outbox'},
+    },
+}
+
+
+class RecordingProducer(EventBusProducer):
+    """
+    Producer recording the messages of each batch it sends.
+    """
+
+    batches = []
+
+    def send(self, *, signal, topic, event_key_field, event_data, event_metadata):
+        """
+        Not used by outbox relays, which send batches.
+        """
+        raise NotImplementedError
+
+    def send_batch(self, messages):
+        """
+        Record the messages.
+        """
+        self.batches.append(list(messages))
+
+
+def create_producer():
+    """
+    Create a RecordingProducer, for the EVENT_BUS_PRODUCER setting.
+    """
+    return RecordingProducer()
+
+
+def make_xblock_info(block_id):
+    """
+    Create XBlockData for a video block.
+    """
+    return XBlockData(
+        usage_key=UsageKey.from_string(f'block-v1:edx+DemoX+Demo_course+type@video+block@{block_id}'),
+        block_type='video',
+    )
+
+
+class OutboxTest(TestCase):
+    """
+    Tests for saving events to the outbox and relaying them.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.producer = Mock()
+
+    def _save(self, block_id="video1", topics=(("topic_a", "xblock_info.usage_key"),)):
+        """
+        Save an XBLOCK_PUBLISHED event to the outbox, returning its metadata.
+        """
+        metadata = XBLOCK_PUBLISHED.generate_signal_metadata()
+        save_to_outbox(
+            signal=XBLOCK_PUBLISHED, topics=topics, event_data={"xblock_info": make_xblock_info(block_id)},
+            event_metadata=metadata,
+        )
+        return metadata
+
+    def _relayed_events(self):
+        """
+        Get the (topic, metadata id) pairs of each batch sent by self.producer.
+        """
+        return [
+            [(message.topic, message.event_metadata.id) for message in call[0][0]]
+            for call in self.producer.send_batch.call_args_list
+        ]
+
+    @override_settings(EVENT_BUS_PRODUCER_CONFIG=OUTBOX_CONFIG)
+    def test_signal_events_are_saved_within_the_transaction(self):
+        """
+        Check whether events sent in outbox mode are saved once per topic, and discarded on rollback.
+        """
+        try:
+            with transaction.atomic():
+                XBLOCK_PUBLISHED.send_event(xblock_info=make_xblock_info("discarded"))
+                self.assertEqual(OutboxEvent.objects.count(), 2)
+                raise RuntimeError("rollback")
+        except RuntimeError:
+            pass
+        self.assertEqual(OutboxEvent.objects.count(), 0)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            XBLOCK_PUBLISHED.send_event(xblock_info=make_xblock_info("video1"))
+
+        self.assertEqual(callbacks, [])
+        events = OutboxEvent.objects.order_by("id")
+        self.assertEqual([event.topic for event in events], ["topic_a", "topic_b"])
+        self.assertEqual(events[0].payload, events[1].payload)
+        self.assertEqual(events[0].event_type, XBLOCK_PUBLISHED.event_type)
+
+    @override_settings(
+        EVENT_BUS_PRODUCER_CONFIG={
+            'org.openedx.content_authoring.xblock.published.v1': {
+                'topic_a': {'event_key_field': 'xblock_info.usage_key', 'enabled': True, 'codec': 'deflate'},
+            },
+        },
+        EVENT_BUS_CODEC_MIN_SIZE=0,
+    )
+    def test_compressed_events(self):
+        """
+        Check whether events are compressed in the outbox with the codec of their topic, and decompressed on relay.
+        """
+        metadata = self._save(
+            "video1", topics=(("topic_a", "xblock_info.usage_key"), ("topic_b", "xblock_info.usage_key")),
+        )
+
+        self.assertEqual([event.codec for event in OutboxEvent.objects.order_by("id")], ["deflate", ""])
+        relay_batch(self.producer)
+        messages = self.producer.send_batch.call_args[0][0]
+        self.assertEqual(
+            [message.event_data for message in messages], [{"xblock_info": make_xblock_info("video1")}] * 2
+        )
+        self.assertEqual(messages[0].event_metadata, metadata)
+
+    def test_relay_batch(self):
+        """
+        Check whether pending events are published in order, in batches, and deleted.
+        """
+        sent = [self._save(f"video{i}").id for i in range(5)]
+
+        self.assertEqual(relay_batch(self.producer, batch_size=3), 3)
+        self.assertEqual(relay_batch(self.producer, batch_size=3), 2)
+        self.assertEqual(relay_batch(self.producer, batch_size=3), 0)
+
+        self.assertEqual(self._relayed_events(), [
+            [("topic_a", event_id) for event_id in sent[:3]],
+            [("topic_a", event_id) for event_id in sent[3:]],
+        ])
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_relayed_events_are_deserialized(self):
+        """
+        Check whether relayed messages carry the original event data and metadata.
+        """
+        metadata = self._save("video1")
+
+        relay_batch(self.producer)
+
+        message = self.producer.send_batch.call_args[0][0][0]
+        self.assertEqual(message.signal, XBLOCK_PUBLISHED)
+        self.assertEqual(message.event_key_field, "xblock_info.usage_key")
+        self.assertEqual(message.event_data, {"xblock_info": make_xblock_info("video1")})
+        self.assertEqual(message.event_metadata, metadata)
+
+    def test_relay_batch_keep(self):
+        """
+        Check whether published events can be marked as processed instead of deleted.
+        """
+        self._save()
+
+        self.assertEqual(relay_batch(self.producer, delete=False), 1)
+        self.assertEqual(relay_batch(self.producer, delete=False), 0)
+
+        self.assertIsNotNone(OutboxEvent.objects.get().processed_at)
+
+    def test_relay_partitions(self):
+        """
+        Check whether partitions split the outbox by event key, keeping events with the same key together.
+        """
+        for i in range(10):
+            self._save(f"video{i % 5}")
+
+        relayed = []
+        for partition in range(3):
+            relay_batch(self.producer, partitions=3, partition=partition)
+            messages = self.producer.send_batch.call_args[0][0] if self.producer.send_batch.called else []
+            self.producer.reset_mock()
+            keys = [message.event_key_bytes for message in messages]
+            self.assertTrue(all(partition_for(key, 3) == partition for key in keys))
+            relayed.extend(keys)
+
+        self.assertEqual(len(relayed), 10)
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_failed_batches_are_kept(self):
+        """
+        Check whether events stay in the outbox when the producer fails to publish them.
+        """
+        self._save()
+        self.producer.send_batch.side_effect = Exception("broker down")
+
+        with pytest.raises(Exception, match="broker down"):
+            relay_batch(self.producer)
+
+        self.assertEqual(OutboxEvent.objects.filter(processed_at__isnull=True).count(), 1)
+
+    def test_producers_are_flushed_before_removing_events(self):
+        """
+        Check whether events are only removed from the outbox once the producer flushed them.
+        """
+        self._save()
+        self.producer.flush.side_effect = lambda: self.assertTrue(OutboxEvent.objects.exists())
+
+        self.assertEqual(relay_batch(self.producer), 1)
+
+        self.producer.flush.assert_called_once_with()
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_failed_flushes_are_kept(self):
+        """
+        Check whether events stay in the outbox when the producer fails to flush them.
+        """
+        self._save()
+        self.producer.flush.side_effect = Exception("broker down")
+
+        with pytest.raises(Exception, match="broker down"):
+            relay_batch(self.producer)
+
+        self.assertEqual(OutboxEvent.objects.filter(processed_at__isnull=True, attempts=0).count(), 1)
+
+    def test_undecodable_events_are_marked_failed(self):
+        """
+        Check whether events that cannot be decoded are marked as failed without blocking the other events.
+        """
+        self._save("video1")
+        OutboxEvent.objects.update(event_type="org.openedx.unknown.v1")
+        metadata = self._save("video2")
+
+        self.assertEqual(relay_batch(self.producer), 2)
+
+        self.assertEqual(self._relayed_events(), [[("topic_a", metadata.id)]])
+        failed_event = OutboxEvent.objects.get()
+        self.assertIsNotNone(failed_event.failed_at)
+        self.assertEqual(failed_event.attempts, 1)
+        self.assertIn("KeyError", failed_event.last_error)
+        self.assertEqual(relay_batch(self.producer), 0)
+
+    def test_events_failing_to_publish_are_marked_failed(self):
+        """
+        Check whether events the producer fails to publish, unlike others, are marked as failed after max_attempts.
+        """
+        failing = self._save("video1")
+        published = [self._save("video2").id, self._save("video3").id]
+        published_ids = []
+
+        def send_batch(messages):
+            if any(message.event_metadata.id == failing.id for message in messages):
+                raise Exception("bad event")  # pylint: disable=broad-exception-raised
+            published_ids.extend(message.event_metadata.id for message in messages)
+
+        self.producer.send_batch.side_effect = send_batch
+
+        self.assertEqual(relay_batch(self.producer, max_attempts=2), 3)
+        self.assertEqual(published_ids, published)
+        failed_event = OutboxEvent.objects.get()
+        self.assertEqual((failed_event.attempts, failed_event.failed_at), (1, None))
+
+        # Alone, the failing event cannot be told apart from an unavailable event bus.
+        with pytest.raises(Exception, match="bad event"):
+            relay_batch(self.producer, max_attempts=2)
+        published.append(self._save("video4").id)
+        self.assertEqual(relay_batch(self.producer, max_attempts=2), 2)
+        self.assertEqual(published_ids, published)
+        failed_event.refresh_from_db()
+        self.assertEqual(failed_event.attempts, 2)
+        self.assertIsNotNone(failed_event.failed_at)
+        self.assertEqual(failed_event.last_error, "Exception: bad event")
+        self.assertEqual(relay_batch(self.producer, max_attempts=2), 0)
+
+    def test_unavailable_event_bus(self):
+        """
+        Check whether no attempt is counted when the producer fails to publish every event.
+        """
+        self._save("video1")
+        self._save("video2")
+        self.producer.send_batch.side_effect = Exception("broker down")
+
+        with pytest.raises(Exception, match="broker down"):
+            relay_batch(self.producer, max_attempts=1)
+
+        self.assertEqual(list(OutboxEvent.objects.values_list("attempts", "failed_at")), [(0, None), (0, None)])
+
+
+class RelayOutboxCommandTest(TestCase):
+    """
+    Tests for the relay_outbox management command.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        RecordingProducer.batches = []
+
+    @override_settings(EVENT_BUS_PRODUCER="openedx_events.tests.test_outbox.create_producer")
+    def test_relay_once(self):
+        """
+        Check whether --once relays all pending events in batches, then exits.
+        """
+        for i in range(3):
+            save_to_outbox(
+                signal=XBLOCK_PUBLISHED, topics=(("topic_a", "xblock_info.usage_key"),),
+                event_data={"xblock_info": make_xblock_info(f"video{i}")},
+                event_metadata=XBLOCK_PUBLISHED.generate_signal_metadata(),
+            )
+
+        with patch("openedx_events.management.commands.relay_outbox.time.sleep") as mock_sleep:
+            call_command("relay_outbox", "--once", "--batch-size", "2")
+
+        self.assertEqual([len(batch) for batch in RecordingProducer.batches], [2, 1])
+        self.assertFalse(OutboxEvent.objects.exists())
+        mock_sleep.assert_not_called()
+
+    @override_settings(EVENT_BUS_PRODUCER="openedx_events.tests.test_outbox.create_producer")
+    @patch("openedx_events.management.commands.relay_outbox.close_old_connections")
+    @patch("openedx_events.management.commands.relay_outbox.relay_batch")
+    def test_relay_continues_after_errors(self, mock_relay_batch, mock_close_old_connections):
+        """
+        Check whether the relay replaces broken database connections and keeps relaying after an error.
+        """
+        mock_relay_batch.side_effect = [Exception("database gone"), 2, 0]
+
+        with patch("openedx_events.management.commands.relay_outbox.time.sleep") as mock_sleep:
+            with pytest.raises(Exception, match="database gone"):
+                call_command("relay_outbox", "--once")
+            call_command("relay_outbox", "--once")
+
+        self.assertEqual(mock_close_old_connections.call_count, 4)
+        self.assertEqual(mock_relay_batch.call_count, 3)
+        mock_sleep.assert_not_called()
+
+    def test_invalid_options(self):
+        """
+        Check whether invalid batch sizes, partitions and attempts are rejected.
+        """
+        with pytest.raises(CommandError, match="--batch-size"):
+            call_command("relay_outbox", "--once", "--batch-size", "0")
+        with pytest.raises(CommandError, match="--partition"):
+            call_command("relay_outbox", "--once", "--partitions", "2", "--partition", "2")
+        with pytest.raises(CommandError, match="--max-attempts"):
+            call_command("relay_outbox", "--once", "--max-attempts", "0")
+
+
+class PurgeOutboxTest(TestCase):
+    """
+    Tests for purging processed events from the outbox.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        now = timezone.now()
+        # ids 1-10 processed 10 days ago, 11-12 processed 1 day ago, 13 pending.
+        OutboxEvent.objects.bulk_create(
+            [self._make_event(processed_at=now - timedelta(days=10)) for _ in range(10)]
+            + [self._make_event(processed_at=now - timedelta(days=1)) for _ in range(2)]
+            + [self._make_event(processed_at=None)]
+        )
+        self.older_than = now - timedelta(days=7)
+
+    def _make_event(self, processed_at):
+        """
+        Make an unsaved outbox event.
+        """
+        return OutboxEvent(
+            event_type=XBLOCK_PUBLISHED.event_type, topic="topic_a", event_key_field="xblock_info.usage_key",
+            key_hash=0, payload=b"", metadata="{}", processed_at=processed_at,
+        )
+
+    def test_purge_in_chunks(self):
+        """
+        Check whether only old processed events are deleted, in chunks of at most chunk_size events.
+        """
+        with patch("openedx_events.event_bus.outbox.time.sleep") as mock_sleep:
+            deleted = list(purge_processed_events(self.older_than, chunk_size=4, pause=0.1))
+
+        self.assertEqual(deleted, [4, 4, 2])
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertEqual(OutboxEvent.objects.count(), 3)
+        self.assertFalse(OutboxEvent.objects.filter(processed_at__lt=self.older_than).exists())
+
+    @patch("openedx_events.management.commands.purge_event_outbox.logger")
+    def test_command(self, mock_logger):
+        """
+        Check whether the command deletes old processed events and reports the throughput.
+        """
+        call_command("purge_event_outbox", "--days", "7", "--chunk-size", "3", "--sleep", "0")
+
+        self.assertEqual(OutboxEvent.objects.count(), 3)
+        self.assertIn("Deleted 10 outbox events", mock_logger.info.call_args[0][0])
+        self.assertIn("in 4 chunks", mock_logger.info.call_args[0][0])
+
+    @patch("openedx_events.management.commands.purge_event_outbox.logger")
+    def test_dry_run(self, mock_logger):
+        """
+        Check whether dry runs report the events they would delete, and keep them.
+        """
+        call_command("purge_event_outbox", "--days", "0", "--chunk-size", "5", "--dry-run")
+
+        self.assertEqual(OutboxEvent.objects.count(), 13)
+        self.assertIn("Would delete 12 outbox events", mock_logger.info.call_args[0][0])
+        self.assertIn("in 3 chunks", mock_logger.info.call_args[0][0])
+
+    def test_invalid_options(self):
+        """
+        Check whether invalid retention windows and chunk sizes are rejected.
+        """
+        with pytest.raises(CommandError, match="--days"):
+            call_command("purge_event_outbox", "--days", "-1")
+        with pytest.raises(CommandError, match="--chunk-size"):
+            call_command("purge_event_outbox", "--chunk-size", "0")
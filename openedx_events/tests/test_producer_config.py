@@ -6,10 +6,13 @@ from unittest.mock import Mock, patch
 import ddt
 import pytest
 from django.apps import apps
-from django.test import TestCase, override_settings
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
 
+from openedx_events.apps import get_producer_routes
 from openedx_events.content_authoring.data import XBlockData
 from openedx_events.content_authoring.signals import XBLOCK_DELETED, XBLOCK_PUBLISHED
+from openedx_events.event_bus.publishing import publish_on_commit
 from openedx_events.exceptions import ProducerConfigurationError
 
 
@@ -39,19 +42,20 @@ class ProducerConfiguratonTest(TestCase):
         mock_send = Mock()
         mock_producer.return_value = mock_send
         # XBLOCK_PUBLISHED has three configurations where 2 configurations have set enabled as True.
-        XBLOCK_PUBLISHED.send_event(xblock_info=self.xblock_info)
-        mock_send.send.assert_called()
-        mock_send.send.call_count = 2
-        expected_call_args = [
-            {'topic': 'enabled_topic_a', 'event_key_field': 'xblock_info.usage_key'},
-            {'topic': 'enabled_topic_b', 'event_key_field': 'xblock_info.usage_key'}
+        with self.captureOnCommitCallbacks(execute=True):
+            XBLOCK_PUBLISHED.send_event(xblock_info=self.xblock_info)
+            # events are published once the transaction commits.
+            mock_send.send_batch.assert_not_called()
+        mock_send.send_batch.assert_called_once()
+        expected_topics = [
+            ('enabled_topic_a', 'xblock_info.usage_key'),
+            ('enabled_topic_b', 'xblock_info.usage_key'),
         ]
 
-        # check that call_args_list only consists of enabled topics.
-        call_args = mock_send.send.call_args_list[0][1]
-        self.assertEqual(call_args, {**call_args, **expected_call_args[0]})
-        call_args = mock_send.send.call_args_list[1][1]
-        self.assertEqual(call_args, {**call_args, **expected_call_args[1]})
+        # check that the event is sent once, to enabled topics only.
+        messages = mock_send.send_batch.call_args[0][0]
+        self.assertEqual([(message.topic, message.event_key_field) for message in messages], expected_topics)
+        self.assertEqual({message.signal for message in messages}, {XBLOCK_PUBLISHED})
 
     @patch("openedx_events.apps.logger")
     @patch('openedx_events.apps.get_producer')
@@ -70,7 +74,7 @@ class ProducerConfiguratonTest(TestCase):
 
         XBLOCK_PUBLISHED.send_event_with_custom_metadata(metadata, xblock_info=self.xblock_info)
 
-        mock_send.send.assert_not_called()
+        mock_send.send_many.assert_not_called()
         mock_logger.debug.assert_called_once_with(
             "Declining to send signal to the Event Bus since that's "
             f"where it was sent from: {XBLOCK_PUBLISHED.event_type} (preventing recursion)"
@@ -89,7 +93,7 @@ class ProducerConfiguratonTest(TestCase):
         mock_producer.return_value = mock_send
         XBLOCK_PUBLISHED.send_event(xblock_info=self.xblock_info)
         mock_producer.assert_not_called()
-        mock_send.send.assert_not_called()
+        mock_send.send_many.assert_not_called()
 
     def test_configuration_is_validated(self):
         """
@@ -135,7 +139,45 @@ class ProducerConfiguratonTest(TestCase):
             ):
                 apps.get_app_config("openedx_events").ready()
 
+        with override_settings(
+            EVENT_BUS_PRODUCER_CONFIG={
+                "org.openedx.content_authoring.xblock.deleted.v1":
+                {
+                    "some": {"enabled": True, "event_key_field": "some", "mode": "eventually"}
+                }
+            }
+        ):
+            with pytest.raises(ProducerConfigurationError, match="Unknown mode: 'eventually'"):
+                apps.get_app_config("openedx_events").ready()
+
+        with override_settings(
+            EVENT_BUS_PRODUCER_CONFIG={
+                "org.openedx.content_authoring.xblock.deleted.v1":
+                {
+                    "some": {"enabled": False, "event_key_field": "xblock_info.block_key"}
+                }
+            }
+        ):
+            with pytest.raises(ProducerConfigurationError, match="Invalid event_key_field 'xblock_info.block_key'"):
+                apps.get_app_config("openedx_events").ready()
+
+        with override_settings(
+            EVENT_BUS_PRODUCER_CONFIG={
+                "org.openedx.content_authoring.xblock.deleted.v1":
+                {
+                    "some": {"enabled": True, "event_key_field": "xblock_info.usage_key", "codec": "zstd"}
+                }
+            }
+        ):
+            with pytest.raises(ProducerConfigurationError, match="Unknown codec: 'zstd'"):
+                apps.get_app_config("openedx_events").ready()
+
+        with override_settings(EVENT_BUS_PRODUCER_MODE="eventually"):
+            with pytest.raises(ProducerConfigurationError, match="'EVENT_BUS_PRODUCER_MODE' should be one of"):
+                apps.get_app_config("openedx_events").ready()
+
     @patch('openedx_events.apps.get_producer')
+    @override_settings(EVENT_BUS_PRODUCER_MODE="immediate")
     def test_event_data_key_in_handler(self, mock_producer):
         """
         Check whether event_data is constructed properly in handlers.
@@ -143,7 +185,176 @@ class ProducerConfiguratonTest(TestCase):
         mock_send = Mock()
         mock_producer.return_value = mock_send
         XBLOCK_DELETED.send_event(xblock_info=self.xblock_info)
-        mock_send.send.assert_called_once()
+        mock_send.send_many.assert_called_once()
 
-        call_args = mock_send.send.call_args_list[0][1]
+        call_args = mock_send.send_many.call_args_list[0][1]
         self.assertIn("xblock_info", call_args["event_data"])
+
+    def test_producer_routes(self):
+        """
+        Check whether EVENT_BUS_PRODUCER_CONFIG is compiled into a routing table of enabled topics.
+        """
+        routes = get_producer_routes()
+
+        self.assertIs(get_producer_routes(), routes)
+        self.assertEqual(
+            routes[XBLOCK_PUBLISHED.event_type],
+            (("on-commit", (
+                ("enabled_topic_a", "xblock_info.usage_key"), ("enabled_topic_b", "xblock_info.usage_key"),
+            )),),
+        )
+        self.assertEqual(
+            routes[XBLOCK_DELETED.event_type],
+            (("on-commit", (("content-authoring-xblock-lifecycle", "xblock_info.usage_key"),)),),
+        )
+
+    @patch('openedx_events.apps.get_producer')
+    def test_producer_routes_follow_settings(self, mock_producer):
+        """
+        Check whether the routing table is replaced when EVENT_BUS_PRODUCER_CONFIG changes.
+        """
+        mock_send = Mock()
+        mock_producer.return_value = mock_send
+        routes = get_producer_routes()
+
+        with override_settings(
+            EVENT_BUS_PRODUCER_CONFIG={
+                XBLOCK_PUBLISHED.event_type: {
+                    "new_topic": {"event_key_field": "xblock_info.block_type", "enabled": True},
+                },
+            },
+            EVENT_BUS_PRODUCER_MODE="immediate",
+        ):
+            self.assertEqual(
+                get_producer_routes(),
+                {XBLOCK_PUBLISHED.event_type: (("immediate", (("new_topic", "xblock_info.block_type"),)),)},
+            )
+            XBLOCK_PUBLISHED.send_event(xblock_info=self.xblock_info)
+
+        mock_send.send_many.assert_called_once()
+        self.assertEqual(mock_send.send_many.call_args[1]["topics"], (("new_topic", "xblock_info.block_type"),))
+        self.assertIsNot(get_producer_routes(), routes)
+        self.assertEqual(get_producer_routes(), routes)
+
+    @patch('openedx_events.apps.get_producer')
+    def test_per_topic_mode(self, mock_producer):
+        """
+        Check whether topics are published according to their own mode.
+        """
+        mock_send = Mock()
+        mock_producer.return_value = mock_send
+        config = {
+            XBLOCK_PUBLISHED.event_type: {
+                "topic_a": {"event_key_field": "xblock_info.usage_key", "enabled": True},
+                "topic_b": {"event_key_field": "xblock_info.usage_key", "enabled": True, "mode": "immediate"},
+            },
+        }
+
+        with override_settings(EVENT_BUS_PRODUCER_CONFIG=config):
+            with self.captureOnCommitCallbacks(execute=True):
+                XBLOCK_PUBLISHED.send_event(xblock_info=self.xblock_info)
+                mock_send.send_many.assert_called_once()
+                self.assertEqual(mock_send.send_many.call_args[1]["topics"], (("topic_b", "xblock_info.usage_key"),))
+                mock_send.send_batch.assert_not_called()
+
+        mock_send.send_batch.assert_called_once()
+        self.assertEqual([message.topic for message in mock_send.send_batch.call_args[0][0]], ["topic_a"])
+
+
+class OnCommitPublishingTest(TestCase):
+    """
+    Tests for the on-commit publishing mode.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.producer = Mock()
+        self.topics = (("topic_a", "xblock_info.usage_key"), ("topic_b", "xblock_info.usage_key"))
+
+    def _publish(self):
+        """
+        Publish an event to self.topics on commit, returning its metadata.
+        """
+        metadata = XBLOCK_PUBLISHED.generate_signal_metadata()
+        publish_on_commit(
+            self.producer, signal=XBLOCK_PUBLISHED, topics=self.topics, event_data={}, event_metadata=metadata,
+        )
+        return metadata
+
+    def _published_events(self):
+        """
+        Get the (topic, metadata) pairs of each batch published by self.producer.
+        """
+        return [
+            [(message.topic, message.event_metadata) for message in call[0][0]]
+            for call in self.producer.send_batch.call_args_list
+        ]
+
+    def test_events_are_published_in_a_single_batch(self):
+        """
+        Check whether events sent within a transaction are published by a single on-commit callback.
+        """
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            sent = [self._publish() for _ in range(100)]
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(
+            self._published_events(),
+            [[(topic, metadata) for metadata in sent for topic in ("topic_a", "topic_b")]],
+        )
+
+    def test_rolled_back_savepoints_discard_their_events(self):
+        """
+        Check whether events sent within a rolled back savepoint are discarded, and only those.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self._publish()
+            try:
+                with transaction.atomic():
+                    self._publish()
+                    raise RuntimeError("rollback")
+            except RuntimeError:
+                pass
+            with transaction.atomic():
+                second = self._publish()
+            third = self._publish()
+
+        self.assertEqual(
+            [[metadata for _, metadata in batch] for batch in self._published_events()],
+            [[first, first], [second, second], [third, third]],
+        )
+
+    def test_rolled_back_transactions_discard_their_events(self):
+        """
+        Check whether events sent within a rolled back transaction are discarded.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self._publish()
+                    raise RuntimeError("rollback")
+            except RuntimeError:
+                pass
+
+        self.producer.send_batch.assert_not_called()
+
+
+class OnCommitPublishingWithoutTransactionTest(TransactionTestCase):
+    """
+    Tests for the on-commit publishing mode outside of transactions.
+    """
+
+    def test_events_are_published_immediately(self):
+        """
+        Check whether events sent outside of transactions are published right away.
+        """
+        producer = Mock()
+        metadata = XBLOCK_PUBLISHED.generate_signal_metadata()
+
+        publish_on_commit(
+            producer, signal=XBLOCK_PUBLISHED, topics=(("topic_a", "key"),), event_data={}, event_metadata=metadata,
+        )
+
+        producer.send_many.assert_called_once_with(
+            signal=XBLOCK_PUBLISHED, topics=(("topic_a", "key"),), event_data={}, event_metadata=metadata,
+        )
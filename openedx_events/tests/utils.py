@@ -0,0 +1,66 @@
+"""
+Utility methods and classes for testing the event bus backends.
+"""
+import threading
+import time
+
+from opaque_keys.edx.keys import UsageKey
+
+from openedx_events.content_authoring.data import XBlockData
+from openedx_events.content_authoring.signals import XBLOCK_PUBLISHED
+
+
+def make_event_data(block_id):
+    """
+    Return the data of an XBLOCK_PUBLISHED event for a video block.
+    """
+    return {"xblock_info": XBlockData(
+        usage_key=UsageKey.from_string(f"block-v1:edx+DemoX+Demo_course+type@video+block@{block_id}"),
+        block_type="video",
+    )}
+
+
+def send_events(producer, block_ids, topic="topic"):
+    """
+    Send an XBLOCK_PUBLISHED event per block id, returning their ids.
+    """
+    event_ids = []
+    for block_id in block_ids:
+        metadata = XBLOCK_PUBLISHED.generate_signal_metadata()
+        producer.send(
+            signal=XBLOCK_PUBLISHED, topic=topic, event_key_field="xblock_info.usage_key",
+            event_data=make_event_data(block_id), event_metadata=metadata,
+        )
+        event_ids.append(metadata.id)
+    return event_ids
+
+
+def wait_until(condition, timeout=5):
+    """
+    Wait for a condition to be true, returning whether it is before the timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class ReceiveEventsMixin:
+    """
+    Record the XBLOCK_PUBLISHED events emitted during a test in ``received``.
+
+    Each received event is recorded as a (block id, event id, from_event_bus) tuple, and sets ``event_received``.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.received = []
+        self.event_received = threading.Event()
+        XBLOCK_PUBLISHED.connect(self._receive)
+        self.addCleanup(XBLOCK_PUBLISHED.disconnect, self._receive)
+
+    def _receive(self, signal, sender, xblock_info, metadata, **kwargs):  # pylint: disable=unused-argument
+        self.received.append((str(xblock_info.usage_key.block_id), metadata.id, kwargs.get("from_event_bus")))
+        self.event_received.set()